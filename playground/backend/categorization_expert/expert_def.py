@@ -1,26 +1,38 @@
 import logging
-
-from langchain_aws import ChatBedrockConverse
+from typing import List
 
 from backend.core.ocsf.ocsf_versions import OcsfVersion
-from backend.categorization_expert.prompting import get_system_prompt_factory
-from backend.categorization_expert.tool_def import get_tool_bundle
-from backend.categorization_expert.task_def import CategorizationTask
+from backend.categorization_expert.prompting import get_batch_system_prompt_factory, get_system_prompt_factory
+from backend.categorization_expert.tool_def import get_batch_tool_bundle, get_tool_bundle
+from backend.categorization_expert.task_def import BatchCategorizationTask, CategorizationTask
 
-from backend.core.experts import DEFULT_BOTO_CONFIG, Expert, invoke_expert
+from backend.core.experts import (Expert, ExpertBatchResult, ainvoke_expert, ainvoke_expert_batch, get_expert_registry, get_llm,
+                                  invoke_expert)
+from backend.core.inference import make_token_budget_batches
 
 
 logger = logging.getLogger("backend")
 
+# Limits on the entries sent in a single batch categorization request.  The token budget keeps the prompt from growing
+# without bound, and the entry limit keeps the response (one selection and rationale per entry) within max_tokens.
+BATCH_MAX_INPUT_TOKENS = 8000
+BATCH_MAX_ENTRIES = 40
+
 
 def get_categorization_expert(ocsf_version: OcsfVersion) -> Expert:
+    return get_expert_registry().get_or_create(
+        ("categorization", ocsf_version),
+        lambda: _build_categorization_expert(ocsf_version)
+    )
+
+def _build_categorization_expert(ocsf_version: OcsfVersion) -> Expert:
     logger.info(f"Building expert for: {ocsf_version}")
 
     # Get the tool bundle for the given transform language
     tool_bundle = get_tool_bundle(ocsf_version)
 
-    # Define our Bedrock LLM and attach the tools to it
-    llm = ChatBedrockConverse(
+    # Define our LLM and attach the tools to it
+    llm = get_llm(
         model="us.anthropic.claude-3-7-sonnet-20250219-v1:0", 
         temperature=0, # Suitable for straightforward, practical code generation
         max_tokens=16000,
@@ -29,8 +41,7 @@ def get_categorization_expert(ocsf_version: OcsfVersion) -> Expert:
             "thinking": {
                 "type": "disabled"
             }
-        },
-        config=DEFULT_BOTO_CONFIG
+        }
     )
     llm_w_tools = llm.bind_tools(tool_bundle.to_list())
 
@@ -39,12 +50,67 @@ def get_categorization_expert(ocsf_version: OcsfVersion) -> Expert:
         system_prompt_factory=get_system_prompt_factory(
             ocsf_version=ocsf_version
         ),
-        tools=tool_bundle
+        tools=tool_bundle,
+        name="categorization"
     )
 
-def invoke_categorization_expert(expert: Expert, task: CategorizationTask) -> CategorizationTask:
+def invoke_categorization_expert(expert: Expert, task: CategorizationTask, bypass_cache: bool = False) -> CategorizationTask:
+    logger.info(f"Invoking the Categorization Expert for task_id: {task.task_id}")
+    invoke_expert(expert, task, bypass_cache=bypass_cache)
+    logger.info(f"Categorization performed for task_id: {task.task_id}")
+
+    return task
+
+async def ainvoke_categorization_expert(expert: Expert, task: CategorizationTask, bypass_cache: bool = False) -> CategorizationTask:
     logger.info(f"Invoking the Categorization Expert for task_id: {task.task_id}")
-    invoke_expert(expert, task)
+    await ainvoke_expert(expert, task, bypass_cache=bypass_cache)
     logger.info(f"Categorization performed for task_id: {task.task_id}")
 
     return task
+
+def get_batch_categorization_expert(ocsf_version: OcsfVersion) -> Expert:
+    return get_expert_registry().get_or_create(
+        ("batch_categorization", ocsf_version),
+        lambda: _build_batch_categorization_expert(ocsf_version)
+    )
+
+def _build_batch_categorization_expert(ocsf_version: OcsfVersion) -> Expert:
+    logger.info(f"Building batch expert for: {ocsf_version}")
+
+    tool_bundle = get_batch_tool_bundle(ocsf_version)
+
+    # Define our LLM and attach the tools to it
+    llm = get_llm(
+        model="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        temperature=0, # Suitable for straightforward, practical code generation
+        max_tokens=16000,
+        region_name="us-west-2", # Models are only available in limited regions
+        additional_model_request_fields={
+            "thinking": {
+                "type": "disabled"
+            }
+        }
+    )
+    llm_w_tools = llm.bind_tools(tool_bundle.to_list())
+
+    return Expert(
+        llm=llm_w_tools,
+        system_prompt_factory=get_batch_system_prompt_factory(
+            ocsf_version=ocsf_version
+        ),
+        tools=tool_bundle,
+        name="batch_categorization"
+    )
+
+def make_categorization_batches(input_entries: List[str]) -> List[List[str]]:
+    """
+    Splits the entries into batches small enough to categorize in a single request each.
+    """
+    return make_token_budget_batches(input_entries, max_tokens=BATCH_MAX_INPUT_TOKENS, max_items=BATCH_MAX_ENTRIES)
+
+async def ainvoke_batch_categorization_expert(expert: Expert, tasks: List[BatchCategorizationTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+    logger.info(f"Invoking the Batch Categorization Expert for task_ids: {[task.task_id for task in tasks]}")
+    results = await ainvoke_expert_batch(expert, tasks, bypass_cache=bypass_cache)
+    logger.info(f"Batch categorization performed for {sum(1 for result in results if result.error is None)} of {len(tasks)} tasks")
+
+    return results
\ No newline at end of file
@@ -1,2 +1,2 @@
 # Surface the underlying behavior of the module without consumers needing to dig through it
-from backend.categorization_expert.prompting.generation import get_system_prompt_factory
\ No newline at end of file
+from backend.categorization_expert.prompting.generation import get_batch_system_prompt_factory, get_system_prompt_factory
\ No newline at end of file
@@ -1,28 +1,50 @@
-from typing import Any, Callable, Dict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
 
 from langchain_core.messages import SystemMessage
 
+from backend.core.inference import make_cacheable_system_message
 from backend.core.ocsf.ocsf_versions import OcsfVersion
 from backend.categorization_expert.prompting.knowledge import get_ocsf_guidance, get_ocsf_knowledge
-from backend.categorization_expert.prompting.templates import categorization_prompt_template
+from backend.categorization_expert.prompting.templates import (categorization_batch_prompt_suffix_template, categorization_prompt_prefix_template,
+                                                               categorization_prompt_suffix_template)
 
 
-def _get_base_template(ocsf_version: OcsfVersion) -> str:
+@lru_cache(maxsize=None)
+def _get_prompt_prefix(ocsf_version: OcsfVersion) -> str:
     # Use the same template for all versions
-    return categorization_prompt_template
+    return categorization_prompt_prefix_template.format(
+        ocsf_version=ocsf_version,
+        ocsf_knowledge=get_ocsf_knowledge(ocsf_version),
+        ocsf_guidance=get_ocsf_guidance(ocsf_version)
+    )
 
 def get_system_prompt_factory(ocsf_version: OcsfVersion) -> Callable[[Dict[str, Any]], SystemMessage]:
-    base_template = _get_base_template(ocsf_version)
     
     def factory(user_guidance: str, input_entry: str) -> SystemMessage:
-        return SystemMessage(
-            content=base_template.format(
-                ocsf_version=ocsf_version,
-                ocsf_knowledge=get_ocsf_guidance(ocsf_version),
-                ocsf_guidance=get_ocsf_knowledge(ocsf_version),
+        return make_cacheable_system_message(
+            static_prefix=_get_prompt_prefix(ocsf_version),
+            variable_suffix=categorization_prompt_suffix_template.format(
                 input_entry=input_entry,
                 user_guidance=user_guidance
             )
         )
     
+    return factory
+
+def get_batch_system_prompt_factory(ocsf_version: OcsfVersion) -> Callable[[Dict[str, Any]], SystemMessage]:
+
+    def factory(user_guidance: str, input_entries: List[str]) -> SystemMessage:
+        formatted_entries = "\n".join(
+            f'<input_entry index="{index}">{input_entry}</input_entry>'
+            for index, input_entry in enumerate(input_entries)
+        )
+        return make_cacheable_system_message(
+            static_prefix=_get_prompt_prefix(ocsf_version),
+            variable_suffix=categorization_batch_prompt_suffix_template.format(
+                input_entries=formatted_entries,
+                user_guidance=user_guidance
+            )
+        )
+
     return factory
\ No newline at end of file
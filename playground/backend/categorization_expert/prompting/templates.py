@@ -1,4 +1,6 @@
-categorization_prompt_template = """
+# The prompt is split into a static prefix and a variable suffix so that the inference provider can cache the prefix,
+# which holds the (large) event class knowledge, between requests; see make_cacheable_system_message().
+categorization_prompt_prefix_template = """
 You are an AI assistant whose goal is to assist users in transforming their log and data entries into an OCSF
 normalized format.  Overall, this process requires the creation of a Transformer, which is composed of (1) a targeting
 heuristic, such as a ocsf, that identifies specific entries in  data stream, (2) a OCSF event class to normalize entries
@@ -40,10 +42,27 @@ If there is any grounded knowledge on this ocsf_version, it will be provided her
 
 If there is any special guidance for this ocsf_version, it will be provided here:
 <ocsf_guidance>{ocsf_guidance}</ocsf_guidance>
+"""
 
+categorization_prompt_suffix_template = """
 The user has provided the following guidance for this task:
 <user_guidance>{user_guidance}</user_guidance>
 
 The input entry is:
 <input_entry>{input_entry}</input_entry>
-"""
\ No newline at end of file
+"""
+
+# Used with the same prefix as above, so that single and batch requests share the cached event class knowledge
+categorization_batch_prompt_suffix_template = """
+The user has provided the following guidance for this task:
+<user_guidance>{user_guidance}</user_guidance>
+
+Instead of a single input_entry, you are given several input entries below, each wrapped in an input_entry tag with an
+index attribute.  Select an OCSF event class for EVERY one of them, considering each entry on its own merits.  Report
+all of your selections in a single tool call, identifying each entry by its index.
+
+The input entries are:
+<input_entries>
+{input_entries}
+</input_entries>
+"""
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from backend.core.tasks import PlaygroundTask
 
@@ -40,4 +40,31 @@ class CategorizationTask(PlaygroundTask):
             "input": self.input,
             "context": [turn.to_json() for turn in self.context],
             "category": self.category.to_json() if self.category else None
+        }
+
+@dataclass
+class BatchCategorizationTask(PlaygroundTask):
+    inputs: List[str]
+    categories: Dict[int, OcsfCategory] = None # Keyed by the index of the entry in inputs
+
+    def get_work_item(self) -> Any:
+        return self.categories
+
+    def set_work_item(self, new_work_item: Any):
+        if not isinstance(new_work_item, dict) or not all(isinstance(item, OcsfCategory) for item in new_work_item.values()):
+            raise TypeError("new_work_item must be a dict of OcsfCategory")
+        unknown_indices = [index for index in new_work_item.keys() if not 0 <= index < len(self.inputs)]
+        if unknown_indices:
+            raise ValueError(f"Categories were selected for entries that do not exist: {unknown_indices}")
+        self.categories = new_work_item
+
+    def get_tool_name(self) -> str:
+        return "SelectOcsfCategories"
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "inputs": self.inputs,
+            "context": [turn.to_json() for turn in self.context],
+            "categories": {str(index): category.to_json() for index, category in self.categories.items()} if self.categories else None
         }
\ No newline at end of file
@@ -1,4 +1,5 @@
 import logging
+from typing import Dict, List
 
 from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
@@ -33,3 +34,33 @@ select_ocsf_category_tool = StructuredTool.from_function(
     name="SelectOcsfCategory",
     args_schema=SelectOcsfCategory
 )
+
+
+def get_batch_tool_bundle(ocsf_version: OcsfVersion) -> ToolBundle:
+    # Use the same tool for all versions
+    return ToolBundle(
+        task_tool=select_ocsf_categories_tool,
+    )
+
+class OcsfCategorySelection(BaseModel):
+    """The OCSF category selected for one of the data entries."""
+    entry_index: int = Field(description="The index of the data entry this selection is for, EXACTLY as given in the entry's index attribute.")
+    name: str = Field(description="A string value containing the full OCSF Category name and NOTHING ELSE.")
+    id: str = Field(description="A string value containing the OCSF Category id and NOTHING ELSE.")
+    rationale: str = Field(description="A thorough explanation of why this particular OCSF category is the best pick available for the data entry.")
+
+class SelectOcsfCategories(BaseModel):
+    """Select an OCSF category for each of several data entries."""
+    selections: List[OcsfCategorySelection] = Field(description="The selected OCSF category for each data entry, with exactly one selection per entry.")
+
+def select_ocsf_categories(selections: List[OcsfCategorySelection]) -> Dict[int, OcsfCategory]:
+    return {
+        selection.entry_index: select_ocsf_category(name=selection.name, id=selection.id, rationale=selection.rationale)
+        for selection in selections
+    }
+
+select_ocsf_categories_tool = StructuredTool.from_function(
+    func=select_ocsf_categories,
+    name="SelectOcsfCategories",
+    args_schema=SelectOcsfCategories
+)
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import logging
+import threading
+from types import CodeType, ModuleType
+from typing import Dict
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains a bounded cache of compiled Python code, shared by the validators and anything else that needs
+to turn LLM-generated (or user-edited) logic into something executable.  Entries are keyed by a hash of the source, so
+repeatedly loading unchanged logic skips both the compile step and the re-execution of its dependency setup.
+"""
+
+DEFAULT_CODE_CACHE_MAX_ENTRIES = 512
+
+
+@dataclass
+class CodeCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    max_entries: int
+
+    def to_json(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": self.entries,
+            "max_entries": self.max_entries
+        }
+
+@dataclass
+class _CodeCacheEntry:
+    code: CodeType
+    module: ModuleType = None
+
+class CompiledCodeCache:
+    def __init__(self, max_entries: int = DEFAULT_CODE_CACHE_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("The code cache must be able to hold at least one entry")
+
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _CodeCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(module_name: str, source: str) -> str:
+        return hashlib.sha256(f"{module_name}\0{source}".encode("utf-8")).hexdigest()
+
+    def _get_entry(self, module_name: str, source: str) -> _CodeCacheEntry:
+        key = self.make_key(module_name, source)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry
+            self._misses += 1
+
+        # Compile outside the lock; a SyntaxError propagates to the caller and nothing is cached
+        entry = _CodeCacheEntry(code=compile(source, f"<{module_name}>", "exec"))
+
+        with self._lock:
+            # Another thread may have raced us to it; keep whichever entry landed first
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+        return entry
+
+    def get_code(self, module_name: str, source: str) -> CodeType:
+        """
+        Returns the compiled code object for the source, compiling it only if it is not already cached.
+        """
+        return self._get_entry(module_name, source).code
+
+    def load_module(self, module_name: str, source: str) -> ModuleType:
+        """
+        Returns a module populated by executing the source, executing it only if it is not already cached.  The
+        returned module is shared between callers, so the logic it contains must not rely on mutating module state.
+        """
+        entry = self._get_entry(module_name, source)
+
+        module = entry.module
+        if module is None:
+            module = ModuleType(module_name)
+            exec(entry.code, module.__dict__)
+            entry.module = module
+
+        return module
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> CodeCacheStats:
+        with self._lock:
+            return CodeCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                max_entries=self.max_entries
+            )
+
+
+# The process-wide cache shared by the extraction pattern and transformer validators
+PYTHON_CODE_CACHE = CompiledCodeCache()
+
+def get_python_code_cache() -> CompiledCodeCache:
+    return PYTHON_CODE_CACHE
@@ -1,23 +1,35 @@
+import asyncio
 from dataclasses import dataclass
+import json
 import logging
-from typing import Any, Callable, Dict
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Tuple
 
 from botocore.config import Config
-from langchain_core.language_models import LanguageModelInput
+from langchain_aws import ChatBedrockConverse
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
 from langchain_core.messages import BaseMessage, SystemMessage, ToolMessage
 from langchain_core.runnables import Runnable
 
 from backend.regex_expert.tool_def import ToolBundle
 from backend.core.tasks import PlaygroundTask
 
-from backend.core.inference import perform_inference
+from backend.core.fake_llm import get_fake_llm, get_fake_llm_profile
+from backend.core.inference import InferenceResult, evict_inference_result, perform_async_inference, perform_inference
+from backend.core.metrics import TOOL_CALL_FAILURES, make_throttle_recorder, record_inference, time_expert_invocation
 
 
 logger = logging.getLogger("backend")
 
+# The number of concurrent LLM requests a single Bedrock client can have in flight.  Clients are shared across requests
+# (see get_bedrock_llm()), so this must cover the peak number of simultaneous invocations of the same model config.
+BEDROCK_MAX_POOL_CONNECTIONS = 50
+
 # Define a boto Config to use w/ our LLM that's more resilient to long waits and frequent throttling
 DEFULT_BOTO_CONFIG = Config(
     read_timeout=120,  # Wait 2 minutes for a response from the LLM
+    max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
     retries={
         'max_attempts': 20,  # Increase the number of retry attempts
         'mode': 'adaptive'   # Use adaptive retry strategy for better throttling handling
@@ -29,35 +41,168 @@ class Expert:
     llm: Runnable[LanguageModelInput, BaseMessage]
     system_prompt_factory: Callable[[Dict[str, Any]], SystemMessage]
     tools: ToolBundle
+    name: str = "expert" # Identifies the expert in logs and metrics
 
 class ExpertInvocationError(Exception):
     pass
 
-def invoke_expert(expert: Expert, task: PlaygroundTask) -> PlaygroundTask:
+@dataclass
+class ExpertBatchResult:
+    task: PlaygroundTask
+    error: Exception = None # Set if the expert could not be invoked on the task; the task is then left unfinished
+
+
+_BEDROCK_LLMS: Dict[str, ChatBedrockConverse] = dict()
+_BEDROCK_LLMS_LOCK = threading.Lock()
+
+def get_bedrock_llm(model: str, temperature: float, max_tokens: int, region_name: str, additional_model_request_fields: Dict[str, Any]) -> ChatBedrockConverse:
+    """
+    Returns a long-lived Bedrock LLM for the given configuration, creating it on first use.  Each LLM owns a boto client
+    and its connection pool, so sharing them avoids paying for client creation and new connections on every request.
+    """
+    key = json.dumps([model, temperature, max_tokens, region_name, additional_model_request_fields], sort_keys=True)
+
+    with _BEDROCK_LLMS_LOCK:
+        llm = _BEDROCK_LLMS.get(key)
+        if llm is None:
+            logger.info(f"Creating Bedrock LLM client for: {key}")
+            llm = ChatBedrockConverse(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                region_name=region_name,
+                additional_model_request_fields=additional_model_request_fields,
+                config=DEFULT_BOTO_CONFIG
+            )
+            llm.client.meta.events.register("needs-retry.bedrock-runtime", make_throttle_recorder(model))
+            _BEDROCK_LLMS[key] = llm
+
+    return llm
+
+def get_llm(model: str, temperature: float, max_tokens: int, region_name: str, additional_model_request_fields: Dict[str, Any]) -> BaseChatModel:
+    """
+    Returns the LLM the experts should use for the given configuration: the shared Bedrock LLM, or a fake stand-in for
+    the model if one has been configured (see configure_fake_llm()).
+    """
+    if get_fake_llm_profile() is not None:
+        return get_fake_llm(model)
+    return get_bedrock_llm(model, temperature, max_tokens, region_name, additional_model_request_fields)
+
+
+class ExpertRegistry:
+    def __init__(self):
+        self._experts: Dict[Tuple[Hashable, ...], Expert] = dict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Tuple[Hashable, ...], factory: Callable[[], Expert]) -> Expert:
+        """
+        Returns the Expert registered under the key, building it with the factory on first use.  Experts hold no
+        per-request state, so a single instance is safely shared by all concurrent requests.
+        """
+        with self._lock:
+            expert = self._experts.get(key)
+            if expert is None:
+                expert = factory()
+                self._experts[key] = expert
+            return expert
+
+    def clear(self):
+        with self._lock:
+            self._experts.clear()
+
+
+EXPERT_REGISTRY = ExpertRegistry()
+
+def get_expert_registry() -> ExpertRegistry:
+    return EXPERT_REGISTRY
+
+def invoke_expert(expert: Expert, task: PlaygroundTask, bypass_cache: bool = False) -> PlaygroundTask:
+    """
+    Invokes the GenAI expert on the given task and updates the passed-in task with the results.  If bypass_cache is set,
+    the LLM is invoked even if the inference cache holds a response for the task.
+    """
+
+    logger.debug(f"Initial Task: {str(task.to_json())}")
+
+    with time_expert_invocation(expert.name):
+        # Invoke the LLM.  We force the LLM to perform the task by having it make a tool call.  A tool call that conforms
+        # to the tool's API will perform the requested task.
+        inference_task = task.to_inference_task()
+        inference_start = time.perf_counter()
+        inference_result = perform_inference(expert.llm, [inference_task], bypass_cache=bypass_cache)[0]
+        record_inference(expert.name, inference_result, time.perf_counter() - inference_start)
+
+        return _apply_inference_result(expert, task, inference_result)
+
+async def ainvoke_expert(expert: Expert, task: PlaygroundTask, bypass_cache: bool = False) -> PlaygroundTask:
     """
-    Invokes the GenAI expert on the given task and updates the passed-in task with the results.
+    Async version of invoke_expert(), for callers that are already running in an event loop.
     """
 
     logger.debug(f"Initial Task: {str(task.to_json())}")
 
-    # Invoke the LLM.  We force the LLM to perform the task by having it make a tool call.  A tool call that conforms
-    # to the tool's API will perform the requested task.
-    inference_task = task.to_inference_task()
-    inference_result = perform_inference(expert.llm, [inference_task])[0]
+    with time_expert_invocation(expert.name):
+        inference_task = task.to_inference_task()
+        inference_start = time.perf_counter()
+        inference_result = (await perform_async_inference(expert.llm, [inference_task], bypass_cache=bypass_cache))[0]
+        record_inference(expert.name, inference_result, time.perf_counter() - inference_start)
+
+        return _apply_inference_result(expert, task, inference_result)
+
+async def ainvoke_expert_batch(expert: Expert, tasks: List[PlaygroundTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+    """
+    Invokes the GenAI expert on each of the tasks concurrently, returning one result per task in the same order.  A
+    failure on one task is reported in that task's result rather than aborting the others, so callers can retry just
+    the tasks that failed.
+    """
+    outcomes = await asyncio.gather(
+        *[ainvoke_expert(expert, task, bypass_cache=bypass_cache) for task in tasks],
+        return_exceptions=True
+    )
+
+    results = []
+    for task, outcome in zip(tasks, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Expert invocation failed for task_id {task.task_id}: {str(outcome)}")
+            results.append(ExpertBatchResult(task=task, error=outcome))
+        elif isinstance(outcome, BaseException):
+            raise outcome # Cancellation and the like should propagate as usual
+        else:
+            results.append(ExpertBatchResult(task=task))
+    return results
+
+def invoke_expert_batch(expert: Expert, tasks: List[PlaygroundTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+    """
+    Synchronous version of ainvoke_expert_batch().
+    """
+    return asyncio.run(ainvoke_expert_batch(expert, tasks, bypass_cache=bypass_cache))
 
+def _apply_inference_result(expert: Expert, task: PlaygroundTask, inference_result: InferenceResult) -> PlaygroundTask:
     logger.debug(f"Inference Result: {str(inference_result.to_json())}")
 
     # Confirm that the LLM request resulted in a tool call
     if not inference_result.response.tool_calls:
+        TOOL_CALL_FAILURES.inc(expert=expert.name, reason="missing")
         raise ExpertInvocationError("The LLM did not create a tool call for the task.  Final LLM message: " + inference_result.response.content)
 
     # Append the LLM response to the context
     task.context.append(inference_result.response)
 
-    # Perform the tool call using the LLM's response to create our final task result
+    # Perform the tool call using the LLM's response to create our final task result.  A tool call that can't be
+    # applied is no more usable the next time, so it's dropped from the inference cache.
     tool_call = inference_result.response.tool_calls[-1]
-    result = expert.tools.task_tool(tool_call["args"])
-    task.set_work_item(result)
+    try:
+        result = expert.tools.task_tool(tool_call["args"])
+    except Exception:
+        TOOL_CALL_FAILURES.inc(expert=expert.name, reason="invalid")
+        evict_inference_result(inference_result)
+        raise
+
+    try:
+        task.set_work_item(result)
+    except Exception:
+        evict_inference_result(inference_result)
+        raise
 
     # Append the tool call to the context
     task.context.append(
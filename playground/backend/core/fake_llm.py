@@ -0,0 +1,305 @@
+import asyncio
+from dataclasses import dataclass, field
+import json
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import uuid
+
+from botocore.exceptions import ClientError
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+from backend.core.inference import estimate_token_count
+from backend.core.metrics import BEDROCK_THROTTLES
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains a fake chat model that stands in for Bedrock when load testing or benchmarking the backend.  It
+answers every request with a valid call of the tool bound to it, built deterministically from the prompt (or taken from
+a fixture), and simulates the parts of a real model that matter for capacity planning: response latency that grows with
+the number of output tokens, and throttling errors that are retried with backoff before surfacing to the caller.
+"""
+
+# The most variable-looking tokens of an entry the fake analysis will map, to keep its reports a realistic size
+MAX_FAKE_MAPPINGS = 10
+
+
+@dataclass
+class FakeLlmProfile:
+    latency_seconds: float = 0.0 # Fixed time before the first token
+    latency_jitter_seconds: float = 0.0 # Up to this much extra latency is added at random
+    output_tokens_per_second: Optional[float] = None # If set, output tokens take this long to "generate"
+    throttle_rate: float = 0.0 # The chance that any one attempt is rejected with a ThrottlingException
+    max_retries: int = 3 # Throttled attempts are retried this many times before the error is raised
+    retry_backoff_seconds: float = 0.1 # Doubled after each throttled attempt
+    seed: int = 0
+    fixtures: Dict[str, Dict[str, Any]] = field(default_factory=dict) # Tool name -> arguments to return verbatim
+
+    @staticmethod
+    def from_settings(fake_settings: Dict[str, Any]) -> 'FakeLlmProfile':
+        fixtures = dict()
+        fixtures_path = fake_settings.get("FIXTURES_PATH", None)
+        if fixtures_path:
+            with open(fixtures_path, "r") as fixtures_file:
+                fixtures = json.load(fixtures_file)
+
+        return FakeLlmProfile(
+            latency_seconds=fake_settings.get("LATENCY_SECONDS", 0.0),
+            latency_jitter_seconds=fake_settings.get("LATENCY_JITTER_SECONDS", 0.0),
+            output_tokens_per_second=fake_settings.get("OUTPUT_TOKENS_PER_SECOND", None),
+            throttle_rate=fake_settings.get("THROTTLE_RATE", 0.0),
+            max_retries=fake_settings.get("MAX_RETRIES", 3),
+            retry_backoff_seconds=fake_settings.get("RETRY_BACKOFF_SECONDS", 0.1),
+            seed=fake_settings.get("SEED", 0),
+            fixtures=fixtures
+        )
+
+
+def _get_text(message: BaseMessage) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    # Messages with cache checkpoints are lists of content blocks
+    return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in message.content)
+
+def _get_tagged(prompt: str, tag: str) -> Optional[str]:
+    match = re.search(rf"<{tag}>\s*(.*?)\s*</{tag}>", prompt, re.DOTALL)
+    return match.group(1) if match else None
+
+
+def make_fake_entities_report(prompt: str) -> Dict[str, Any]:
+    input_entry = _get_tagged(prompt, "input_entry") or ""
+
+    # Tokens with digits in them are usually the values that vary between entries, so those are what get mapped
+    values = []
+    for token in input_entry.split():
+        if any(char.isdigit() for char in token) and token not in values:
+            values.append(token)
+
+    mappings = [{
+        "entities": [{"value": input_entry, "description": "The full original entry"}],
+        "ocsf_path": "raw_data",
+        "path_rationale": "The original entry is preserved as-is"
+    }]
+    mappings.extend({
+        "entities": [{"value": value, "description": f"Variable value {index + 1} of the entry"}],
+        "ocsf_path": "unknown",
+        "path_rationale": "The value varies between entries, but its meaning is unknown"
+    } for index, value in enumerate(values[:MAX_FAKE_MAPPINGS]))
+
+    return {
+        "data_type": "Unstructured log entry",
+        "type_rationale": "Generated by the fake LLM",
+        "mappings": mappings
+    }
+
+def make_fake_extraction_patterns(prompt: str) -> Dict[str, Any]:
+    mapping_list = json.loads(_get_tagged(prompt, "mapping_list") or "[]")
+
+    patterns = []
+    for mapping in mapping_list:
+        values = [entity["value"] for entity in mapping.get("entities", [])]
+        patterns.append({
+            "id": mapping["id"],
+            "extract_logic": f"def extract(input_entry: str) -> typing.List[str]:\n    return [value for value in {values!r} if value in input_entry]",
+            "transform_logic": "def transform(extracted_values: typing.List[str]) -> str:\n    return \" \".join(extracted_values)"
+        })
+
+    return {"patterns": patterns}
+
+def make_fake_javascript_regex(prompt: str) -> Dict[str, Any]:
+    input_entry = _get_tagged(prompt, "input_entry") or ""
+
+    # Escape the entry, then generalize its runs of digits so the regex matches other entries of the same shape
+    escaped = re.sub(r"[.*+?^${}()|\[\]\\/]", lambda match: "\\" + match.group(0), input_entry)
+    generalized = re.sub(r"\d+", r"\\d+", escaped)
+
+    return {
+        "value": f"^{generalized}$",
+        "rationale": "Generated by the fake LLM: the entry with its digits generalized"
+    }
+
+def _pick_event_class(input_entry: str, event_classes: List[Dict[str, str]]) -> Dict[str, str]:
+    # Pick the event class whose description shares the most words with the entry; ties go to the first listed
+    entry_words = set(re.findall(r"[a-z]{4,}", input_entry.lower()))
+    def score(event_class: Dict[str, str]) -> int:
+        class_words = set(re.findall(r"[a-z]{4,}", f"{event_class['event_name']} {event_class['event_details']}".lower()))
+        return len(entry_words & class_words)
+    return max(event_classes, key=score)
+
+def _get_event_classes(prompt: str) -> List[Dict[str, str]]:
+    event_classes = json.loads(_get_tagged(prompt, "ocsf_event_classes") or "[]")
+    if not event_classes:
+        raise ValueError("The prompt does not list any OCSF event classes to choose from")
+    return event_classes
+
+def make_fake_ocsf_category(prompt: str) -> Dict[str, Any]:
+    best = _pick_event_class(_get_tagged(prompt, "input_entry") or "", _get_event_classes(prompt))
+
+    return {
+        "name": best["event_name"],
+        "id": best["event_id"],
+        "rationale": "Generated by the fake LLM: the event class whose description best overlaps the entry"
+    }
+
+def make_fake_ocsf_categories(prompt: str) -> Dict[str, Any]:
+    event_classes = _get_event_classes(prompt)
+
+    selections = []
+    for index, input_entry in re.findall(r'<input_entry index="(\d+)">(.*?)</input_entry>', prompt, re.DOTALL):
+        best = _pick_event_class(input_entry, event_classes)
+        selections.append({
+            "entry_index": int(index),
+            "name": best["event_name"],
+            "id": best["event_id"],
+            "rationale": "Generated by the fake LLM: the event class whose description best overlaps the entry"
+        })
+
+    return {"selections": selections}
+
+# Builds the tool call arguments for each expert's tool from the text of the prompt
+FAKE_TOOL_RESPONDERS: Dict[str, Callable[[str], Dict[str, Any]]] = {
+    "CreateEntitiesReport": make_fake_entities_report,
+    "GenerateExtractionPatterns": make_fake_extraction_patterns,
+    "MakeJavascriptRegex": make_fake_javascript_regex,
+    "SelectOcsfCategory": make_fake_ocsf_category,
+    "SelectOcsfCategories": make_fake_ocsf_categories,
+}
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model that mimics ChatBedrockConverse for the experts: bind_tools() works the same way, and every response
+    is a call of the last tool bound.
+    """
+    model: str = "fake"
+    profile: FakeLlmProfile = Field(default_factory=FakeLlmProfile)
+
+    _rng: random.Random = PrivateAttr()
+    _rng_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.profile.seed) # Shared by all calls, so a run's draws depend only on the seed
+
+    @property
+    def _llm_type(self) -> str:
+        return "playground-fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _make_response(self, messages: List[BaseMessage], tools: List[Dict[str, Any]]) -> AIMessage:
+        if not tools:
+            raise ValueError("The fake LLM can only respond with a tool call, but no tools are bound to it")
+        tool_name = tools[-1]["function"]["name"]
+
+        prompt = "\n".join(_get_text(message) for message in messages)
+        if tool_name in self.profile.fixtures:
+            args = self.profile.fixtures[tool_name]
+        elif tool_name in FAKE_TOOL_RESPONDERS:
+            args = FAKE_TOOL_RESPONDERS[tool_name](prompt)
+        else:
+            raise ValueError(f"The fake LLM has no fixture or responder for tool: {tool_name}")
+
+        input_tokens = estimate_token_count(prompt)
+        output_tokens = estimate_token_count(json.dumps(args))
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": tool_name, "args": args, "id": f"tooluse_{uuid.uuid4().hex}"}],
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens},
+            response_metadata={"model_name": self.model}
+        )
+
+    def _draw_latency(self, output_tokens: int) -> float:
+        with self._rng_lock:
+            jitter = self._rng.random() * self.profile.latency_jitter_seconds
+        generation = output_tokens / self.profile.output_tokens_per_second if self.profile.output_tokens_per_second else 0.0
+        return self.profile.latency_seconds + jitter + generation
+
+    def _draw_throttle(self, attempt: int) -> Optional[float]:
+        """
+        Decides whether the attempt is throttled.  Returns how long to back off before the next attempt, or None if
+        the attempt goes through.  Raises a ThrottlingException once the retries are exhausted, as boto would.
+        """
+        with self._rng_lock:
+            throttled = self._rng.random() < self.profile.throttle_rate
+        if not throttled:
+            return None
+
+        BEDROCK_THROTTLES.inc(model=self.model)
+        if attempt >= self.profile.max_retries:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded (simulated)"}},
+                "Converse"
+            )
+        return self.profile.retry_backoff_seconds * (2 ** attempt)
+
+    def _finish_response(self, response: AIMessage, retries: int) -> ChatResult:
+        response.response_metadata["ResponseMetadata"] = {"RetryAttempts": retries}
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        response = self._make_response(messages, kwargs.get("tools", []))
+
+        attempt = 0
+        while (backoff := self._draw_throttle(attempt)) is not None:
+            time.sleep(backoff)
+            attempt += 1
+
+        time.sleep(self._draw_latency(response.usage_metadata["output_tokens"]))
+        return self._finish_response(response, attempt)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        response = self._make_response(messages, kwargs.get("tools", []))
+
+        attempt = 0
+        while (backoff := self._draw_throttle(attempt)) is not None:
+            await asyncio.sleep(backoff)
+            attempt += 1
+
+        await asyncio.sleep(self._draw_latency(response.usage_metadata["output_tokens"]))
+        return self._finish_response(response, attempt)
+
+
+# The experts use Bedrock unless a fake profile is configured at startup; see configure_fake_llm()
+FAKE_LLM_PROFILE: Optional[FakeLlmProfile] = None
+_FAKE_LLMS: Dict[str, FakeChatModel] = dict()
+_FAKE_LLMS_LOCK = threading.Lock()
+
+def configure_fake_llm(profile: Optional[FakeLlmProfile]):
+    """
+    Makes the experts use fake LLMs with the given profile (or Bedrock again, if None).  Experts are built once and
+    shared, so this must be called before they are first used.
+    """
+    global FAKE_LLM_PROFILE
+    with _FAKE_LLMS_LOCK:
+        FAKE_LLM_PROFILE = profile
+        _FAKE_LLMS.clear()
+
+def get_fake_llm_profile() -> Optional[FakeLlmProfile]:
+    return FAKE_LLM_PROFILE
+
+def get_fake_llm(model: str) -> FakeChatModel:
+    with _FAKE_LLMS_LOCK:
+        llm = _FAKE_LLMS.get(model)
+        if llm is None:
+            logger.info(f"Creating fake LLM for: {model}")
+            llm = FakeChatModel(model=model, profile=FAKE_LLM_PROFILE or FakeLlmProfile())
+            _FAKE_LLMS[model] = llm
+        return llm
@@ -1,14 +1,21 @@
 import asyncio
 from dataclasses import dataclass
 import logging
-from typing import List
+from typing import Any, Callable, Dict, List, TypeVar
 
 from langchain_core.language_models import LanguageModelInput
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
 from langchain_core.runnables import Runnable
 
+from backend.core.inference_cache import get_inference_cache, make_inference_cache_key
+
 logger = logging.getLogger("backend")
 
+# Roughly how many characters make up a token.  Good enough for budgeting prompts without a model-specific tokenizer.
+CHARS_PER_TOKEN = 4
+
+T = TypeVar("T")
+
 @dataclass
 class InferenceRequest:
     task_id: str
@@ -20,28 +27,141 @@ class InferenceRequest:
             "context": [turn.to_json() for turn in self.context]
         }
 
+@dataclass
+class InferenceUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0 # The portion of the output tokens spent on extended thinking, if reported
+    cache_read_tokens: int = 0 # Input tokens served from the provider's prompt cache
+    cache_write_tokens: int = 0 # Input tokens written to the provider's prompt cache
+
+    @staticmethod
+    def from_response(response: BaseMessage) -> 'InferenceUsage':
+        usage_metadata = getattr(response, "usage_metadata", None) or dict()
+        input_token_details = usage_metadata.get("input_token_details", None) or dict()
+        output_token_details = usage_metadata.get("output_token_details", None) or dict()
+
+        # Older releases of the Bedrock integration only surface the cache counts in the raw response metadata
+        raw_usage = response.response_metadata.get("usage", None) or dict()
+
+        return InferenceUsage(
+            input_tokens=usage_metadata.get("input_tokens", 0),
+            output_tokens=usage_metadata.get("output_tokens", 0),
+            reasoning_tokens=output_token_details.get("reasoning", 0),
+            cache_read_tokens=input_token_details.get("cache_read", raw_usage.get("cacheReadInputTokens", 0)),
+            cache_write_tokens=input_token_details.get("cache_creation", raw_usage.get("cacheWriteInputTokens", 0))
+        )
+
+    def to_json(self) -> Dict[str, int]:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "reasoning_tokens": self.reasoning_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens
+        }
+
 @dataclass
 class InferenceResult:
     task_id: str
     response: BaseMessage
+    usage: InferenceUsage = None
+    cached: bool = False # Whether the response was served from the inference cache rather than the model
+    cache_key: str = None # The key the response is cached under, if it is
 
     def to_json(self) -> dict:
         return {
             "task_id": self.task_id,
-            "response": self.response.to_json()
+            "response": self.response.to_json(),
+            "usage": self.usage.to_json() if self.usage else None,
+            "cached": self.cached
         }
 
 
-def perform_inference(llm: Runnable[LanguageModelInput, BaseMessage], batched_tasks: List[InferenceRequest]) -> List[InferenceResult]:
-    return asyncio.run(_perform_async_inference(llm, batched_tasks))
+def estimate_token_count(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def make_token_budget_batches(items: List[T], max_tokens: int, max_items: int, get_text: Callable[[T], str] = str) -> List[List[T]]:
+    """
+    Splits the items, in order, into batches whose estimated token count is at most max_tokens and whose length is at
+    most max_items.  An item that is over the token budget on its own is put in a batch by itself.
+    """
+    batches = []
+    current_batch = []
+    current_tokens = 0
+    for item in items:
+        item_tokens = estimate_token_count(get_text(item))
+        if current_batch and (current_tokens + item_tokens > max_tokens or len(current_batch) >= max_items):
+            batches.append(current_batch)
+            current_batch = []
+            current_tokens = 0
+        current_batch.append(item)
+        current_tokens += item_tokens
+
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+def make_cacheable_system_message(static_prefix: str, variable_suffix: str) -> SystemMessage:
+    """
+    Creates a system message with a cache checkpoint between the static prefix and the variable suffix.  The provider
+    caches everything before the checkpoint, so the prefix must be byte-for-byte identical between requests to be reused.
+    """
+    content: List[Dict[str, Any]] = [
+        {"type": "text", "text": static_prefix},
+        {"cachePoint": {"type": "default"}},
+        {"type": "text", "text": variable_suffix}
+    ]
+    return SystemMessage(content=content)
+
+
+def perform_inference(llm: Runnable[LanguageModelInput, BaseMessage], batched_tasks: List[InferenceRequest], bypass_cache: bool = False) -> List[InferenceResult]:
+    """
+    Performs the inference tasks.  If the inference cache is enabled, cached responses are returned where available
+    unless bypass_cache is set, in which case the model is always invoked and its responses refresh the cache.
+    """
+    return asyncio.run(perform_async_inference(llm, batched_tasks, bypass_cache))
 
 # Inference APIs can be throttled pretty aggressively.  Performing them as a batch operation can help with increasing
 # throughput. Ideally, we'd be using Bedrock's batch inference API, but Bedrock's approach to that is an asynchronous
 # process that writes the results to S3 and returns a URL to the results.  This is not implemented by default in the
 # ChatBedrockConverse class, so we'll skip true batch processing for now.  Instead, we'll just perform the inferences in
 # parallel with aggressive retry logic.
-async def _perform_async_inference(llm: Runnable[LanguageModelInput, BaseMessage], batched_tasks: List[InferenceRequest]) -> List[InferenceResult]:
-    async_responses = [llm.ainvoke(task.context) for task in batched_tasks]
-    responses = await asyncio.gather(*async_responses)
+async def perform_async_inference(llm: Runnable[LanguageModelInput, BaseMessage], batched_tasks: List[InferenceRequest], bypass_cache: bool = False) -> List[InferenceResult]:
+    cache = get_inference_cache()
+
+    async def infer(task: InferenceRequest) -> InferenceResult:
+        cache_key = make_inference_cache_key(llm, task.context) if cache else None
+
+        if cache and not bypass_cache:
+            cached_response = cache.get(cache_key)
+            if cached_response is not None:
+                logger.info(f"Inference cache hit for task_id {task.task_id}")
+                return InferenceResult(task_id=task.task_id, response=cached_response, usage=InferenceUsage(), cached=True, cache_key=cache_key)
+
+        response = await llm.ainvoke(task.context)
+
+        # Only responses that made a tool call are cached; the experts treat anything else as a failure, and caching
+        # it would make that failure stick until the entry expired.  A tool call that turns out to be invalid is evicted
+        # by the expert; see evict_inference_result().
+        cached_under = None
+        if cache and isinstance(response, AIMessage) and response.tool_calls:
+            cache.put(cache_key, response)
+            cached_under = cache_key
+
+        usage = InferenceUsage.from_response(response)
+        logger.info(f"Inference usage for task_id {task.task_id}: {usage.to_json()}")
+        return InferenceResult(task_id=task.task_id, response=response, usage=usage, cache_key=cached_under)
+
+    return list(await asyncio.gather(*[infer(task) for task in batched_tasks]))
+
+def evict_inference_result(result: InferenceResult):
+    """
+    Removes the result's response from the inference cache, for a response the caller could not use.  Otherwise the
+    same request would be served the same unusable response until the entry expired.
+    """
+    cache = get_inference_cache()
+    if cache and result.cache_key is not None:
+        logger.info(f"Evicting the cached inference response for task_id {result.task_id}")
+        cache.delete(result.cache_key)
 
-    return [InferenceResult(task_id=task.task_id, response=response) for task, response in zip(batched_tasks, responses)]
@@ -0,0 +1,198 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.runnables import Runnable, RunnableBinding
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains an opt-in cache of LLM responses.  Entries are keyed by a hash of everything that determines the
+response: the model and its parameters, the tools bound to it, and a canonical form of the message context (which drops
+per-invocation noise such as message ids and response metadata).  Lookups go to a small in-memory LRU first and then to
+a SQLite store on disk, so that cached responses survive restarts of the server.
+"""
+
+DEFAULT_MEMORY_MAX_ENTRIES = 256
+DEFAULT_DISK_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def _canonicalize_message(message: BaseMessage) -> Dict[str, Any]:
+    canonical = {
+        "type": message.type,
+        "content": message.content
+    }
+    if isinstance(message, AIMessage) and message.tool_calls:
+        canonical["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in message.tool_calls]
+    if getattr(message, "tool_call_id", None):
+        canonical["tool_call_id"] = message.tool_call_id
+    return canonical
+
+def _get_model_and_kwargs(llm: Runnable[LanguageModelInput, BaseMessage]) -> Tuple[Runnable, Dict[str, Any]]:
+    # Experts invoke the chat model through the binding created by bind_tools(); unwrap it to find the tools
+    kwargs = dict()
+    while isinstance(llm, RunnableBinding):
+        kwargs = {**llm.kwargs, **kwargs}
+        llm = llm.bound
+    return llm, kwargs
+
+def make_inference_cache_key(llm: Runnable[LanguageModelInput, BaseMessage], context: List[BaseMessage]) -> str:
+    model, kwargs = _get_model_and_kwargs(llm)
+
+    if isinstance(model, BaseChatModel):
+        # The same identity string LangChain's own LLM caches use; it covers the model id and its parameters
+        model_identity = model._get_llm_string(**kwargs)
+    else:
+        model_identity = json.dumps([repr(model), kwargs], sort_keys=True, default=str)
+
+    canonical_context = json.dumps([_canonicalize_message(message) for message in context], sort_keys=True, default=str)
+
+    return hashlib.sha256(f"{model_identity}\0{canonical_context}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class InferenceCacheStats:
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    memory_entries: int
+    disk_entries: int
+
+    def to_json(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": self.memory_entries,
+            "disk_entries": self.disk_entries
+        }
+
+class InferenceCache:
+    def __init__(self, disk_path: Optional[Union[str, Path]] = None, memory_max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES,
+                 disk_max_entries: int = DEFAULT_DISK_MAX_ENTRIES, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Creates the cache.  If no disk path is provided, only the in-memory tier is used.
+        """
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_entries = disk_max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: OrderedDict[str, Tuple[float, BaseMessage]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self._disk = None
+        if disk_path is not None:
+            self._disk = sqlite3.connect(str(disk_path), check_same_thread=False) # Access is serialized by self._lock
+            self._disk.execute("CREATE TABLE IF NOT EXISTS inference_cache (key TEXT PRIMARY KEY, created_at REAL NOT NULL, response TEXT NOT NULL)")
+            self._disk.execute("CREATE INDEX IF NOT EXISTS inference_cache_created_at ON inference_cache (created_at)")
+            self._disk.commit()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl_seconds
+
+    def _put_memory(self, key: str, created_at: float, response: BaseMessage):
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if not self._is_expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._memory_hits += 1
+                    return response
+                del self._memory[key]
+
+            if self._disk is not None:
+                row = self._disk.execute("SELECT created_at, response FROM inference_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    created_at, raw_response = row
+                    if not self._is_expired(created_at, now):
+                        response = messages_from_dict([json.loads(raw_response)])[0]
+                        self._put_memory(key, created_at, response)
+                        self._disk_hits += 1
+                        return response
+                    self._disk.execute("DELETE FROM inference_cache WHERE key = ?", (key,))
+                    self._disk.commit()
+
+            self._misses += 1
+            return None
+
+    def put(self, key: str, response: BaseMessage):
+        now = time.time()
+
+        with self._lock:
+            self._put_memory(key, now, response)
+
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO inference_cache (key, created_at, response) VALUES (?, ?, ?)",
+                    (key, now, json.dumps(message_to_dict(response)))
+                )
+                # Drop expired entries, then the oldest ones beyond the size limit
+                self._disk.execute("DELETE FROM inference_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._disk.execute(
+                    "DELETE FROM inference_cache WHERE key IN (SELECT key FROM inference_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_max_entries,)
+                )
+                self._disk.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM inference_cache WHERE key = ?", (key,))
+                self._disk.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM inference_cache")
+                self._disk.commit()
+
+    def get_stats(self) -> InferenceCacheStats:
+        with self._lock:
+            disk_entries = 0
+            if self._disk is not None:
+                disk_entries = self._disk.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+
+            return InferenceCacheStats(
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                memory_entries=len(self._memory),
+                disk_entries=disk_entries
+            )
+
+
+# The cache is disabled unless configured at startup; see configure_inference_cache()
+INFERENCE_CACHE: Optional[InferenceCache] = None
+
+def configure_inference_cache(cache: Optional[InferenceCache]):
+    global INFERENCE_CACHE
+    INFERENCE_CACHE = cache
+
+def get_inference_cache() -> Optional[InferenceCache]:
+    return INFERENCE_CACHE
@@ -0,0 +1,282 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+import logging
+import threading
+from typing import Any, Callable, ContextManager, Dict, Optional, Tuple
+import uuid
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains the functionality to run expert tasks as background jobs.  Callers submit a unit of work and get a
+job ID back immediately; the work runs on a bounded pool of worker threads, and its status and result are recorded in a
+JobStore where they can be polled.  This decouples the latency of the HTTP request from the latency of the LLM, and
+caps the number of expert tasks being worked on at once.
+
+Several processes may share a store, so each runner records itself as the owner of the jobs it creates and keeps renewing
+a lease on them while it is alive.  A job left unfinished by an owner whose lease has lapsed is one that nothing is
+working on any more, and any runner sharing the store marks it as failed.
+"""
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_PENDING = 64
+DEFAULT_OWNER_LEASE_SECONDS = 60.0
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+@dataclass
+class Job:
+    job_id: str
+    kind: str # What the job does, e.g. "entities_analyze"
+    status: JobStatus
+    created_at: datetime
+    updated_at: datetime
+    result_status_code: int = None # The HTTP status the work would have been served with synchronously
+    result: Dict[str, Any] = None
+    owner: str = None # The runner working on the job
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "result_status_code": self.result_status_code,
+            "result": self.result
+        }
+
+class JobNotFoundError(Exception):
+    pass
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobStore(ABC):
+    @abstractmethod
+    def create(self, job_id: str, kind: str, owner: str = None) -> Job:
+        pass
+
+    @abstractmethod
+    def update(self, job_id: str, status: JobStatus, result_status_code: int = None, result: Dict[str, Any] = None):
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Job:
+        """
+        Returns the job with the given ID.  Raises a JobNotFoundError if there is no such job.
+        """
+        pass
+
+    @abstractmethod
+    def renew_owner(self, owner: str):
+        """
+        Records that the owner is still alive, extending its lease on its jobs.
+        """
+        pass
+
+    @abstractmethod
+    def fail_orphaned(self, lease_seconds: float, result_status_code: int, result: Dict[str, Any]) -> int:
+        """
+        Marks every pending or running job whose owner hasn't renewed its lease within lease_seconds (or that has no
+        owner) as failed with the given result, returning how many there were.
+        """
+        pass
+
+    def job_scope(self) -> ContextManager:
+        """
+        The context each job is run in on the runner's threads, for stores that need to set up or clean up per-thread
+        resources around each job.
+        """
+        return nullcontext()
+
+class InMemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs: Dict[str, Job] = dict()
+        self._owner_renewals: Dict[str, datetime] = dict()
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, kind: str, owner: str = None) -> Job:
+        now = datetime.now(timezone.utc)
+        job = Job(job_id=job_id, kind=kind, status=JobStatus.PENDING, created_at=now, updated_at=now, owner=owner)
+        with self._lock:
+            self._jobs[job_id] = job
+        return Job(**vars(job))
+
+    def update(self, job_id: str, status: JobStatus, result_status_code: int = None, result: Dict[str, Any] = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise JobNotFoundError(f"No job with id: {job_id}")
+            job.status = status
+            job.updated_at = datetime.now(timezone.utc)
+            job.result_status_code = result_status_code
+            job.result = result
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise JobNotFoundError(f"No job with id: {job_id}")
+            return Job(**vars(job)) # Copy, so callers can't observe partial updates
+
+    def renew_owner(self, owner: str):
+        with self._lock:
+            self._owner_renewals[owner] = datetime.now(timezone.utc)
+
+    def fail_orphaned(self, lease_seconds: float, result_status_code: int, result: Dict[str, Any]) -> int:
+        now = datetime.now(timezone.utc)
+        lease_cutoff = now - timedelta(seconds=lease_seconds)
+        failed = 0
+        with self._lock:
+            self._owner_renewals = {owner: renewed_at for owner, renewed_at in self._owner_renewals.items() if renewed_at >= lease_cutoff}
+            for job in self._jobs.values():
+                if job.status in (JobStatus.PENDING, JobStatus.RUNNING) and job.owner not in self._owner_renewals:
+                    job.status = JobStatus.FAILED
+                    job.updated_at = now
+                    job.result_status_code = result_status_code
+                    job.result = result
+                    failed += 1
+        return failed
+
+
+class JobRunner:
+    def __init__(self, store: JobStore, max_workers: int = DEFAULT_MAX_WORKERS, max_pending: int = DEFAULT_MAX_PENDING,
+                 owner_lease_seconds: float = DEFAULT_OWNER_LEASE_SECONDS):
+        """
+        Creates a runner that works on at most max_workers jobs at once and accepts at most max_pending jobs that have
+        not yet finished; submissions beyond that are rejected rather than queued indefinitely.  Once started, the runner
+        renews its lease on its jobs several times per owner_lease_seconds.
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.owner_lease_seconds = owner_lease_seconds
+        self.owner = uuid.uuid4().hex # Unique to this runner, so a restarted process never inherits the jobs of its predecessor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-runner")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._heartbeat_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self):
+        """
+        Renews the runner's lease on its jobs and fails the jobs of owners whose leases have lapsed, then keeps doing so
+        on a background thread.  Only the first call does anything; submit() calls it too, so that the runner's lease is
+        in place before it owns any jobs.
+        """
+        with self._heartbeat_lock:
+            if self._heartbeat_thread is not None:
+                return
+
+            self._try_heartbeat()
+            self._heartbeat_thread = threading.Thread(target=self._run_heartbeats, name="job-runner-heartbeat", daemon=True)
+            self._heartbeat_thread.start()
+
+    def _run_heartbeats(self):
+        while not self._stopped.wait(self.owner_lease_seconds / 3):
+            try:
+                with self.store.job_scope():
+                    self._try_heartbeat()
+            except Exception as e:
+                logger.error(f"Unable to renew the lease of job runner {self.owner}: {str(e)}")
+                logger.exception(e)
+
+    def _try_heartbeat(self):
+        try:
+            self.store.renew_owner(self.owner)
+        except Exception as e:
+            logger.error(f"Unable to renew the lease of job runner {self.owner}: {str(e)}")
+            logger.exception(e)
+            return
+
+        try:
+            failed = self.store.fail_orphaned(self.owner_lease_seconds, 500, {"error": "The job was interrupted because the server process running it stopped"})
+        except Exception as e:
+            logger.error(f"Unable to fail the jobs of stopped server processes: {str(e)}")
+            logger.exception(e)
+            return
+
+        if failed:
+            logger.warning(f"Marked {failed} jobs of stopped server processes as failed")
+
+    def submit(self, job_id: str, kind: str, work: Callable[[], Tuple[int, Dict[str, Any]]]) -> Job:
+        """
+        Records a new job and schedules the work, which must return the HTTP status code and body of its result.
+        Raises a JobQueueFullError if too many jobs are already pending.
+        """
+        self.start()
+
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFullError(f"Too many pending jobs; the limit is {self.max_pending}")
+
+        try:
+            job = self.store.create(job_id, kind, owner=self.owner)
+            self._executor.submit(self._run, job_id, kind, work)
+        except Exception:
+            self._slots.release()
+            raise
+
+        logger.info(f"Submitted {kind} job: {job_id}")
+        return job
+
+    def _run(self, job_id: str, kind: str, work: Callable[[], Tuple[int, Dict[str, Any]]]):
+        try:
+            with self.store.job_scope():
+                self._run_in_scope(job_id, kind, work)
+        except Exception as e:
+            logger.error(f"Unable to run {kind} job {job_id}: {str(e)}")
+            logger.exception(e)
+        finally:
+            self._slots.release()
+
+    def _run_in_scope(self, job_id: str, kind: str, work: Callable[[], Tuple[int, Dict[str, Any]]]):
+        try:
+            self.store.update(job_id, JobStatus.RUNNING)
+
+            try:
+                result_status_code, result = work()
+            except Exception as e:
+                logger.error(f"{kind} job {job_id} failed: {str(e)}")
+                logger.exception(e)
+                self.store.update(job_id, JobStatus.FAILED, result_status_code=500, result={"error": str(e)})
+                return
+
+            status = JobStatus.SUCCEEDED if result_status_code < 400 else JobStatus.FAILED
+            self.store.update(job_id, status, result_status_code=result_status_code, result=result)
+            logger.info(f"{kind} job {job_id} finished with status: {status.value}")
+        except Exception as e:
+            logger.error(f"Unable to record the outcome of {kind} job {job_id}: {str(e)}")
+            logger.exception(e)
+
+    def shutdown(self, wait: bool = True):
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
+
+
+# The runner is created at startup so that its store can be chosen by the app's settings; see configure_job_runner()
+JOB_RUNNER: Optional[JobRunner] = None
+_JOB_RUNNER_LOCK = threading.Lock()
+
+def configure_job_runner(runner: Optional[JobRunner]):
+    global JOB_RUNNER
+    with _JOB_RUNNER_LOCK:
+        JOB_RUNNER = runner
+
+def get_job_runner() -> JobRunner:
+    global JOB_RUNNER
+    with _JOB_RUNNER_LOCK:
+        if JOB_RUNNER is None:
+            JOB_RUNNER = JobRunner(InMemoryJobStore())
+        return JOB_RUNNER
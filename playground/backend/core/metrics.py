@@ -0,0 +1,278 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+from backend.core.code_cache import get_python_code_cache
+from backend.core.inference import InferenceResult
+from backend.core.inference_cache import get_inference_cache
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains the process-wide metrics for the backend and renders them in the Prometheus text exposition
+format.  The metric types are deliberately minimal (counters, histograms, and gauges computed at scrape time) and
+cover what's needed to tell how long expert invocations take, how much of that is spent waiting on the LLM, how many
+tokens they use, and how often Bedrock throttles or retries them.
+"""
+
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+# The error codes Bedrock uses when a request is rejected because of rate or capacity limits
+THROTTLING_ERROR_CODES = frozenset(["ThrottlingException", "ServiceQuotaExceededException", "TooManyRequestsException", "ServiceUnavailableException"])
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+def _format_labels(label_names: Sequence[str], label_values: LabelValues, extra: Dict[str, str] = None) -> str:
+    pairs = list(zip(label_names, label_values)) + list((extra or dict()).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    metric_type: str = None
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _get_label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels.keys()) != set(self.label_names):
+            raise ValueError(f"Metric {self.name} expects labels {self.label_names}, got {tuple(labels.keys())}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def collect(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        lines.extend(self._collect_samples())
+        return lines
+
+    @abstractmethod
+    def _collect_samples(self) -> List[str]:
+        pass
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = dict()
+
+    def inc(self, amount: float = 1, **labels: str):
+        if amount < 0:
+            raise ValueError(f"Counter {self.name} can only be incremented by non-negative amounts")
+        label_values = self._get_label_values(labels)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._get_label_values(labels), 0)
+
+    def _collect_samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}" for label_values, value in sorted(self._values.items())]
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._bucket_counts: Dict[LabelValues, List[int]] = dict()
+        self._sums: Dict[LabelValues, float] = dict()
+
+    def observe(self, value: float, **labels: str):
+        label_values = self._get_label_values(labels)
+        bucket_index = bisect_left(self.buckets, value)
+        with self._lock:
+            if label_values not in self._bucket_counts:
+                self._bucket_counts[label_values] = [0] * len(self.buckets)
+                self._sums[label_values] = 0
+            self._bucket_counts[label_values][bucket_index] += 1
+            self._sums[label_values] += value
+
+    def get_count(self, **labels: str) -> int:
+        with self._lock:
+            return sum(self._bucket_counts.get(self._get_label_values(labels), []))
+
+    def _collect_samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for label_values in sorted(self._bucket_counts.keys()):
+                cumulative = 0
+                for bucket, count in zip(self.buckets, self._bucket_counts[label_values]):
+                    cumulative += count
+                    le = {"le": _format_value(bucket)}
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, label_values)} {_format_value(self._sums[label_values])}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, label_values)} {cumulative}")
+        return lines
+
+class CallbackGauge(Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[LabelValues, float]], label_names: Sequence[str] = ()):
+        """
+        Creates a gauge whose samples are computed by the callback at scrape time, for values that are already tracked
+        elsewhere (e.g. cache statistics).
+        """
+        super().__init__(name, documentation, label_names)
+        self.callback = callback
+
+    def _collect_samples(self) -> List[str]:
+        try:
+            samples = self.callback()
+        except Exception as e:
+            logger.warning(f"Unable to collect metric {self.name}: {str(e)}")
+            return []
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}" for label_values, value in sorted(samples.items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = dict()
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"A metric named {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Renders every registered metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+METRICS_REGISTRY = MetricsRegistry()
+
+def get_metrics_registry() -> MetricsRegistry:
+    return METRICS_REGISTRY
+
+
+EXPERT_INVOCATION_SECONDS = METRICS_REGISTRY.register(Histogram(
+    "playground_expert_invocation_seconds",
+    "Wall time of an expert invocation, including the LLM call and applying its tool call",
+    ["expert", "outcome"]
+))
+INFERENCE_SECONDS = METRICS_REGISTRY.register(Histogram(
+    "playground_inference_seconds",
+    "Wall time spent waiting for the LLM response of an expert invocation (Bedrock latency plus client-side retries)",
+    ["expert", "cached"]
+))
+INFERENCE_TOKENS = METRICS_REGISTRY.register(Counter(
+    "playground_inference_tokens_total",
+    "Tokens used by expert LLM calls, by kind (input, output, reasoning, cache_read, cache_write)",
+    ["expert", "kind"]
+))
+BEDROCK_RETRIES = METRICS_REGISTRY.register(Counter(
+    "playground_bedrock_retries_total",
+    "Retries performed by the boto retrier before an expert LLM call succeeded",
+    ["expert"]
+))
+BEDROCK_THROTTLES = METRICS_REGISTRY.register(Counter(
+    "playground_bedrock_throttles_total",
+    "Bedrock responses rejected because of rate or capacity limits, including ones later retried successfully",
+    ["model"]
+))
+TOOL_CALL_FAILURES = METRICS_REGISTRY.register(Counter(
+    "playground_expert_tool_call_failures_total",
+    "Expert LLM responses that did not make a tool call (missing) or whose tool call could not be applied (invalid)",
+    ["expert", "reason"]
+))
+
+def _collect_code_cache_stats() -> Dict[LabelValues, float]:
+    stats = get_python_code_cache().get_stats().to_json()
+    return {(name,): value for name, value in stats.items()}
+
+def _collect_inference_cache_stats() -> Dict[LabelValues, float]:
+    cache = get_inference_cache()
+    if cache is None:
+        return dict()
+    return {(name,): value for name, value in cache.get_stats().to_json().items()}
+
+METRICS_REGISTRY.register(CallbackGauge(
+    "playground_code_cache",
+    "Statistics of the compiled code cache used to load generated logic",
+    _collect_code_cache_stats,
+    ["stat"]
+))
+METRICS_REGISTRY.register(CallbackGauge(
+    "playground_inference_cache",
+    "Statistics of the LLM response cache, if it is enabled",
+    _collect_inference_cache_stats,
+    ["stat"]
+))
+
+
+def record_inference(expert_name: str, inference_result: InferenceResult, duration_seconds: float):
+    INFERENCE_SECONDS.observe(duration_seconds, expert=expert_name, cached=str(inference_result.cached).lower())
+    if inference_result.cached:
+        return
+
+    usage = inference_result.usage
+    if usage is not None:
+        for kind, count in [("input", usage.input_tokens), ("output", usage.output_tokens), ("reasoning", usage.reasoning_tokens),
+                            ("cache_read", usage.cache_read_tokens), ("cache_write", usage.cache_write_tokens)]:
+            INFERENCE_TOKENS.inc(count, expert=expert_name, kind=kind)
+
+    # The boto response metadata is passed through by the Bedrock integration, and records how many retries it took
+    response_metadata = inference_result.response.response_metadata.get("ResponseMetadata", None) or dict()
+    retry_attempts = response_metadata.get("RetryAttempts", 0)
+    if retry_attempts:
+        BEDROCK_RETRIES.inc(retry_attempts, expert=expert_name)
+
+@contextmanager
+def time_expert_invocation(expert_name: str) -> Iterator[None]:
+    outcome = "error"
+    start = time.perf_counter()
+    try:
+        yield
+        outcome = "success"
+    finally:
+        EXPERT_INVOCATION_SECONDS.observe(time.perf_counter() - start, expert=expert_name, outcome=outcome)
+
+def make_throttle_recorder(model: str) -> Callable[..., None]:
+    """
+    Returns a handler for botocore's needs-retry event that counts throttled responses.  The retrier emits the event
+    for every attempt, so this sees the throttles it absorbs as well as the ones that exhaust its attempts.
+    """
+    def record_throttle(response=None, **kwargs) -> None:
+        if response is None:
+            return None
+        _, parsed_response = response
+        error_code = (parsed_response or dict()).get("Error", dict()).get("Code", None)
+        if error_code in THROTTLING_ERROR_CODES:
+            BEDROCK_THROTTLES.inc(model=model)
+        return None # Returning anything else would change the retrier's decision
+
+    return record_throttle
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
+import threading
 
 from typing import Any, Dict, List, Callable, Tuple
 
@@ -94,7 +96,114 @@ class PrintableOcsfObject(OcsfObject):
             }
         }
 
+class OcsfPathTrieNode:
+    """
+    A node in a trie of period-delimited OCSF paths.  Each node records the objects reached at its path and the
+    (object name, attribute name) pairs whose attribute lives at its path.
+    """
+    __slots__ = ("children", "objects", "attributes")
+
+    def __init__(self):
+        self.children: Dict[str, "OcsfPathTrieNode"] = dict()
+        self.objects: List[str] = []
+        self.attributes: List[Tuple[str, str]] = []
+
+    def get_or_create(self, path: str) -> "OcsfPathTrieNode":
+        node = self
+        for component in path.split("."):
+            child = node.children.get(component)
+            if child is None:
+                child = OcsfPathTrieNode()
+                node.children[component] = child
+            node = child
+        return node
+
+    def walk(self, path: str) -> List["OcsfPathTrieNode"]:
+        """
+        Returns the nodes along the path, stopping early if the path leaves the trie.
+        """
+        nodes = []
+        node = self
+        for component in path.split("."):
+            node = node.children.get(component)
+            if node is None:
+                break
+            nodes.append(node)
+        return nodes
+
+@dataclass
+class OcsfEventIndex:
+    event_class: OcsfEvent
+    objects: Dict[str, OcsfObject] = field(default_factory=dict) # Every object reachable from the event class, in breadth-first order
+    path_trie: OcsfPathTrieNode = field(default_factory=OcsfPathTrieNode)
+
+class OcsfSchemaIndex:
+    """
+    Precomputed lookups over a single OCSF schema.  The per-event-class object closure and path trie are built the
+    first time an event class is requested and reused afterwards.
+    """
+    def __init__(self, schema: OcsfSchema):
+        self.schema = schema
+        self._events_by_caption: Dict[str, OcsfEvent] = {e_class.caption: e_class for e_class in schema.classes.values()}
+        self._event_indices: Dict[str, OcsfEventIndex] = dict()
+        self._lock = threading.Lock()
+
+    def get_event_class(self, event_name: str) -> OcsfEvent:
+        event_class = self._events_by_caption.get(event_name)
+        if event_class is None:
+            raise ValueError(f"Invalid event class: {event_name}")
+        return event_class
+
+    def get_event_index(self, event_name: str) -> OcsfEventIndex:
+        with self._lock:
+            event_index = self._event_indices.get(event_name)
+            if event_index is None:
+                event_index = self._build_event_index(self.get_event_class(event_name))
+                self._event_indices[event_name] = event_index
+            return event_index
+
+    def _build_event_index(self, event_class: OcsfEvent) -> OcsfEventIndex:
+        event_index = OcsfEventIndex(event_class=event_class)
+
+        # Get the objects that the schema uses at the top level
+        objects_to_process: deque[Tuple[str, OcsfObject]] = deque()
+        for attribute_name, attribute in event_class.attributes.items():
+            if attribute.is_object():
+                objects_to_process.append((attribute_name, self.schema.objects[attribute.object_type]))
+
+        # Now, for each object at the top level, recursively retrieve the objects they use, recording every path an
+        # object and its attributes are reached at
+        while objects_to_process:
+            next_path, next_object = objects_to_process.popleft()
+            event_index.objects[next_object.name] = next_object
+            event_index.path_trie.get_or_create(next_path).objects.append(next_object.name)
+
+            for attribute_name, attribute in next_object.attributes.items():
+                attribute_path = f"{next_path}.{attribute_name}"
+                event_index.path_trie.get_or_create(attribute_path).attributes.append((next_object.name, attribute_name))
+
+                # If the attribute is an object, process it as well
+                if attribute.is_object() and attribute.object_type not in event_index.objects:
+                    objects_to_process.append((attribute_path, self.schema.objects[attribute.object_type]))
+
+        return event_index
+
+
+_SCHEMA_INDICES: Dict[int, OcsfSchemaIndex] = dict()
+_SCHEMA_INDICES_LOCK = threading.Lock()
+
+def get_ocsf_schema_index(schema: OcsfSchema) -> OcsfSchemaIndex:
+    # The index holds a reference to its schema, so the schema's id cannot be reused while it is cached
+    with _SCHEMA_INDICES_LOCK:
+        schema_index = _SCHEMA_INDICES.get(id(schema))
+        if schema_index is None:
+            schema_index = OcsfSchemaIndex(schema)
+            _SCHEMA_INDICES[id(schema)] = schema_index
+        return schema_index
+
 def make_get_ocsf_event_schema(schema: OcsfSchema) -> Callable[[str], PrintableOcsfEvent]:
+    schema_index = get_ocsf_schema_index(schema)
+
     def get_ocsf_event_schema(event_name: str, paths: List[str]) -> PrintableOcsfEvent:
         """
         Given an OCSF event class name, return the schema for that event class.
@@ -102,9 +211,7 @@ def make_get_ocsf_event_schema(schema: OcsfSchema) -> Callable[[str], PrintableO
         filtered_attributes = [attr_name.split(".")[0] for attr_name in paths]
 
         # Check if the event class is valid
-        event_class = next((e_class for e_class in schema.classes.values() if e_class.caption == event_name), None)
-        if event_class is None:
-            raise ValueError(f"Invalid event class: {event_name}")
+        event_class = schema_index.get_event_class(event_name)
 
         # Convert the schema to a PrintableOcsfEvent
         printable_event = PrintableOcsfEvent(**event_class.__dict__, attrs_to_include=filtered_attributes)
@@ -114,56 +221,34 @@ def make_get_ocsf_event_schema(schema: OcsfSchema) -> Callable[[str], PrintableO
     return get_ocsf_event_schema
 
 def make_get_ocsf_object_schemas(schema: OcsfSchema) -> Callable[[str], List[PrintableOcsfObject]]:
+    schema_index = get_ocsf_schema_index(schema)
+
     def get_ocsf_object_schemas(event_name: str, paths: List[str]) -> List[PrintableOcsfObject]:
         """
         Given an OCSF event class name, return the schemas of all objects used by that category.
         """
+        event_index = schema_index.get_event_index(event_name)
 
-        # Check if the event class is valid
-        event_class = next((e_class for e_class in schema.classes.values() if e_class.caption == event_name), None)
-        if event_class is None:
-            raise ValueError(f"Invalid event class: {event_name}")
-
-        # Get the objects that the schema uses at the top level
-        objects_to_process: List[Tuple[str, OcsfObject]] = []
-        for attribute_name, attribute in event_class.attributes.items():
-            if attribute.is_object():
-                objects_to_process.append((attribute_name, schema.objects[attribute.object_type]))
-
-        # Now, for each object at the top level, get recursively retrieve the objects they use
-        returned_objects: Dict[str, OcsfObject] = dict() # Mapping of object type name to object
         relevant_attributes: Dict[str, List[str]] = dict() # Mapping of object type name to list of attributes that are relevant to the paths
         object_was_leaf: Dict[str, bool] = dict() # Mapping of object type name to whether it was a leaf in a path
 
-        while objects_to_process:
-            # Get the next object and add it to the final list to return
-            next_path, next_object = objects_to_process.pop(0)
-            returned_objects[next_object.name] = next_object
-
-            if next_path in paths:
-                object_was_leaf[next_object.name] = True
-
-            # If it has any attributes that are also objects, add them to the list if they have not already
-            # been processed
-            for attribute_name, attribute in next_object.attributes.items():
-                attribute_path = f"{next_path}.{attribute_name}"
-
-                # Mark the attribute as relevant if it is a leaf or a transition point in a path
-                attribute_is_leaf = attribute_path in paths
-                attribute_is_transition = any(path.startswith(attribute_path) for path in paths)
-                if attribute_is_leaf or attribute_is_transition:
-                    if next_object.name not in relevant_attributes:
-                        relevant_attributes[next_object.name] = []
-                    if attribute_name not in relevant_attributes[next_object.name]:
-                        relevant_attributes[next_object.name].append(attribute_name)
-
-                # If the attribute is an object, process it as well
-                if attribute.is_object() and attribute.object_type not in returned_objects:
-                    objects_to_process.append((attribute_path, schema.objects[attribute.object_type]))
-
-        # Convert the objects to a list of PrintableOcsfObject, using each object's stored path
+        # An attribute is relevant if it is a leaf or a transition point in one of the paths, which is exactly the set
+        # of attributes recorded on the trie nodes along each path
+        for path in paths:
+            nodes = event_index.path_trie.walk(path)
+            for node in nodes:
+                for obj_name, attribute_name in node.attributes:
+                    relevant_attributes.setdefault(obj_name, [])
+                    if attribute_name not in relevant_attributes[obj_name]:
+                        relevant_attributes[obj_name].append(attribute_name)
+
+            if len(nodes) == path.count(".") + 1:
+                for obj_name in nodes[-1].objects:
+                    object_was_leaf[obj_name] = True
+
+        # Convert the objects to a list of PrintableOcsfObject
         printable_objects = []
-        for obj_name, obj in returned_objects.items():
+        for obj_name, obj in event_index.objects.items():
             should_include_all_attrs = obj_name in object_was_leaf # If it was ever a leaf, we want to include all attributes
             filtered_attributes = relevant_attributes.get(obj_name, []) if not should_include_all_attrs else []
 
@@ -172,5 +257,3 @@ def make_get_ocsf_object_schemas(schema: OcsfSchema) -> Callable[[str], List[Pri
         return printable_objects
     
     return get_ocsf_object_schemas
-
-
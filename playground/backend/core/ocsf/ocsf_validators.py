@@ -0,0 +1,129 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from ocsf.schema import OcsfAttr, OcsfSchema
+
+from backend.core.ocsf.ocsf_schemas import get_ocsf_schema_index
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains a code generator that turns the schema of an OCSF event class into a specialized Python function
+which answers a single question as cheaply as possible: does a given output conform to the event class?  The checks
+mirror those of the detailed, report-producing validation walk (allowed keys, required keys, and the shape of nested
+objects and arrays of objects), but are performed with direct dict operations against precomputed constants.  It is
+intended as a fast path; callers that need to explain a failure should fall back to the detailed walk.
+"""
+
+
+def _get_object_attributes(schema: OcsfSchema, event_name: str) -> Tuple[Dict[str, OcsfAttr], Dict[str, Dict[str, OcsfAttr]]]:
+    event_index = get_ocsf_schema_index(schema).get_event_index(event_name)
+    object_attributes = {obj_name: obj.attributes for obj_name, obj in event_index.objects.items()}
+    return event_index.event_class.attributes, object_attributes
+
+def _generate_object_validator(function_name: str, attributes: Dict[str, OcsfAttr], function_names: Dict[str, str], is_event: bool) -> Tuple[List[str], str]:
+    allowed_keys = sorted(attributes.keys())
+    required_keys = [name for name, attr in attributes.items() if attr.requirement == "Required"]
+
+    dispatch_entries = []
+    for name, attr in attributes.items():
+        if not attr.is_object():
+            continue
+        if is_event and name == "unmapped" and not attr.is_array:
+            dispatch_entries.append(f"{name!r}: _accept_any") # The unmapped field accepts any data
+        elif attr.is_array:
+            dispatch_entries.append(f"{name!r}: {function_names[attr.object_type]}_array")
+        else:
+            dispatch_entries.append(f"{name!r}: {function_names[attr.object_type]}")
+
+    lines = [
+        f"{function_name}_ALLOWED = frozenset({allowed_keys!r})",
+        "",
+        f"def {function_name}(data):",
+        "    if data.__class__ is not dict:",
+        "        return False",
+        "    for key, value in data.items():",
+        f"        if key not in {function_name}_ALLOWED:",
+        "            return False",
+        "        if value is None:",
+        "            continue",
+        f"        check = {function_name}_OBJECTS.get(key)",
+        "        if check is not None and not check(value):",
+        "            return False",
+    ]
+    if required_keys:
+        lines.append("    if " + " or ".join(f"{key!r} not in data" for key in required_keys) + ":")
+        lines.append("        return False")
+    lines.extend([
+        "    return True",
+        "",
+        f"def {function_name}_array(data):",
+        "    if data.__class__ is not list:",
+        "        return False",
+        "    for item in data:",
+        f"        if item is not None and not {function_name}(item):",
+        "            return False",
+        "    return True",
+        "",
+    ])
+
+    # The dispatch table references the other validators, so it is emitted after all functions are defined
+    dispatch = f"{function_name}_OBJECTS = {{{', '.join(dispatch_entries)}}}"
+
+    return lines, dispatch
+
+def generate_ocsf_event_validator_source(schema: OcsfSchema, event_name: str) -> str:
+    """
+    Generates the source of a module whose `validate` function returns True if its argument conforms to the event class.
+    """
+    event_attributes, object_attributes = _get_object_attributes(schema, event_name)
+
+    function_names = {obj_name: f"_validate_object_{index}" for index, obj_name in enumerate(object_attributes.keys())}
+
+    source_lines = [
+        f"# Generated validator for OCSF event class: {event_name}",
+        "",
+        "def _accept_any(data):",
+        "    return True",
+        "",
+    ]
+    dispatch_lines = []
+
+    for obj_name, attributes in object_attributes.items():
+        source_lines.append(f"# Object: {obj_name}")
+        lines, dispatch = _generate_object_validator(function_names[obj_name], attributes, function_names, is_event=False)
+        source_lines.extend(lines)
+        dispatch_lines.append(dispatch)
+
+    source_lines.append(f"# Event class: {event_name}")
+    lines, dispatch = _generate_object_validator("_validate_event", event_attributes, function_names, is_event=True)
+    source_lines.extend(lines)
+    dispatch_lines.append(dispatch)
+
+    return "\n".join(source_lines + dispatch_lines + ["", "validate = _validate_event"]) + "\n"
+
+
+_COMPILED_VALIDATORS: Dict[Tuple[int, str], Callable[[Any], bool]] = dict()
+_COMPILED_VALIDATORS_LOCK = threading.Lock()
+
+def get_compiled_ocsf_event_validator(schema: OcsfSchema, event_name: str) -> Callable[[Any], bool]:
+    """
+    Returns the specialized validator for the event class, generating and compiling it on first use.  Raises a
+    ValueError if the event class is not in the schema.
+    """
+    # The schema index cache keeps the schema alive, so its id is a stable cache key
+    key = (id(schema), event_name)
+
+    with _COMPILED_VALIDATORS_LOCK:
+        validator = _COMPILED_VALIDATORS.get(key)
+        if validator is None:
+            logger.info(f"Compiling the OCSF output validator for event class: {event_name}")
+            source = generate_ocsf_event_validator_source(schema, event_name)
+            namespace = dict()
+            exec(compile(source, f"<ocsf_validator:{event_name}>", "exec"), namespace)
+            validator = namespace["validate"]
+            _COMPILED_VALIDATORS[key] = validator
+
+    return validator
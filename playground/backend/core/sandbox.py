@@ -0,0 +1,271 @@
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+import os
+import pickle
+import signal
+import threading
+from typing import Any, Callable, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the sandbox only enforces its timeout
+    resource = None
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains a pool of sandbox worker processes for running LLM-generated (or user-edited) code outside of the
+API's process.  Each call runs in a worker with limits on the CPU time and memory it may use, and the caller waits for
+it no longer than a timeout; a worker that crashes or times out is killed and replaced, so a runaway regex or infinite
+loop in generated code can neither hang nor take down the API.
+
+Workers are started on first use and then kept for later calls, so they stay warm: their imports are loaded and their
+code caches filled.  Where the platform supports it, they are forked from a server process that has already imported
+the modules generated code commonly uses, which makes starting a replacement cheap.
+"""
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_TIMEOUT_SECONDS = 10.0
+DEFAULT_CPU_TIME_SECONDS = 5.0
+DEFAULT_MEMORY_BYTES = 512 * 1024 * 1024
+
+# The modules the dependency setup of generated code commonly imports
+DEFAULT_PRELOAD_MODULES = ["base64", "datetime", "hashlib", "ipaddress", "json", "re", "typing", "urllib.parse"]
+
+
+class SandboxError(Exception):
+    pass
+
+class SandboxTimeoutError(SandboxError):
+    pass
+
+class SandboxWorkerCrashedError(SandboxError):
+    pass
+
+class SandboxCpuTimeExceededError(SandboxError):
+    pass
+
+
+def _get_address_space_bytes() -> Optional[int]:
+    # The process's current virtual memory size, if the platform exposes it
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def _raise_cpu_time_exceeded(signum, frame):
+    raise SandboxCpuTimeExceededError("The code used more CPU time than it is allowed and was stopped")
+
+def _apply_limits(cpu_time_seconds: Optional[float], memory_bytes: Optional[int]):
+    # The profiling timer counts the CPU time the process uses from now on, and signals when it runs out
+    if cpu_time_seconds is not None and hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_PROF, cpu_time_seconds)
+
+    # The memory limit is on the whole process, so the call's allowance is added to what the worker already uses
+    address_space_bytes = _get_address_space_bytes()
+    if memory_bytes is not None and resource is not None and address_space_bytes is not None:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (address_space_bytes + memory_bytes, hard_limit))
+
+def _remove_limits():
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+
+    if resource is not None:
+        _, hard_limit = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (hard_limit, hard_limit))
+
+def _make_picklable_error(error: BaseException) -> BaseException:
+    # The caller gets the original exception if it survives the trip between processes, or a description of it if not
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return SandboxError(f"{type(error).__name__}: {str(error)}")
+
+def _run_worker(connection: Connection, cpu_time_seconds: Optional[float], memory_bytes: Optional[int]):
+    # Interrupting the API interrupts the workers too; leave it to the API to stop them
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGPROF"):
+        signal.signal(signal.SIGPROF, _raise_cpu_time_exceeded)
+
+    # What went wrong is reported to the caller, which logs it in its own process
+    worker_logger = logging.getLogger("backend")
+    worker_logger.addHandler(logging.NullHandler())
+    worker_logger.propagate = False
+
+    while True:
+        try:
+            function, args = connection.recv()
+        except EOFError:
+            return
+
+        recycle = False
+        try:
+            _apply_limits(cpu_time_seconds, memory_bytes)
+            try:
+                response = ("ok", function(*args))
+            finally:
+                _remove_limits()
+        except BaseException as e:
+            # The worker may not be in a usable state once it has run out of memory
+            recycle = isinstance(e, MemoryError)
+            response = ("error", _make_picklable_error(e))
+
+        try:
+            connection.send(response + (recycle,))
+        except Exception as e:
+            connection.send(("error", SandboxError(f"The result could not be returned from the sandbox: {str(e)}"), recycle))
+
+        if recycle:
+            return
+
+
+class _SandboxWorker:
+    def __init__(self, process: multiprocessing.Process, connection: Connection):
+        self.process = process
+        self.connection = connection
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+class SandboxPool:
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+                 cpu_time_seconds: Optional[float] = DEFAULT_CPU_TIME_SECONDS, memory_bytes: Optional[int] = DEFAULT_MEMORY_BYTES,
+                 preload_modules: List[str] = DEFAULT_PRELOAD_MODULES):
+        """
+        Creates a pool of at most max_workers worker processes.  Each call may use at most cpu_time_seconds of CPU time
+        and memory_bytes more memory (None for no limit), and is given up on after timeout_seconds.
+        """
+        if max_workers < 1:
+            raise ValueError("The sandbox pool must have at least one worker")
+
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.cpu_time_seconds = cpu_time_seconds
+        self.memory_bytes = memory_bytes
+
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context("forkserver")
+            # The main module is preloaded by default; keep it alongside the modules given
+            self._context.set_forkserver_preload(["__main__"] + preload_modules)
+        else:
+            self._context = multiprocessing.get_context("spawn")
+
+        self._idle_workers: List[_SandboxWorker] = []
+        self._worker_count = 0
+        self._condition = threading.Condition()
+
+    def _start_worker(self) -> _SandboxWorker:
+        parent_connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_run_worker,
+            args=(child_connection, self.cpu_time_seconds, self.memory_bytes),
+            name="sandbox-worker",
+            daemon=True
+        )
+        process.start()
+        child_connection.close()
+        logger.debug(f"Started sandbox worker: {process.pid}")
+        return _SandboxWorker(process, parent_connection)
+
+    def _acquire_worker(self) -> _SandboxWorker:
+        with self._condition:
+            while not self._idle_workers and self._worker_count >= self.max_workers:
+                self._condition.wait()
+
+            if self._idle_workers:
+                return self._idle_workers.pop()
+            self._worker_count += 1
+
+        try:
+            return self._start_worker()
+        except Exception:
+            self._release_worker(None)
+            raise
+
+    def _release_worker(self, worker: Optional[_SandboxWorker]):
+        # Returns a usable worker to the pool, or frees the slot of one that had to be stopped
+        with self._condition:
+            if worker is not None:
+                self._idle_workers.append(worker)
+            else:
+                self._worker_count -= 1
+            self._condition.notify()
+
+    def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Calls the function with the arguments in a sandbox worker and returns its result, raising whatever exception
+        it raised.  The function must be defined at the top level of a module, and the arguments and result must be
+        picklable.  Raises a SandboxTimeoutError if the call takes too long, a SandboxCpuTimeExceededError if it uses
+        too much CPU time, a MemoryError if it uses too much memory, and a SandboxWorkerCrashedError if the worker
+        exits during the call.
+        """
+        worker = self._acquire_worker()
+        usable = False
+        try:
+            if not worker.process.is_alive():
+                raise SandboxWorkerCrashedError(f"The sandbox worker exited with code {worker.process.exitcode} before the call")
+
+            try:
+                worker.connection.send((function, args))
+            except (BrokenPipeError, ConnectionResetError):
+                raise SandboxWorkerCrashedError("The sandbox worker exited before the call")
+            except Exception:
+                # Nothing was sent if the call couldn't be pickled, so the worker is still usable
+                usable = True
+                raise
+
+            if not worker.connection.poll(self.timeout_seconds):
+                logger.warning(f"Stopping sandbox worker {worker.process.pid}: call to {function.__name__} did not finish within {self.timeout_seconds} seconds")
+                raise SandboxTimeoutError(f"The code did not finish within {self.timeout_seconds} seconds and was stopped")
+
+            try:
+                status, value, recycle = worker.connection.recv()
+            except (EOFError, OSError):
+                worker.process.join(timeout=1)
+                logger.warning(f"Sandbox worker {worker.process.pid} exited with code {worker.process.exitcode} during a call to {function.__name__}")
+                raise SandboxWorkerCrashedError(f"The sandbox worker exited with code {worker.process.exitcode} while running the code")
+
+            usable = not recycle
+            if status == "error":
+                raise value
+            return value
+        finally:
+            if not usable:
+                worker.stop()
+            self._release_worker(worker if usable else None)
+
+    def shutdown(self):
+        with self._condition:
+            workers = self._idle_workers
+            self._idle_workers = []
+            self._worker_count -= len(workers)
+        for worker in workers:
+            worker.stop()
+
+
+# The sandbox is disabled unless configured at startup, in which case generated code runs in-process; see
+# configure_sandbox_pool()
+SANDBOX_POOL: Optional[SandboxPool] = None
+_SANDBOX_POOL_LOCK = threading.Lock()
+
+def configure_sandbox_pool(pool: Optional[SandboxPool]):
+    global SANDBOX_POOL
+    with _SANDBOX_POOL_LOCK:
+        previous_pool = SANDBOX_POOL
+        SANDBOX_POOL = pool
+
+    if previous_pool is not None and previous_pool is not pool:
+        previous_pool.shutdown()
+
+def get_sandbox_pool() -> Optional[SandboxPool]:
+    with _SANDBOX_POOL_LOCK:
+        return SANDBOX_POOL
@@ -0,0 +1,62 @@
+from django.test import TestCase
+
+from backend.core.code_cache import CompiledCodeCache
+
+
+class CompiledCodeCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = CompiledCodeCache(max_entries=2)
+
+    def test_load_module_happy_path(self):
+        module = self.cache.load_module("extract", "import re\n\ndef extract(input_entry):\n    return re.findall(r'\\d+', input_entry)")
+
+        self.assertEqual(module.extract("a1b22"), ["1", "22"])
+
+    def test_load_module_reuses_cached_module(self):
+        source = "def transform(values):\n    return values[0]"
+
+        first = self.cache.load_module("transform", source)
+        second = self.cache.load_module("transform", source)
+
+        self.assertIs(first, second)
+        stats = self.cache.get_stats()
+        self.assertEqual(stats.hits, 1)
+        self.assertEqual(stats.misses, 1)
+
+    def test_module_name_is_part_of_key(self):
+        source = "x = 1"
+
+        first = self.cache.load_module("extract", source)
+        second = self.cache.load_module("transform", source)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(self.cache.get_stats().misses, 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.load_module("a", "x = 1")
+        self.cache.load_module("b", "x = 2")
+        self.cache.load_module("a", "x = 1") # Touch "a" so "b" is the eviction candidate
+        self.cache.load_module("c", "x = 3")
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats.entries, 2)
+        self.assertEqual(stats.evictions, 1)
+
+        self.cache.load_module("a", "x = 1")
+        self.assertEqual(self.cache.get_stats().hits, 2)
+
+    def test_syntax_error_is_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(SyntaxError):
+                self.cache.load_module("extract", "def extract(:")
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats.entries, 0)
+        self.assertEqual(stats.misses, 2)
+
+    def test_get_code_does_not_execute(self):
+        code = self.cache.get_code("broken", "raise RuntimeError('should not run')")
+
+        self.assertIsNotNone(code)
+        with self.assertRaises(RuntimeError):
+            self.cache.load_module("broken", "raise RuntimeError('should not run')")
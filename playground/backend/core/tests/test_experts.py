@@ -0,0 +1,143 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from django.test import TestCase
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from backend.core.experts import Expert, ExpertInvocationError, ExpertRegistry, ainvoke_expert, get_bedrock_llm, invoke_expert_batch
+from backend.core.inference_cache import InferenceCache, configure_inference_cache
+from backend.core.tasks import PlaygroundTask
+
+
+class ExpertRegistryTestCase(TestCase):
+    def test_factory_called_once_per_key(self):
+        registry = ExpertRegistry()
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            experts = list(executor.map(lambda _: registry.get_or_create(("analysis", "1.1.0", "Authentication"), factory), range(32)))
+
+        self.assertEqual(1, len(calls))
+        self.assertTrue(all(expert is experts[0] for expert in experts))
+
+    def test_keys_are_distinct(self):
+        registry = ExpertRegistry()
+
+        expert_1 = registry.get_or_create(("analysis", "1.1.0", "Authentication"), object)
+        expert_2 = registry.get_or_create(("analysis", "1.1.0", "Network Activity"), object)
+        expert_3 = registry.get_or_create(("extraction", "1.1.0", "Authentication"), object)
+
+        self.assertEqual(3, len({id(expert_1), id(expert_2), id(expert_3)}))
+
+    def test_clear(self):
+        registry = ExpertRegistry()
+
+        expert_1 = registry.get_or_create(("regex", "JavaScript"), object)
+        registry.clear()
+        expert_2 = registry.get_or_create(("regex", "JavaScript"), object)
+
+        self.assertIsNot(expert_1, expert_2)
+
+
+class GetBedrockLlmTestCase(TestCase):
+    def test_llms_pooled_by_config(self):
+        config = {
+            "model": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+            "temperature": 0,
+            "max_tokens": 16000,
+            "region_name": "us-west-2",
+            "additional_model_request_fields": {"thinking": {"type": "disabled"}}
+        }
+
+        llm_1 = get_bedrock_llm(**config)
+        llm_2 = get_bedrock_llm(**config)
+        llm_3 = get_bedrock_llm(**{**config, "max_tokens": 30000})
+
+        self.assertIs(llm_1, llm_2)
+        self.assertIsNot(llm_1, llm_3)
+
+
+@dataclass
+class EchoTask(PlaygroundTask):
+    work_item: Any = None
+
+    def get_work_item(self) -> Any:
+        return self.work_item
+
+    def set_work_item(self, new_work_item: Any):
+        self.work_item = new_work_item
+
+    def get_tool_name(self) -> str:
+        return "Echo"
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"task_id": self.task_id, "work_item": self.work_item}
+
+@dataclass
+class EchoToolBundle:
+    def task_tool(self, args: Dict[str, Any]) -> Any:
+        return args["value"]
+
+def make_echo_expert(responses: List[BaseMessage]) -> Expert:
+    return Expert(
+        llm=FakeMessagesListChatModel(responses=responses),
+        system_prompt_factory=None,
+        tools=EchoToolBundle()
+    )
+
+
+class AinvokeExpertTestCase(TestCase):
+    def test_tool_call_applied_to_task(self):
+        expert = make_echo_expert([AIMessage(content="", tool_calls=[{"name": "Echo", "args": {"value": "result"}, "id": "call-1"}])])
+        task = EchoTask(task_id="1", context=[HumanMessage(content="Please echo.")])
+
+        asyncio.run(ainvoke_expert(expert, task))
+
+        self.assertEqual("result", task.get_work_item())
+        self.assertEqual(["human", "ai", "tool"], [message.type for message in task.context])
+
+    def test_no_tool_call(self):
+        expert = make_echo_expert([AIMessage(content="I decline")])
+        task = EchoTask(task_id="1", context=[HumanMessage(content="Please echo.")])
+
+        with self.assertRaises(ExpertInvocationError):
+            asyncio.run(ainvoke_expert(expert, task))
+
+    def test_invalid_tool_call_not_cached(self):
+        configure_inference_cache(InferenceCache())
+        self.addCleanup(configure_inference_cache, None)
+        expert = make_echo_expert([
+            AIMessage(content="", tool_calls=[{"name": "Echo", "args": {"wrong": "result"}, "id": "call-1"}]),
+            AIMessage(content="", tool_calls=[{"name": "Echo", "args": {"value": "result"}, "id": "call-2"}])
+        ])
+
+        with self.assertRaises(KeyError):
+            asyncio.run(ainvoke_expert(expert, EchoTask(task_id="1", context=[HumanMessage(content="Please echo.")])))
+        task = asyncio.run(ainvoke_expert(expert, EchoTask(task_id="2", context=[HumanMessage(content="Please echo.")])))
+
+        self.assertEqual("result", task.get_work_item())
+
+
+class InvokeExpertBatchTestCase(TestCase):
+    def test_failures_reported_per_task(self):
+        expert = make_echo_expert([
+            AIMessage(content="", tool_calls=[{"name": "Echo", "args": {"value": "first"}, "id": "call-1"}]),
+            AIMessage(content="I decline"),
+            AIMessage(content="", tool_calls=[{"name": "Echo", "args": {"value": "third"}, "id": "call-3"}])
+        ])
+        tasks = [EchoTask(task_id=str(index), context=[HumanMessage(content="Please echo.")]) for index in range(3)]
+
+        results = invoke_expert_batch(expert, tasks)
+
+        self.assertEqual(["0", "1", "2"], [result.task.task_id for result in results])
+        self.assertEqual(["first", None, "third"], [result.task.get_work_item() for result in results])
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, ExpertInvocationError)
+        self.assertIsNone(results[2].error)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import re
+
+from botocore.exceptions import ClientError
+from django.test import TestCase
+from langchain_core.messages import SystemMessage
+from pydantic import BaseModel, Field
+
+from backend.core.experts import get_llm
+from backend.core.fake_llm import FakeChatModel, FakeLlmProfile, configure_fake_llm, get_fake_llm_profile
+
+
+class MakeJavascriptRegex(BaseModel):
+    """Makes a regex."""
+    value: str = Field(description="The regex.")
+    rationale: str = Field(description="Why.")
+
+class GenerateExtractionPatterns(BaseModel):
+    """Makes extraction patterns."""
+    patterns: list = Field(description="The patterns.")
+
+
+ENTRY = "Mar 12 07:40:57 host sshd[4351]: Failed password for guest from 86.212.199.60 port 1617 ssh2"
+
+def make_prompt(**tagged: str) -> SystemMessage:
+    return SystemMessage(content="Do the task.\n" + "\n".join(f"<{tag}>\n{value}\n</{tag}>" for tag, value in tagged.items()))
+
+
+class FakeChatModelTestCase(TestCase):
+    def test_responds_with_call_of_bound_tool(self):
+        # Set up test
+        llm = FakeChatModel(model="test").bind_tools([MakeJavascriptRegex])
+
+        # Run our test
+        response = llm.invoke([make_prompt(input_entry=ENTRY)])
+
+        # Check our results
+        self.assertEqual("MakeJavascriptRegex", response.tool_calls[0]["name"])
+        self.assertTrue(re.match(response.tool_calls[0]["args"]["value"], ENTRY))
+        self.assertTrue(re.match(response.tool_calls[0]["args"]["value"], ENTRY.replace("4351", "12")))
+        self.assertGreater(response.usage_metadata["input_tokens"], 0)
+
+    def test_extraction_patterns_match_mappings(self):
+        # Set up test
+        mapping_list = [
+            {"id": "mapping-1", "entities": [{"value": "86.212.199.60", "description": "Source IP"}], "ocsf_path": "src_endpoint.ip", "path_rationale": ""},
+            {"id": "mapping-2", "entities": [{"value": "guest", "description": "User"}], "ocsf_path": "user.name", "path_rationale": ""}
+        ]
+        llm = FakeChatModel(model="test").bind_tools([GenerateExtractionPatterns])
+
+        # Run our test
+        response = asyncio.run(llm.ainvoke([make_prompt(input_entry=ENTRY, mapping_list=json.dumps(mapping_list))]))
+
+        # Check our results
+        patterns = response.tool_calls[0]["args"]["patterns"]
+        self.assertEqual(["mapping-1", "mapping-2"], [pattern["id"] for pattern in patterns])
+
+        namespace = {"typing": __import__("typing")}
+        exec(patterns[0]["extract_logic"], namespace)
+        exec(patterns[0]["transform_logic"], namespace)
+        self.assertEqual("86.212.199.60", namespace["transform"](namespace["extract"](ENTRY)))
+
+    def test_uses_fixtures(self):
+        # Set up test
+        fixture = {"value": "^fixed$", "rationale": "From a fixture"}
+        llm = FakeChatModel(model="test", profile=FakeLlmProfile(fixtures={"MakeJavascriptRegex": fixture})).bind_tools([MakeJavascriptRegex])
+
+        # Run our test
+        response = llm.invoke([make_prompt(input_entry=ENTRY)])
+
+        # Check our results
+        self.assertEqual(fixture, response.tool_calls[0]["args"])
+
+    def test_retries_throttled_attempts(self):
+        # Set up test
+        profile = FakeLlmProfile(throttle_rate=0.5, max_retries=50, retry_backoff_seconds=0, seed=7)
+        llm = FakeChatModel(model="test", profile=profile).bind_tools([MakeJavascriptRegex])
+
+        # Run our test
+        retries = [
+            llm.invoke([make_prompt(input_entry=ENTRY)]).response_metadata["ResponseMetadata"]["RetryAttempts"]
+            for _ in range(20)
+        ]
+
+        # Check our results
+        self.assertGreater(sum(retries), 0)
+
+    def test_raises_when_retries_exhausted(self):
+        # Set up test
+        profile = FakeLlmProfile(throttle_rate=1.0, max_retries=2, retry_backoff_seconds=0)
+        llm = FakeChatModel(model="test", profile=profile).bind_tools([MakeJavascriptRegex])
+
+        # Run our test
+        with self.assertRaises(ClientError) as context:
+            llm.invoke([make_prompt(input_entry=ENTRY)])
+
+        # Check our results
+        self.assertEqual("ThrottlingException", context.exception.response["Error"]["Code"])
+
+    def test_draws_are_seeded(self):
+        # Set up test
+        profile = FakeLlmProfile(latency_jitter_seconds=1.0, seed=3)
+
+        # Run our test
+        llm_1 = FakeChatModel(model="test", profile=profile)
+        llm_2 = FakeChatModel(model="test", profile=profile)
+        draws_1 = [llm_1._draw_latency(0) for _ in range(5)]
+        draws_2 = [llm_2._draw_latency(0) for _ in range(5)]
+
+        # Check our results
+        self.assertEqual(draws_1, draws_2)
+
+class GetLlmTestCase(TestCase):
+    def tearDown(self):
+        configure_fake_llm(None)
+
+    def test_returns_fake_when_configured(self):
+        # Set up test
+        config = {
+            "model": "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+            "temperature": 0,
+            "max_tokens": 16000,
+            "region_name": "us-west-2",
+            "additional_model_request_fields": {"thinking": {"type": "disabled"}}
+        }
+        configure_fake_llm(FakeLlmProfile(latency_seconds=0.5))
+
+        # Run our test
+        llm = get_llm(**config)
+
+        # Check our results
+        self.assertIsInstance(llm, FakeChatModel)
+        self.assertEqual(config["model"], llm.model)
+        self.assertEqual(0.5, llm.profile.latency_seconds)
+        self.assertIs(llm, get_llm(**config))
+
+        configure_fake_llm(None)
+        self.assertIsNone(get_fake_llm_profile())
+        self.assertNotIsInstance(get_llm(**config), FakeChatModel)
@@ -0,0 +1,74 @@
+from django.test import TestCase
+
+from langchain_core.messages import AIMessage
+
+from backend.core.inference import InferenceUsage, make_cacheable_system_message, make_token_budget_batches
+
+
+class MakeCacheableSystemMessageTestCase(TestCase):
+    def test_cache_point_between_prefix_and_suffix(self):
+        message = make_cacheable_system_message("static prefix", "variable suffix")
+
+        self.assertEqual(
+            [
+                {"type": "text", "text": "static prefix"},
+                {"cachePoint": {"type": "default"}},
+                {"type": "text", "text": "variable suffix"}
+            ],
+            message.content
+        )
+
+
+class InferenceUsageTestCase(TestCase):
+    def test_from_usage_metadata(self):
+        response = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 120,
+                "output_tokens": 30,
+                "total_tokens": 150,
+                "input_token_details": {"cache_read": 100, "cache_creation": 0}
+            }
+        )
+
+        usage = InferenceUsage.from_response(response)
+
+        self.assertEqual(InferenceUsage(input_tokens=120, output_tokens=30, cache_read_tokens=100, cache_write_tokens=0), usage)
+
+    def test_from_raw_response_metadata(self):
+        response = AIMessage(
+            content="",
+            response_metadata={"usage": {"inputTokens": 20, "outputTokens": 30, "cacheReadInputTokens": 0, "cacheWriteInputTokens": 100}}
+        )
+
+        usage = InferenceUsage.from_response(response)
+
+        self.assertEqual(0, usage.cache_read_tokens)
+        self.assertEqual(100, usage.cache_write_tokens)
+
+    def test_no_usage(self):
+        self.assertEqual(InferenceUsage(), InferenceUsage.from_response(AIMessage(content="")))
+
+
+class MakeTokenBudgetBatchesTestCase(TestCase):
+    def test_batches_by_tokens(self):
+        items = ["a" * 40, "b" * 40, "c" * 40, "d" * 8]  # 10, 10, 10, and 2 tokens
+
+        batches = make_token_budget_batches(items, max_tokens=20, max_items=10)
+
+        self.assertEqual([["a" * 40, "b" * 40], ["c" * 40, "d" * 8]], batches)
+
+    def test_batches_by_count(self):
+        batches = make_token_budget_batches(list("abcde"), max_tokens=1000, max_items=2)
+
+        self.assertEqual([["a", "b"], ["c", "d"], ["e"]], batches)
+
+    def test_oversized_item_alone(self):
+        items = ["a" * 4, "b" * 400, "c" * 4]
+
+        batches = make_token_budget_batches(items, max_tokens=10, max_items=10)
+
+        self.assertEqual([["a" * 4], ["b" * 400], ["c" * 4]], batches)
+
+    def test_no_items(self):
+        self.assertEqual([], make_token_budget_batches([], max_tokens=10, max_items=10))
@@ -0,0 +1,137 @@
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import TestCase
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from backend.core.inference import InferenceRequest, perform_inference
+from backend.core.inference_cache import InferenceCache, configure_inference_cache, make_inference_cache_key
+
+
+def make_tool_call_response(value: str) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": "Tool", "args": {"value": value}, "id": f"call-{value}"}])
+
+
+class MakeInferenceCacheKeyTestCase(TestCase):
+    def setUp(self):
+        self.llm = FakeMessagesListChatModel(responses=[make_tool_call_response("1")])
+        self.context = [SystemMessage(content="system"), HumanMessage(content="human")]
+
+    def test_key_ignores_message_ids(self):
+        context_with_ids = [SystemMessage(content="system", id="a"), HumanMessage(content="human", id="b")]
+
+        self.assertEqual(make_inference_cache_key(self.llm, self.context), make_inference_cache_key(self.llm, context_with_ids))
+
+    def test_key_depends_on_context(self):
+        other_context = [SystemMessage(content="system"), HumanMessage(content="other")]
+
+        self.assertNotEqual(make_inference_cache_key(self.llm, self.context), make_inference_cache_key(self.llm, other_context))
+
+    def test_key_depends_on_bound_kwargs(self):
+        self.assertNotEqual(
+            make_inference_cache_key(self.llm.bind(stop=["a"]), self.context),
+            make_inference_cache_key(self.llm.bind(stop=["b"]), self.context)
+        )
+
+
+class InferenceCacheTestCase(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.disk_path = Path(self.temp_dir.name) / "cache.sqlite3"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_memory_lru_eviction(self):
+        cache = InferenceCache(memory_max_entries=2)
+
+        cache.put("a", make_tool_call_response("a"))
+        cache.put("b", make_tool_call_response("b"))
+        cache.get("a")
+        cache.put("c", make_tool_call_response("c"))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_disk_tier_survives_restart(self):
+        InferenceCache(disk_path=self.disk_path).put("a", make_tool_call_response("a"))
+
+        cache = InferenceCache(disk_path=self.disk_path)
+        response = cache.get("a")
+
+        self.assertEqual({"value": "a"}, response.tool_calls[0]["args"])
+        self.assertEqual(1, cache.get_stats().disk_hits)
+
+        cache.get("a") # Promoted to the memory tier by the first lookup
+        self.assertEqual(1, cache.get_stats().memory_hits)
+
+    def test_disk_size_eviction(self):
+        cache = InferenceCache(disk_path=self.disk_path, memory_max_entries=1, disk_max_entries=2)
+
+        for key in ["a", "b", "c"]:
+            cache.put(key, make_tool_call_response(key))
+            time.sleep(0.01)
+
+        self.assertEqual(2, cache.get_stats().disk_entries)
+        self.assertIsNone(cache.get("a"))
+
+    def test_delete_from_both_tiers(self):
+        cache = InferenceCache(disk_path=self.disk_path)
+        cache.put("a", make_tool_call_response("a"))
+
+        cache.delete("a")
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(0, cache.get_stats().disk_entries)
+
+    def test_ttl_expiry(self):
+        cache = InferenceCache(disk_path=self.disk_path, ttl_seconds=0)
+
+        cache.put("a", make_tool_call_response("a"))
+        time.sleep(0.01)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(0, cache.get_stats().disk_entries)
+
+
+class PerformInferenceCachingTestCase(TestCase):
+    def setUp(self):
+        configure_inference_cache(InferenceCache())
+        self.context = [SystemMessage(content="system"), HumanMessage(content="human")]
+
+    def tearDown(self):
+        configure_inference_cache(None)
+
+    def test_repeat_inference_served_from_cache(self):
+        llm = FakeMessagesListChatModel(responses=[make_tool_call_response("1"), make_tool_call_response("2")])
+
+        first = perform_inference(llm, [InferenceRequest(task_id="1", context=self.context)])[0]
+        second = perform_inference(llm, [InferenceRequest(task_id="2", context=self.context)])[0]
+
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual({"value": "1"}, second.response.tool_calls[0]["args"])
+
+    def test_bypass_refreshes_cache(self):
+        llm = FakeMessagesListChatModel(responses=[make_tool_call_response("1"), make_tool_call_response("2")])
+
+        perform_inference(llm, [InferenceRequest(task_id="1", context=self.context)])
+        bypassed = perform_inference(llm, [InferenceRequest(task_id="2", context=self.context)], bypass_cache=True)[0]
+        cached = perform_inference(llm, [InferenceRequest(task_id="3", context=self.context)])[0]
+
+        self.assertFalse(bypassed.cached)
+        self.assertEqual({"value": "2"}, bypassed.response.tool_calls[0]["args"])
+        self.assertEqual({"value": "2"}, cached.response.tool_calls[0]["args"])
+
+    def test_responses_without_tool_calls_not_cached(self):
+        llm = FakeMessagesListChatModel(responses=[AIMessage(content="No tool call"), make_tool_call_response("1")])
+
+        perform_inference(llm, [InferenceRequest(task_id="1", context=self.context)])
+        second = perform_inference(llm, [InferenceRequest(task_id="2", context=self.context)])[0]
+
+        self.assertFalse(second.cached)
+        self.assertEqual({"value": "1"}, second.response.tool_calls[0]["args"])
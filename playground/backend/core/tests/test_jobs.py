@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.test import TestCase
+
+from backend.core.jobs import InMemoryJobStore, JobNotFoundError, JobQueueFullError, JobRunner, JobStatus
+
+
+class JobRunnerTestCase(TestCase):
+    def setUp(self):
+        self.store = InMemoryJobStore()
+        self.runner = JobRunner(self.store, max_workers=1, max_pending=2)
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_successful_job(self):
+        job = self.runner.submit("job-1", "test", lambda: (200, {"value": 1}))
+        self.assertEqual(JobStatus.PENDING, job.status)
+
+        self.runner.shutdown()
+
+        job = self.store.get("job-1")
+        self.assertEqual(JobStatus.SUCCEEDED, job.status)
+        self.assertEqual(200, job.result_status_code)
+        self.assertEqual({"value": 1}, job.result)
+
+    def test_error_response_marks_job_failed(self):
+        self.runner.submit("job-1", "test", lambda: (400, {"error": "bad input"}))
+        self.runner.shutdown()
+
+        job = self.store.get("job-1")
+        self.assertEqual(JobStatus.FAILED, job.status)
+        self.assertEqual(400, job.result_status_code)
+
+    def test_exception_marks_job_failed(self):
+        def work():
+            raise ValueError("boom")
+
+        self.runner.submit("job-1", "test", work)
+        self.runner.shutdown()
+
+        job = self.store.get("job-1")
+        self.assertEqual(JobStatus.FAILED, job.status)
+        self.assertEqual(500, job.result_status_code)
+        self.assertEqual({"error": "boom"}, job.result)
+
+    def test_pending_limit(self):
+        release = threading.Event()
+
+        def blocked_work():
+            release.wait()
+            return 200, {}
+
+        self.runner.submit("job-1", "test", blocked_work)
+        self.runner.submit("job-2", "test", blocked_work)
+        with self.assertRaises(JobQueueFullError):
+            self.runner.submit("job-3", "test", blocked_work)
+
+        release.set()
+        self.runner.shutdown()
+
+        # Finished jobs free their slots
+        runner = JobRunner(self.store, max_workers=1, max_pending=1)
+        runner.submit("job-4", "test", lambda: (200, {}))
+        runner.shutdown()
+        runner_job = self.store.get("job-4")
+        self.assertEqual(JobStatus.SUCCEEDED, runner_job.status)
+
+    def test_unknown_job(self):
+        with self.assertRaises(JobNotFoundError):
+            self.store.get("missing")
+
+    def test_jobs_of_stopped_owners_failed(self):
+        runner = JobRunner(self.store, owner_lease_seconds=0.5)
+        live_runner = JobRunner(self.store)
+        self.addCleanup(runner.shutdown)
+        self.addCleanup(live_runner.shutdown)
+
+        self.store.renew_owner("stopped")
+        self.store.create("job-1", "test", owner="stopped")
+        self.store.create("job-2", "test")
+        self.store.update("job-2", JobStatus.RUNNING)
+        self.store.create("job-3", "test", owner="stopped")
+        self.store.update("job-3", JobStatus.SUCCEEDED, result_status_code=200, result={})
+        time.sleep(0.6)
+        live_runner.start()
+        self.store.create("job-4", "test", owner=live_runner.owner)
+        self.store.update("job-4", JobStatus.RUNNING)
+
+        runner.start()
+
+        self.assertEqual(
+            [JobStatus.FAILED, JobStatus.FAILED, JobStatus.SUCCEEDED, JobStatus.RUNNING],
+            [self.store.get(f"job-{index}").status for index in range(1, 5)]
+        )
+        self.assertEqual(500, self.store.get("job-1").result_status_code)
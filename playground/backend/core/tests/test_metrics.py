@@ -0,0 +1,112 @@
+from django.test import TestCase
+
+from langchain_core.messages import AIMessage
+
+from backend.core.inference import InferenceResult, InferenceUsage
+from backend.core.metrics import (BEDROCK_RETRIES, BEDROCK_THROTTLES, INFERENCE_TOKENS, CallbackGauge, Counter, Histogram,
+                                  MetricsRegistry, get_metrics_registry, make_throttle_recorder, record_inference)
+
+
+class MetricTypesTestCase(TestCase):
+    def test_counter(self):
+        counter = Counter("test_total", "A test counter", ["expert"])
+
+        counter.inc(expert="analysis")
+        counter.inc(2, expert="analysis")
+        counter.inc(expert="regex")
+
+        self.assertEqual(
+            [
+                "# HELP test_total A test counter",
+                "# TYPE test_total counter",
+                'test_total{expert="analysis"} 3',
+                'test_total{expert="regex"} 1'
+            ],
+            counter.collect()
+        )
+
+    def test_counter_rejects_wrong_labels(self):
+        counter = Counter("test_total", "A test counter", ["expert"])
+
+        with self.assertRaises(ValueError):
+            counter.inc(model="m")
+        with self.assertRaises(ValueError):
+            counter.inc(-1, expert="analysis")
+
+    def test_histogram(self):
+        histogram = Histogram("test_seconds", "A test histogram", ["expert"], buckets=[1, 5])
+
+        histogram.observe(0.5, expert="analysis")
+        histogram.observe(1, expert="analysis")
+        histogram.observe(10, expert="analysis")
+
+        self.assertEqual(
+            [
+                "# HELP test_seconds A test histogram",
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{expert="analysis",le="1"} 2',
+                'test_seconds_bucket{expert="analysis",le="5"} 2',
+                'test_seconds_bucket{expert="analysis",le="+Inf"} 3',
+                'test_seconds_sum{expert="analysis"} 11.5',
+                'test_seconds_count{expert="analysis"} 3'
+            ],
+            histogram.collect()
+        )
+
+    def test_label_escaping(self):
+        counter = Counter("test_total", "A test counter", ["model"])
+
+        counter.inc(model='a"b\\c\nd')
+
+        self.assertEqual('test_total{model="a\\"b\\\\c\\nd"} 1', counter.collect()[-1])
+
+    def test_callback_gauge(self):
+        registry = MetricsRegistry()
+        registry.register(CallbackGauge("test_gauge", "A test gauge", lambda: {("hits",): 4}, ["stat"]))
+
+        self.assertEqual('# HELP test_gauge A test gauge\n# TYPE test_gauge gauge\ntest_gauge{stat="hits"} 4\n', registry.render())
+
+    def test_duplicate_registration(self):
+        registry = MetricsRegistry()
+        registry.register(Counter("test_total", "A test counter"))
+
+        with self.assertRaises(ValueError):
+            registry.register(Counter("test_total", "A test counter"))
+
+
+class InferenceMetricsTestCase(TestCase):
+    def test_record_inference(self):
+        response = AIMessage(content="", response_metadata={"ResponseMetadata": {"RetryAttempts": 2}})
+        result = InferenceResult(
+            task_id="1",
+            response=response,
+            usage=InferenceUsage(input_tokens=100, output_tokens=20, reasoning_tokens=5, cache_read_tokens=80)
+        )
+        input_before = INFERENCE_TOKENS.get(expert="test_record", kind="input")
+        retries_before = BEDROCK_RETRIES.get(expert="test_record")
+
+        record_inference("test_record", result, 1.5)
+
+        self.assertEqual(input_before + 100, INFERENCE_TOKENS.get(expert="test_record", kind="input"))
+        self.assertEqual(5, INFERENCE_TOKENS.get(expert="test_record", kind="reasoning"))
+        self.assertEqual(80, INFERENCE_TOKENS.get(expert="test_record", kind="cache_read"))
+        self.assertEqual(retries_before + 2, BEDROCK_RETRIES.get(expert="test_record"))
+
+    def test_cached_inference_uses_no_tokens(self):
+        result = InferenceResult(task_id="1", response=AIMessage(content=""), usage=InferenceUsage(), cached=True)
+
+        record_inference("test_cached", result, 0.001)
+
+        self.assertEqual(0, INFERENCE_TOKENS.get(expert="test_cached", kind="input"))
+
+    def test_throttle_recorder(self):
+        record_throttle = make_throttle_recorder("test-model")
+
+        self.assertIsNone(record_throttle(response=(None, {"Error": {"Code": "ThrottlingException"}}), attempts=1))
+        self.assertIsNone(record_throttle(response=(None, {"Error": {"Code": "ValidationException"}}), attempts=1))
+        self.assertIsNone(record_throttle(response=None, caught_exception=ConnectionError(), attempts=1))
+
+        self.assertEqual(1, BEDROCK_THROTTLES.get(model="test-model"))
+
+    def test_render_includes_cache_stats(self):
+        self.assertIn('playground_code_cache{stat="max_entries"}', get_metrics_registry().render())
@@ -0,0 +1,105 @@
+from django.test import TestCase
+
+from ocsf.schema import OcsfAttr, OcsfEvent, OcsfObject, OcsfSchema
+
+from backend.core.ocsf.ocsf_schemas import get_ocsf_schema_index, make_get_ocsf_event_schema, make_get_ocsf_object_schemas
+
+
+def _attr(attr_type: str, requirement: str = "optional", object_type: str = None, is_array: bool = False) -> OcsfAttr:
+    return OcsfAttr(caption=attr_type, type=attr_type, requirement=requirement, is_array=is_array, object_type=object_type, object_name=object_type)
+
+def make_test_schema() -> OcsfSchema:
+    objects = [
+        OcsfObject(caption="User", name="user", attributes={
+            "name": _attr("string_t"),
+            "uid": _attr("string_t"),
+            "groups": _attr("object", object_type="group", is_array=True),
+        }),
+        OcsfObject(caption="Group", name="group", attributes={
+            "name": _attr("string_t"),
+            "owner": _attr("object", object_type="user"),
+        }),
+        OcsfObject(caption="Network Endpoint", name="network_endpoint", attributes={
+            "ip": _attr("ip_t"),
+            "port": _attr("port_t"),
+        }),
+        OcsfObject(caption="Metadata", name="metadata", attributes={
+            "product": _attr("object", requirement="Required", object_type="product"),
+            "version": _attr("string_t", requirement="Required"),
+        }),
+        OcsfObject(caption="Product", name="product", attributes={
+            "name": _attr("string_t"),
+        }),
+    ]
+    event = OcsfEvent(caption="Authentication", name="authentication", uid=3002, attributes={
+        "time": _attr("timestamp_t", requirement="Required"),
+        "user": _attr("object", requirement="Required", object_type="user"),
+        "src_endpoint": _attr("object", object_type="network_endpoint"),
+        "metadata": _attr("object", requirement="Required", object_type="metadata"),
+    })
+
+    return OcsfSchema(version="1.1.0", classes={"authentication": event}, objects={obj.name: obj for obj in objects})
+
+
+class OcsfSchemaIndexTestCase(TestCase):
+    def setUp(self):
+        self.schema = make_test_schema()
+
+    def test_index_is_built_once_per_schema(self):
+        self.assertIs(get_ocsf_schema_index(self.schema), get_ocsf_schema_index(self.schema))
+        self.assertIsNot(get_ocsf_schema_index(self.schema), get_ocsf_schema_index(make_test_schema()))
+
+        schema_index = get_ocsf_schema_index(self.schema)
+        self.assertIs(schema_index.get_event_index("Authentication"), schema_index.get_event_index("Authentication"))
+
+    def test_object_closure(self):
+        event_index = get_ocsf_schema_index(self.schema).get_event_index("Authentication")
+
+        self.assertEqual(list(event_index.objects.keys()), ["user", "network_endpoint", "metadata", "group", "product"])
+
+    def test_invalid_event_class(self):
+        with self.assertRaises(ValueError):
+            make_get_ocsf_event_schema(self.schema)("Not A Class", [])
+        with self.assertRaises(ValueError):
+            make_get_ocsf_object_schemas(self.schema)("Not A Class", [])
+
+
+class GetOcsfObjectSchemasTestCase(TestCase):
+    def setUp(self):
+        self.get_object_schemas = make_get_ocsf_object_schemas(make_test_schema())
+
+    def _by_name(self, paths):
+        return {obj.name: obj for obj in self.get_object_schemas("Authentication", paths)}
+
+    def test_no_paths(self):
+        objects = self._by_name([])
+
+        self.assertEqual(set(objects.keys()), {"user", "network_endpoint", "metadata", "group", "product"})
+        for obj in objects.values():
+            self.assertEqual(obj.to_dict(filter_attributes=True)["attributes"], {})
+            self.assertEqual(set(obj.to_dict()["attributes"].keys()), set(obj.attributes.keys()))
+
+    def test_leaf_and_transition_attributes(self):
+        objects = self._by_name(["user.groups.name", "src_endpoint.ip"])
+
+        self.assertEqual(objects["user"].attrs_to_include, ["groups"])
+        self.assertEqual(objects["group"].attrs_to_include, ["name"])
+        self.assertEqual(objects["network_endpoint"].attrs_to_include, ["ip"])
+        self.assertEqual(objects["metadata"].attrs_to_include, [])
+
+    def test_object_leaf_includes_all_attributes(self):
+        objects = self._by_name(["metadata.product"])
+
+        self.assertTrue(objects["product"].include_all_attrs)
+        self.assertEqual(set(objects["product"].to_dict(filter_attributes=True)["attributes"].keys()), {"name"})
+        self.assertEqual(objects["metadata"].attrs_to_include, ["product"])
+
+    def test_similar_attribute_names_are_not_prefixes(self):
+        objects = self._by_name(["user.name_suffix"])
+
+        self.assertEqual(objects["user"].attrs_to_include, [])
+
+    def test_paths_outside_the_schema(self):
+        objects = self._by_name(["unknown", "user.nope.deeper"])
+
+        self.assertEqual(objects["user"].attrs_to_include, [])
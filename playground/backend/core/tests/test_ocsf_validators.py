@@ -0,0 +1,71 @@
+from django.test import TestCase
+
+from ocsf.schema import OcsfAttr
+
+from backend.core.ocsf.ocsf_validators import generate_ocsf_event_validator_source, get_compiled_ocsf_event_validator
+from backend.core.tests.test_ocsf_schemas import make_test_schema
+
+
+class CompiledOcsfEventValidatorTestCase(TestCase):
+    def setUp(self):
+        self.schema = make_test_schema()
+        self.schema.classes["authentication"].attributes["unmapped"] = OcsfAttr(caption="Unmapped", type="object", object_type="user")
+        self.validate = get_compiled_ocsf_event_validator(self.schema, "Authentication")
+
+        self.valid_output = {
+            "time": "1741765257",
+            "user": {"name": "guest", "groups": [{"name": "admins", "owner": {"uid": "0"}}, None]},
+            "src_endpoint": {"ip": "86.212.199.60", "port": None},
+            "metadata": {"version": "1.1.0", "product": {"name": "sshd"}},
+        }
+
+    def test_validator_is_cached(self):
+        self.assertIs(self.validate, get_compiled_ocsf_event_validator(self.schema, "Authentication"))
+
+    def test_valid_output(self):
+        self.assertTrue(self.validate(self.valid_output))
+
+    def test_unknown_field(self):
+        self.valid_output["src_endpoint"]["hostname"] = "mailsv1"
+        self.assertFalse(self.validate(self.valid_output))
+
+        del self.valid_output["src_endpoint"]["hostname"]
+        self.valid_output["not_a_field"] = "value"
+        self.assertFalse(self.validate(self.valid_output))
+
+    def test_missing_required_field(self):
+        del self.valid_output["time"]
+        self.assertFalse(self.validate(self.valid_output))
+
+    def test_missing_nested_required_field(self):
+        del self.valid_output["metadata"]["product"]
+        self.assertFalse(self.validate(self.valid_output))
+
+    def test_array_shape(self):
+        self.valid_output["user"]["groups"] = {"name": "admins"}
+        self.assertFalse(self.validate(self.valid_output))
+
+        self.valid_output["user"]["groups"] = [{"name": "admins", "bogus": True}]
+        self.assertFalse(self.validate(self.valid_output))
+
+    def test_object_shape(self):
+        self.valid_output["src_endpoint"] = "86.212.199.60"
+        self.assertFalse(self.validate(self.valid_output))
+
+    def test_unmapped_accepts_anything(self):
+        self.valid_output["unmapped"] = {"anything": ["goes", {"here": 1}]}
+        self.assertTrue(self.validate(self.valid_output))
+
+    def test_not_an_object(self):
+        self.assertFalse(self.validate("not an object"))
+        self.assertFalse(self.validate(None))
+
+    def test_invalid_event_class(self):
+        with self.assertRaises(ValueError):
+            get_compiled_ocsf_event_validator(self.schema, "Not A Class")
+
+    def test_generated_source_compiles(self):
+        source = generate_ocsf_event_validator_source(self.schema, "Authentication")
+
+        compile(source, "<test>", "exec")
+        self.assertIn("validate = _validate_event", source)
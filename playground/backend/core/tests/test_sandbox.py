@@ -0,0 +1,63 @@
+import os
+import time
+
+from django.test import TestCase
+
+from backend.core.sandbox import SandboxCpuTimeExceededError, SandboxPool, SandboxTimeoutError, SandboxWorkerCrashedError
+
+
+class SandboxPoolTestCase(TestCase):
+    def setUp(self):
+        self.pool = SandboxPool(max_workers=1, timeout_seconds=1.0, cpu_time_seconds=0.2, memory_bytes=64 * 1024 * 1024)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_returns_results_and_raises_errors(self):
+        self.assertEqual(1024, self.pool.run(pow, 2, 10))
+        with self.assertRaises(ValueError):
+            self.pool.run(int, "not a number")
+        self.assertEqual(2048, self.pool.run(pow, 2, 11))
+
+    def test_worker_is_reused(self):
+        first_pid = self.pool.run(os.getpid)
+        second_pid = self.pool.run(os.getpid)
+
+        self.assertEqual(first_pid, second_pid)
+        self.assertNotEqual(os.getpid(), first_pid)
+
+    def test_cpu_time_limit(self):
+        first_pid = self.pool.run(os.getpid)
+
+        with self.assertRaises(SandboxCpuTimeExceededError):
+            self.pool.run(exec, "while True: pass")
+
+        # The worker stopped the code itself, so it's still usable
+        self.assertEqual(first_pid, self.pool.run(os.getpid))
+
+    def test_memory_limit(self):
+        first_pid = self.pool.run(os.getpid)
+
+        with self.assertRaises(MemoryError):
+            self.pool.run(bytearray, 256 * 1024 * 1024)
+
+        # The worker is replaced once it has run out of memory
+        self.assertNotEqual(first_pid, self.pool.run(os.getpid))
+
+    def test_timed_out_workers_are_replaced(self):
+        first_pid = self.pool.run(os.getpid)
+
+        start = time.monotonic()
+        with self.assertRaises(SandboxTimeoutError):
+            self.pool.run(time.sleep, 30)
+
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertNotEqual(first_pid, self.pool.run(os.getpid))
+
+    def test_crashed_workers_are_replaced(self):
+        first_pid = self.pool.run(os.getpid)
+
+        with self.assertRaises(SandboxWorkerCrashedError):
+            self.pool.run(os._exit, 3)
+
+        self.assertNotEqual(first_pid, self.pool.run(os.getpid))
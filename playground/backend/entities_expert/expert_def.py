@@ -1,25 +1,37 @@
+from dataclasses import replace
 import logging
-
-from langchain_aws import ChatBedrockConverse
+from typing import List
 
 from backend.core.ocsf.ocsf_versions import OcsfVersion
 from backend.entities_expert.prompting import get_analyze_system_prompt_factory, get_extract_system_prompt_factory
 from backend.entities_expert.tool_def import get_analyze_tool_bundle, get_extract_tool_bundle
+from backend.entities_expert.entities import EntityMapping
 from backend.entities_expert.task_def import AnalysisTask, ExtractTask
 
-from backend.core.experts import DEFULT_BOTO_CONFIG, Expert, invoke_expert
+from backend.core.experts import (Expert, ExpertBatchResult, ExpertInvocationError, ainvoke_expert, ainvoke_expert_batch, get_expert_registry, get_llm,
+                                  invoke_expert)
 
 
 logger = logging.getLogger("backend")
 
+# Large mapping lists are split into shards that are extracted concurrently; see make_extraction_shards()
+EXTRACTION_SHARD_MAX_MAPPINGS = 10
+EXTRACTION_SHARD_MAX_RETRIES = 2
+
 
 def get_analysis_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Expert:
+    return get_expert_registry().get_or_create(
+        ("analysis", ocsf_version, ocsf_event_name),
+        lambda: _build_analysis_expert(ocsf_version, ocsf_event_name)
+    )
+
+def _build_analysis_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Expert:
     logger.info(f"Building expert for: {ocsf_version}")
 
     tool_bundle = get_analyze_tool_bundle(ocsf_version)
 
-    # Define our Bedrock LLM and attach the tools to it
-    llm = ChatBedrockConverse(
+    # Define our LLM and attach the tools to it
+    llm = get_llm(
             model="us.anthropic.claude-3-7-sonnet-20250219-v1:0", 
             temperature=1, # Must be 1 for "thinking" mode
             max_tokens=30001,
@@ -29,8 +41,7 @@ def get_analysis_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Expe
                     "type": "enabled",
                     "budget_tokens": 30000
                 }
-            },
-            config=DEFULT_BOTO_CONFIG
+            }
         )
     llm_w_tools = llm.bind_tools(tool_bundle.to_list())
 
@@ -40,23 +51,37 @@ def get_analysis_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Expe
             ocsf_version=ocsf_version,
             ocsf_event_name=ocsf_event_name
         ),
-        tools=tool_bundle
+        tools=tool_bundle,
+        name="analysis"
     )
 
-def invoke_analysis_expert(expert: Expert, task: AnalysisTask) -> AnalysisTask:
+def invoke_analysis_expert(expert: Expert, task: AnalysisTask, bypass_cache: bool = False) -> AnalysisTask:
+    logger.info(f"Invoking the Analysis Expert for task_id: {task.task_id}")
+    invoke_expert(expert, task, bypass_cache=bypass_cache)
+    logger.info(f"Analysis performed for task_id: {task.task_id}")
+
+    return task
+
+async def ainvoke_analysis_expert(expert: Expert, task: AnalysisTask, bypass_cache: bool = False) -> AnalysisTask:
     logger.info(f"Invoking the Analysis Expert for task_id: {task.task_id}")
-    invoke_expert(expert, task)
+    await ainvoke_expert(expert, task, bypass_cache=bypass_cache)
     logger.info(f"Analysis performed for task_id: {task.task_id}")
 
     return task
 
 def get_extraction_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Expert:
+    return get_expert_registry().get_or_create(
+        ("extraction", ocsf_version, ocsf_event_name),
+        lambda: _build_extraction_expert(ocsf_version, ocsf_event_name)
+    )
+
+def _build_extraction_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Expert:
     logger.info(f"Building expert for: {ocsf_version}")
 
     tool_bundle = get_extract_tool_bundle(ocsf_version)
 
-    # Define our Bedrock LLM and attach the tools to it
-    llm = ChatBedrockConverse(
+    # Define our LLM and attach the tools to it
+    llm = get_llm(
             model="us.anthropic.claude-3-7-sonnet-20250219-v1:0", 
             temperature=0, # Good for straightforward, practical code generation
             max_tokens=30000,
@@ -65,8 +90,7 @@ def get_extraction_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Ex
                 "thinking": {
                     "type": "disabled"
                 }
-            },
-            config=DEFULT_BOTO_CONFIG
+            }
         )
     llm_w_tools = llm.bind_tools(tool_bundle.to_list())
 
@@ -76,12 +100,86 @@ def get_extraction_expert(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Ex
             ocsf_version=ocsf_version,
             ocsf_event_name=ocsf_event_name
         ),
-        tools=tool_bundle
+        tools=tool_bundle,
+        name="extraction"
     )
 
-def invoke_extraction_expert(expert: Expert, task: ExtractTask) -> ExtractTask:
+def invoke_extraction_expert(expert: Expert, task: ExtractTask, bypass_cache: bool = False) -> ExtractTask:
+    logger.info(f"Invoking the Extraction Expert for task_id: {task.task_id}")
+    invoke_expert(expert, task, bypass_cache=bypass_cache)
+    logger.info(f"Extraction performed for task_id: {task.task_id}")
+
+    return task
+
+async def ainvoke_extraction_expert(expert: Expert, task: ExtractTask, bypass_cache: bool = False) -> ExtractTask:
     logger.info(f"Invoking the Extraction Expert for task_id: {task.task_id}")
-    invoke_expert(expert, task)
+    await ainvoke_expert(expert, task, bypass_cache=bypass_cache)
     logger.info(f"Extraction performed for task_id: {task.task_id}")
 
     return task
+
+def make_extraction_shards(mappings: List[EntityMapping], max_mappings: int = EXTRACTION_SHARD_MAX_MAPPINGS) -> List[List[EntityMapping]]:
+    """
+    Splits the mappings into shards of at most max_mappings each.  Mappings are grouped by the top-level OCSF attribute
+    they map to, so each shard's prompt only needs the schemas of a few objects, and whole groups are packed into
+    shards together; only a group larger than max_mappings is split.
+    """
+    groups = dict()
+    for mapping in mappings:
+        groups.setdefault(mapping.ocsf_path.split(".")[0], []).append(mapping)
+
+    shards = []
+    current_shard = []
+    for group in groups.values():
+        for start in range(0, len(group), max_mappings):
+            chunk = group[start:start + max_mappings]
+            if current_shard and len(current_shard) + len(chunk) > max_mappings:
+                shards.append(current_shard)
+                current_shard = []
+            current_shard.extend(chunk)
+
+    if current_shard:
+        shards.append(current_shard)
+    return shards
+
+def _check_shard_result(result: ExpertBatchResult) -> ExpertBatchResult:
+    # A response with patterns for mappings the shard doesn't have is malformed, so the shard is failed and retried
+    if result.error is not None or result.task.mappings is None:
+        return result
+
+    mapping_ids = set(mapping.id for mapping in result.task.mappings)
+    unknown_ids = [pattern.id for pattern in result.task.patterns if pattern.id not in mapping_ids]
+    if unknown_ids:
+        return ExpertBatchResult(task=result.task, error=ExpertInvocationError(f"Extraction patterns were created for unknown mapping IDs: {unknown_ids}"))
+    return result
+
+async def ainvoke_sharded_extraction_expert(expert: Expert, tasks: List[ExtractTask], bypass_cache: bool = False,
+                                            max_retries: int = EXTRACTION_SHARD_MAX_RETRIES) -> List[ExpertBatchResult]:
+    """
+    Invokes the Extraction Expert on each shard's task concurrently.  Shards that fail, including those whose patterns
+    are for mappings not in the task's mappings, are retried on their own, up to max_retries times, so one malformed
+    response doesn't lose the work done for the other shards.
+    """
+    logger.info(f"Invoking the Extraction Expert for {len(tasks)} shards: {[task.task_id for task in tasks]}")
+    initial_contexts = {task.task_id: list(task.context) for task in tasks}
+
+    results = [_check_shard_result(result) for result in await ainvoke_expert_batch(expert, tasks, bypass_cache=bypass_cache)]
+
+    for attempt in range(max_retries):
+        failed_indices = [index for index, result in enumerate(results) if result.error is not None]
+        if not failed_indices:
+            break
+
+        logger.warning(f"Retrying {len(failed_indices)} failed extraction shards (attempt {attempt + 1} of {max_retries})")
+        retry_tasks = [
+            replace(results[index].task, context=list(initial_contexts[results[index].task.task_id]), patterns=None)
+            for index in failed_indices
+        ]
+        # A response with a malformed tool call may have been cached, so retries always go to the model
+        retry_results = await ainvoke_expert_batch(expert, retry_tasks, bypass_cache=True)
+        for index, retry_result in zip(failed_indices, retry_results):
+            results[index] = _check_shard_result(retry_result)
+
+    logger.info(f"Extraction performed for {sum(1 for result in results if result.error is None)} of {len(tasks)} shards")
+
+    return results
\ No newline at end of file
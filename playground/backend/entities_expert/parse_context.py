@@ -0,0 +1,130 @@
+import ast
+import logging
+from typing import Any
+
+from backend.core.code_cache import get_python_code_cache
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains the parse context that generated transformers hand to their extract functions.  It holds the
+common parsed forms of a single input entry (JSON, a syslog header, key=value pairs), each computed the first time an
+extract function asks for it, so a transformer with many patterns parses each entry at most once per form rather than
+once per pattern.
+
+The class is kept as source code because it is embedded verbatim in each transformer's logic, which must be runnable
+on its own; load_parse_context_class() compiles the same source for use outside of a transformer, such as when
+validating a single extraction pattern.
+"""
+
+PARSE_CONTEXT_CLASS_NAME = "ParseContext"
+
+PARSE_CONTEXT_CODE = r'''
+class ParseContext:
+    """
+    The parsed forms of a single input entry, each computed on first use and shared by every extract function that
+    accepts the context.  A form the entry can't be parsed into is None.
+    """
+    _SYSLOG_PATTERNS = [
+        # RFC 5424, e.g. "<34>1 2003-10-11T22:14:15.003Z host app 1234 ID47 - message"
+        re.compile(r"^<(?P<priority>\d{1,3})>1 (?P<timestamp>\S+) (?P<hostname>\S+) (?P<app_name>\S+) (?P<pid>\S+) (?P<msg_id>\S+) (?P<structured_data>-|(?:\[.*?\])+) ?(?P<message>.*)$"),
+        # RFC 3164, e.g. "<34>Oct 11 22:14:15 host app[1234]: message"
+        re.compile(r"^(?:<(?P<priority>\d{1,3})>)?(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) (?P<hostname>\S+) (?P<app_name>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?: ?(?P<message>.*)$"),
+    ]
+    _KV_PATTERN = re.compile(r"([A-Za-z_][\w.\-]*)=(\"(?:[^\"\\]|\\.)*\"|'[^']*'|[^\s,;]*)")
+
+    def __init__(self, input_entry: str, fused_searches: typing.Optional[typing.Dict[typing.Tuple[str, int], typing.Any]] = None):
+        self.input_entry = input_entry
+        self._forms = {}
+        self._fused_searches = fused_searches or {}
+
+    def _get_form(self, name: str, parse: typing.Callable[[str], typing.Any]) -> typing.Any:
+        if name not in self._forms:
+            try:
+                self._forms[name] = parse(self.input_entry)
+            except Exception:
+                self._forms[name] = None
+        return self._forms[name]
+
+    @property
+    def json(self) -> typing.Any:
+        """The entry parsed as JSON"""
+        return self._get_form("json", json.loads)
+
+    @property
+    def syslog(self) -> typing.Optional[typing.Dict[str, typing.Optional[str]]]:
+        """The entry's syslog header fields: priority, timestamp, hostname, app_name, pid, and message"""
+        return self._get_form("syslog", self._parse_syslog)
+
+    @property
+    def kv(self) -> typing.Dict[str, str]:
+        """The entry's key=value pairs, with quotes removed from quoted values; the last of a repeated key wins"""
+        return self._get_form("kv", self._parse_kv)
+
+    def search(self, pattern: str, flags: int = 0) -> typing.Any:
+        """The result of re.search() for the pattern against the entry, computed once however many callers ask for it"""
+        key = ("search", pattern, flags)
+        if key not in self._forms:
+            fused_search = self._fused_searches.get((pattern, flags))
+            if fused_search is None:
+                self._forms[key] = re.search(pattern, self.input_entry, flags)
+            else:
+                self._forms[key] = fused_search.select(self._get_form(fused_search.fused_regex, fused_search.fused_regex.match))
+        return self._forms[key]
+
+    def shared_extract(self, key: str, extract: typing.Callable[..., typing.Any], *args: typing.Any) -> typing.Any:
+        """
+        The result of the extract function, called once for the key however many patterns share that extraction.  Each
+        caller gets its own copy of a list or dict result, so a transform that modifies its input doesn't affect others.
+        """
+        form_key = ("extract", key)
+        if form_key not in self._forms:
+            self._forms[form_key] = extract(*args)
+
+        result = self._forms[form_key]
+        if isinstance(result, list):
+            return list(result)
+        if isinstance(result, dict):
+            return dict(result)
+        return result
+
+    @classmethod
+    def _parse_syslog(cls, input_entry: str) -> typing.Optional[typing.Dict[str, typing.Optional[str]]]:
+        for pattern in cls._SYSLOG_PATTERNS:
+            match = pattern.match(input_entry)
+            if match:
+                return match.groupdict()
+        return None
+
+    @classmethod
+    def _parse_kv(cls, input_entry: str) -> typing.Dict[str, str]:
+        pairs = {}
+        for key, value in cls._KV_PATTERN.findall(input_entry):
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            pairs[key] = value
+        return pairs
+'''
+
+PARSE_CONTEXT_DEPENDENCY_SETUP = "import json\nimport re\nimport typing"
+
+
+def extract_accepts_parse_context(extract_logic: str) -> bool:
+    """
+    Returns whether the extract function in the logic opts in to the parse context by taking a second parameter.
+    Logic that can't be parsed is treated as not opting in; it will fail validation on its own.
+    """
+    try:
+        module = ast.parse(extract_logic)
+    except SyntaxError:
+        return False
+
+    for node in module.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "extract":
+            return len(node.args.posonlyargs) + len(node.args.args) >= 2
+    return False
+
+def load_parse_context_class() -> Any:
+    module = get_python_code_cache().load_module("parse_context", f"{PARSE_CONTEXT_DEPENDENCY_SETUP}\n\n{PARSE_CONTEXT_CODE}")
+    return getattr(module, PARSE_CONTEXT_CLASS_NAME)
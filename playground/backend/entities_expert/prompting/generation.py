@@ -1,37 +1,54 @@
+from functools import lru_cache
 import json
 import logging
 from typing import Any, Callable, Dict, List
 
 from langchain_core.messages import SystemMessage
 
+from backend.core.inference import make_cacheable_system_message
 from backend.core.ocsf.ocsf_versions import OcsfVersion
 from backend.entities_expert.entities import EntityMapping
-from backend.entities_expert.prompting.templates import analyze_prompt_template, extract_prompt_template
+from backend.entities_expert.prompting.templates import (analyze_prompt_prefix_template, analyze_prompt_suffix_template,
+                                                         extract_prompt_prefix_template, extract_prompt_suffix_template)
 from backend.entities_expert.prompting.knowledge import get_ocsf_event_class_knowledge, get_ocsf_event_schema, get_ocsf_object_schemas
 
 logger = logging.getLogger("backend")
 
 
+@lru_cache(maxsize=None)
+def _get_analyze_prompt_prefix(ocsf_version: OcsfVersion, ocsf_event_name: str) -> str:
+    # The full event class and object schemas are the bulk of the prompt and are the same for every entry of the class
+    event_schema = get_ocsf_event_schema(ocsf_version, ocsf_event_name, [])
+    event_schema_simplified  = json.dumps(event_schema.to_dict(), indent=4) if event_schema else ""
+    object_schemas = get_ocsf_object_schemas(ocsf_version, ocsf_event_name, [])
+    object_schemas_simplified = json.dumps([obj.to_dict() for obj in object_schemas], indent=4)
+
+    return analyze_prompt_prefix_template.format(
+        ocsf_version=ocsf_version,
+        ocsf_event_class=get_ocsf_event_class_knowledge(ocsf_version, ocsf_event_name),
+        ocsf_event_class_schema=event_schema_simplified,
+        ocsf_object_schemas=object_schemas_simplified
+    )
+
 def get_analyze_system_prompt_factory(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Callable[[Dict[str, Any]], SystemMessage]:
     
     def factory(input_entry: str) -> SystemMessage:
-        event_schema = get_ocsf_event_schema(ocsf_version, ocsf_event_name, [])
-        event_schema_simplified  = json.dumps(event_schema.to_dict(), indent=4) if event_schema else ""
-        object_schemas = get_ocsf_object_schemas(ocsf_version, ocsf_event_name, [])
-        object_schemas_simplified = json.dumps([obj.to_dict() for obj in object_schemas], indent=4)
-
-        return SystemMessage(
-            content=analyze_prompt_template.format(
-                ocsf_version=ocsf_version,
-                ocsf_event_class=get_ocsf_event_class_knowledge(ocsf_version, ocsf_event_name),
-                ocsf_event_class_schema=event_schema_simplified,
-                ocsf_object_schemas=object_schemas_simplified,
+        return make_cacheable_system_message(
+            static_prefix=_get_analyze_prompt_prefix(ocsf_version, ocsf_event_name),
+            variable_suffix=analyze_prompt_suffix_template.format(
                 input_entry=input_entry
             )
         )
     
     return factory
 
+@lru_cache(maxsize=None)
+def _get_extract_prompt_prefix(ocsf_version: OcsfVersion, ocsf_event_name: str) -> str:
+    return extract_prompt_prefix_template.format(
+        ocsf_version=ocsf_version,
+        ocsf_event_class=get_ocsf_event_class_knowledge(ocsf_version, ocsf_event_name)
+    )
+
 def get_extract_system_prompt_factory(ocsf_version: OcsfVersion, ocsf_event_name: str) -> Callable[[Dict[str, Any]], SystemMessage]:
     
     def factory(input_entry: str, mapping_list: List[EntityMapping]) -> SystemMessage:
@@ -50,10 +67,9 @@ def get_extract_system_prompt_factory(ocsf_version: OcsfVersion, ocsf_event_name
         object_schemas_final = json.dumps([schema for schema in object_schemas_simplified if schema.get("attributes", None)], indent=4)
         logger.debug(f"OCSF object schemas provided to the LLM: {object_schemas_final}")
 
-        return SystemMessage(
-            content=extract_prompt_template.format(
-                ocsf_version=ocsf_version,
-                ocsf_event_class=get_ocsf_event_class_knowledge(ocsf_version, ocsf_event_name),
+        return make_cacheable_system_message(
+            static_prefix=_get_extract_prompt_prefix(ocsf_version, ocsf_event_name),
+            variable_suffix=extract_prompt_suffix_template.format(
                 ocsf_event_class_schema=event_schema_simplified,
                 ocsf_object_schemas=object_schemas_final,
                 input_entry=input_entry,
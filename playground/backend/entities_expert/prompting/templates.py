@@ -1,4 +1,6 @@
-analyze_prompt_template = """
+# The prompts are split into a static prefix and a variable suffix.  The prefix is identical for every entry of a given
+# OCSF event class, which lets the inference provider cache it between requests; see make_cacheable_system_message().
+analyze_prompt_prefix_template = """
 You are an AI assistant whose goal is to assist users in transforming their log and data entries into an OCSF
 normalized format.  Overall, this process requires the creation of a Transformer, which is composed of (1) a targeting
 heuristic, such as a regex, that identifies specific entries in  data stream, (2) a OCSF event class to normalize entries
@@ -61,12 +63,14 @@ If there is any grounded knowledge on this ocsf_event_class_schema, it will be p
 
 If there is any grounded knowledge on this ocsf_object_schemas, it will be provided here:
 <ocsf_object_schemas>{ocsf_object_schemas}</ocsf_object_schemas>
+"""
 
+analyze_prompt_suffix_template = """
 The input entry is:
 <input_entry>{input_entry}</input_entry>
 """
 
-extract_prompt_template = """
+extract_prompt_prefix_template = """
 You are an AI assistant whose goal is to assist users in transforming their log and data entries into an OCSF
 normalized format.  Overall, this process requires the creation of a Transformer, which is composed of (1) a targeting
 heuristic, such as a ocsf, that identifies specific entries in  data stream, (2) a OCSF event class to normalize entries
@@ -119,9 +123,20 @@ For the extraction logic you create, you MUST follow these additional guidelines
 <extraction_guidelines>
 - The extraction logic's purpose is to extract the specified portion of the input_entry and return it as a string. Do
     not change the value of the extracted portion in any way.
-- You MUST structure your extraction logic as a single, invocable function.  It MUST have the following signature:
-    `def extract(input_entry: str) -> typing.List[str]:`.  Your extraction logic will be consumed by outside mechanisms that will
-    rely on the function signature being exactly as specified.
+- You MUST structure your extraction logic as a single, invocable function.  It MUST have one of the following signatures:
+    `def extract(input_entry: str) -> typing.List[str]:` or
+    `def extract(input_entry: str, context: "ParseContext") -> typing.List[str]:`.  Your extraction logic will be consumed
+    by outside mechanisms that will rely on the function signature being exactly as specified.
+- The extraction logic for every mapping runs against the same input_entry, so the system provides a shared `context`
+    that parses the input_entry once for all of them.  If the input_entry is JSON, syslog, or key=value pairs, you SHOULD
+    use the second signature and read from the context instead of parsing the input_entry yourself.  DO NOT call
+    `json.loads()` on the input_entry when `context.json` will do.  The context has these read-only attributes, each of
+    which is None if the input_entry can't be parsed that way:
+    - `context.json`: the input_entry parsed with `json.loads()`.
+    - `context.syslog`: a dict of the input_entry's syslog header, with the keys `priority`, `timestamp`, `hostname`,
+        `app_name`, `pid`, and `message` (the text after the header).  Keys missing from the header have None values.
+    - `context.kv`: a dict of the input_entry's key=value pairs, with the quotes removed from quoted values.
+    The type hint for the context MUST be the string `"ParseContext"`, in quotes, exactly as shown above.
 - The output of the `extract()` function you create will ALWAYS a list of strings, which will later may be transformed into the
     value expected by the specific OCSF schema field by the transform logic.
 </extraction_guidelines>
@@ -149,7 +164,10 @@ If there is any grounded knowledge on this ocsf_event_class, it will be provided
 <ocsf_event_class>
 {ocsf_event_class}
 </ocsf_event_class>
+"""
 
+# The schemas are narrowed to the OCSF paths in the mapping list, so they vary between requests and belong in the suffix
+extract_prompt_suffix_template = """
 If there is any grounded knowledge on this ocsf_event_class_schema, it will be provided here:
 <ocsf_event_class_schema>
 {ocsf_event_class_schema}
@@ -3,7 +3,7 @@ import logging
 from typing import Any, Dict, List
 
 from backend.core.tasks import PlaygroundTask
-from backend.entities_expert.entities import EntityReport
+from backend.entities_expert.entities import EntityMapping, EntityReport
 from backend.entities_expert.extraction_pattern import ExtractionPattern
 
 logger = logging.getLogger("backend")
@@ -36,6 +36,7 @@ class AnalysisTask(PlaygroundTask):
 class ExtractTask(PlaygroundTask):
     input: str
     patterns: List[ExtractionPattern] = None
+    mappings: List[EntityMapping] = None # The mappings the patterns are created for, if they should be checked against them
 
     def get_work_item(self) -> Any:
         return self.patterns
@@ -53,5 +54,6 @@ class ExtractTask(PlaygroundTask):
             "task_id": self.task_id,
             "input": self.input,
             "context": [turn.to_json() for turn in self.context],
-            "patterns": [pattern.to_json() for pattern in self.patterns] if self.patterns else None
+            "patterns": [pattern.to_json() for pattern in self.patterns] if self.patterns else None,
+            "mappings": [mapping.to_json() for mapping in self.mappings] if self.mappings else None
         }
\ No newline at end of file
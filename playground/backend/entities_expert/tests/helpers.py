@@ -0,0 +1,25 @@
+from backend.entities_expert.entities import EntityMapping
+from backend.entities_expert.extraction_pattern import ExtractionPattern
+
+
+"""
+This module contains helpers shared by the tests that build ExtractionPatterns, such as those of the pattern validators
+and of the Transformers created from the patterns.
+"""
+
+DEPENDENCY_SETUP = "import json\nimport re\nimport typing"
+FIRST_VALUE_TRANSFORM_LOGIC = "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"
+
+
+def make_extract_logic(body: str) -> str:
+    return "def extract(input_entry: str) -> typing.List[str]:\n" + "\n".join(f"    {line}" for line in body.splitlines())
+
+def make_pattern(index: int, extract_logic: str, transform_logic: str = FIRST_VALUE_TRANSFORM_LOGIC, ocsf_path: str = None) -> ExtractionPattern:
+    # Each pattern is mapped to an unmapped field of its own unless given an OCSF path
+    return ExtractionPattern(
+        id=f"pattern-{index}",
+        dependency_setup=DEPENDENCY_SETUP,
+        extract_logic=extract_logic,
+        transform_logic=transform_logic,
+        mapping=EntityMapping(id=f"pattern-{index}", entities=[], ocsf_path=ocsf_path or f"unmapped.field_{index}", path_rationale="")
+    )
@@ -0,0 +1,125 @@
+import asyncio
+from typing import List
+from unittest.mock import patch
+
+from django.test import TestCase
+from langchain_core.messages import HumanMessage
+
+from backend.core.experts import ExpertBatchResult, ExpertInvocationError
+from backend.entities_expert.entities import EntityMapping
+from backend.entities_expert.extraction_pattern import ExtractionPattern
+from backend.entities_expert.expert_def import ainvoke_sharded_extraction_expert, make_extraction_shards
+from backend.entities_expert.task_def import ExtractTask
+
+
+def make_mapping(id: str, ocsf_path: str) -> EntityMapping:
+    return EntityMapping(id=id, entities=[], ocsf_path=ocsf_path, path_rationale="")
+
+def make_task(task_id: str, mappings: List[EntityMapping] = None) -> ExtractTask:
+    return ExtractTask(task_id=task_id, input="entry", context=[HumanMessage(content="Go")], patterns=None, mappings=mappings)
+
+def make_extraction_pattern(id: str) -> ExtractionPattern:
+    return ExtractionPattern(id=id, dependency_setup="", extract_logic="", transform_logic="")
+
+
+class MakeExtractionShardsTestCase(TestCase):
+    def test_groups_by_top_level_object(self):
+        # Set up test
+        mappings = [
+            make_mapping("1", "src_endpoint.ip"),
+            make_mapping("2", "user.name"),
+            make_mapping("3", "src_endpoint.port"),
+            make_mapping("4", "time"),
+        ]
+
+        # Run our test
+        shards = make_extraction_shards(mappings, max_mappings=2)
+
+        # Check our results
+        self.assertEqual([["1", "3"], ["2", "4"]], [[mapping.id for mapping in shard] for shard in shards])
+
+    def test_splits_large_groups(self):
+        # Set up test
+        mappings = [make_mapping(str(i), f"actor.user.field_{i}") for i in range(5)]
+
+        # Run our test
+        shards = make_extraction_shards(mappings, max_mappings=2)
+
+        # Check our results
+        self.assertEqual([2, 2, 1], [len(shard) for shard in shards])
+
+    def test_no_mappings(self):
+        self.assertEqual([], make_extraction_shards([]))
+
+class AinvokeShardedExtractionExpertTestCase(TestCase):
+    def test_retries_only_failed_shards(self):
+        # Set up test
+        calls = []
+        async def fake_batch(expert, tasks: List[ExtractTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+            calls.append(([task.task_id for task in tasks], bypass_cache, [len(task.context) for task in tasks]))
+            results = []
+            for task in tasks:
+                task.context.append(HumanMessage(content="Response"))
+                if task.task_id == "shard-1" and len(calls) == 1:
+                    results.append(ExpertBatchResult(task=task, error=ExpertInvocationError("Malformed")))
+                else:
+                    task.patterns = []
+                    results.append(ExpertBatchResult(task=task))
+            return results
+
+        # Run our test
+        with patch("backend.entities_expert.expert_def.ainvoke_expert_batch", fake_batch):
+            results = asyncio.run(ainvoke_sharded_extraction_expert(None, [make_task("shard-0"), make_task("shard-1")]))
+
+        # Check our results
+        self.assertEqual([(["shard-0", "shard-1"], False, [1, 1]), (["shard-1"], True, [1])], calls)
+        self.assertTrue(all(result.error is None for result in results))
+        self.assertEqual(["shard-0", "shard-1"], [result.task.task_id for result in results])
+
+    def test_gives_up_after_max_retries(self):
+        # Set up test
+        async def fake_batch(expert, tasks: List[ExtractTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+            return [ExpertBatchResult(task=task, error=ExpertInvocationError("Malformed")) for task in tasks]
+
+        # Run our test
+        with patch("backend.entities_expert.expert_def.ainvoke_expert_batch", fake_batch):
+            results = asyncio.run(ainvoke_sharded_extraction_expert(None, [make_task("shard-0")], max_retries=1))
+
+        # Check our results
+        self.assertIsInstance(results[0].error, ExpertInvocationError)
+
+    def test_retries_shards_with_unknown_mapping_ids(self):
+        # Set up test
+        calls = []
+        async def fake_batch(expert, tasks: List[ExtractTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+            calls.append([task.task_id for task in tasks])
+            for task in tasks:
+                mapping_id = "unknown" if task.task_id == "shard-1" and len(calls) == 1 else task.mappings[0].id
+                task.patterns = [make_extraction_pattern(mapping_id)]
+            return [ExpertBatchResult(task=task) for task in tasks]
+
+        tasks = [make_task("shard-0", [make_mapping("0", "user.name")]), make_task("shard-1", [make_mapping("1", "time")])]
+
+        # Run our test
+        with patch("backend.entities_expert.expert_def.ainvoke_expert_batch", fake_batch):
+            results = asyncio.run(ainvoke_sharded_extraction_expert(None, tasks))
+
+        # Check our results
+        self.assertEqual([["shard-0", "shard-1"], ["shard-1"]], calls)
+        self.assertTrue(all(result.error is None for result in results))
+        self.assertEqual(["1"], [pattern.id for pattern in results[1].task.patterns])
+
+    def test_unknown_mapping_ids_fail_the_shard(self):
+        # Set up test
+        async def fake_batch(expert, tasks: List[ExtractTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+            for task in tasks:
+                task.patterns = [make_extraction_pattern("unknown")]
+            return [ExpertBatchResult(task=task) for task in tasks]
+
+        # Run our test
+        with patch("backend.entities_expert.expert_def.ainvoke_expert_batch", fake_batch):
+            results = asyncio.run(ainvoke_sharded_extraction_expert(None, [make_task("shard-0", [make_mapping("0", "user.name")])], max_retries=1))
+
+        # Check our results
+        self.assertIsInstance(results[0].error, ExpertInvocationError)
+        self.assertIn("unknown", str(results[0].error))
@@ -0,0 +1,45 @@
+from django.test import TestCase
+
+from backend.entities_expert.parse_context import extract_accepts_parse_context, load_parse_context_class
+
+
+class ParseContextTestCase(TestCase):
+    def setUp(self):
+        self.ParseContext = load_parse_context_class()
+
+    def test_json(self):
+        # Run our test
+        context = self.ParseContext('{"user": {"name": "alice"}}')
+
+        # Check our results
+        self.assertEqual("alice", context.json["user"]["name"])
+        self.assertIs(context.json, context.json)
+        self.assertIsNone(self.ParseContext("not json").json)
+
+    def test_syslog(self):
+        # Run our test
+        bsd = self.ParseContext("<34>Mar 12 07:40:57 host sshd[4351]: Failed password for guest").syslog
+        ietf = self.ParseContext("<34>1 2025-03-12T07:40:57.003Z host sshd 4351 ID47 - Failed password for guest").syslog
+
+        # Check our results
+        for header in [bsd, ietf]:
+            self.assertEqual("34", header["priority"])
+            self.assertEqual("host", header["hostname"])
+            self.assertEqual("sshd", header["app_name"])
+            self.assertEqual("4351", header["pid"])
+            self.assertEqual("Failed password for guest", header["message"])
+        self.assertEqual("Mar 12 07:40:57", bsd["timestamp"])
+        self.assertIsNone(self.ParseContext("not syslog").syslog)
+
+    def test_kv(self):
+        # Run our test
+        pairs = self.ParseContext('devname="fw 01" srcip=10.0.0.1, action=\'deny\' empty= srcip=10.0.0.2').kv
+
+        # Check our results
+        self.assertEqual({"devname": "fw 01", "srcip": "10.0.0.2", "action": "deny", "empty": ""}, pairs)
+
+class ExtractAcceptsParseContextTestCase(TestCase):
+    def test_detects_second_parameter(self):
+        self.assertTrue(extract_accepts_parse_context('def extract(input_entry: str, context: "ParseContext") -> typing.List[str]:\n    return []'))
+        self.assertFalse(extract_accepts_parse_context("def extract(input_entry: str) -> typing.List[str]:\n    return []"))
+        self.assertFalse(extract_accepts_parse_context("def extract(input_entry: str"))
@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from backend.entities_expert.extraction_pattern import ExtractionPattern
+from backend.core.sandbox import SandboxPool, configure_sandbox_pool, get_sandbox_pool
+from backend.entities_expert.tests.helpers import make_extract_logic, make_pattern
+from backend.entities_expert.validators import get_pattern_report_cache, validate_python_extraction_patterns
+
+
+ENTRY = "user=alice"
+
+def make_user_pattern(group: str) -> ExtractionPattern:
+    return make_pattern(0, make_extract_logic(f"return re.findall(r'user=({group})', input_entry)"))
+
+
+class ValidatePythonExtractionPatternsTestCase(TestCase):
+    def setUp(self):
+        get_pattern_report_cache().clear()
+
+    def test_reuses_reports_of_unchanged_patterns(self):
+        # Set up test
+        first = validate_python_extraction_patterns(ENTRY, [make_user_pattern(r"\w+")])[0]
+        first.validation_report.report_entries.append("Modified by the caller")
+
+        # Run our test
+        second = validate_python_extraction_patterns(ENTRY, [make_user_pattern(r"\w+")])[0]
+
+        # Check our results
+        self.assertTrue(second.validation_report.passed)
+        self.assertEqual(first.validation_report.report_entries[:-1], second.validation_report.report_entries)
+        self.assertIsNot(first.validation_report, second.validation_report)
+
+    def test_revalidates_edited_patterns(self):
+        # Set up test
+        validate_python_extraction_patterns(ENTRY, [make_user_pattern(r"\w+")])
+
+        # Run our test
+        edited = validate_python_extraction_patterns(ENTRY, [make_user_pattern(r"\d+")])[0]
+
+        # Check our results
+        self.assertFalse(edited.validation_report.passed)
+
+    def test_passes_parse_context_to_extract_logic(self):
+        # Set up test
+        pattern = make_user_pattern(r"\w+")
+        pattern.extract_logic = 'def extract(input_entry: str, context: "ParseContext") -> typing.List[str]:\n    return [context.kv["user"]]'
+
+        # Run our test
+        validated = validate_python_extraction_patterns(ENTRY, [pattern])[0]
+
+        # Check our results
+        self.assertTrue(validated.validation_report.passed)
+        self.assertEqual(["alice"], validated.validation_report.output["extract_output"])
+
+
+    def test_validates_patterns_concurrently_within_budget(self):
+        # Set up test
+        slow_patterns = []
+        for seconds in ["0.4", "0.4", "0.4", "3"]:
+            pattern = make_user_pattern(r"\w+")
+            pattern.dependency_setup += "\nimport time"
+            pattern.extract_logic = f"def extract(input_entry: str) -> typing.List[str]:\n    time.sleep({seconds})\n    return re.findall(r'user=(\\w+)', input_entry)"
+            slow_patterns.append(pattern)
+
+        # Run our test
+        validated = validate_python_extraction_patterns(ENTRY, slow_patterns + [make_user_pattern(r"\w+")], time_budget_seconds=1.0)
+
+        # Check our results
+        self.assertEqual([True, True, True, False, True], [pattern.validation_report.passed for pattern in validated])
+        self.assertIn("Error: Timed out after 1.0 seconds", validated[3].validation_report.report_entries)
+        self.assertIsNot(validated[0].validation_report, validated[1].validation_report)
+        self.assertIsNone(get_pattern_report_cache().get(get_pattern_report_cache().make_key(ENTRY, slow_patterns[3])))
+
+    def test_budget_starts_when_validation_starts(self):
+        # Set up test
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=False)
+        patterns = []
+        for seconds in ["0.1", "0.1", "4"]:
+            pattern = make_user_pattern(r"\w+")
+            pattern.dependency_setup += "\nimport time"
+            pattern.extract_logic = f"def extract(input_entry: str) -> typing.List[str]:\n    time.sleep({seconds})\n    return re.findall(r'user=(\\w+)', input_entry)"
+            patterns.append(pattern)
+
+        # Run our test
+        with patch("backend.entities_expert.validators.PATTERN_VALIDATION_EXECUTOR", executor):
+            validated = validate_python_extraction_patterns(ENTRY, patterns + [make_user_pattern(r"\w+")], time_budget_seconds=2.0)
+
+        # Check our results
+        self.assertEqual([True, True, False, False], [pattern.validation_report.passed for pattern in validated])
+        self.assertIn("Error: Timed out after 2.0 seconds", validated[2].validation_report.report_entries)
+        self.assertIn("Error: Waited 2.0 seconds for a free validator", validated[3].validation_report.report_entries)
+
+class SandboxedValidationTestCase(TestCase):
+    def setUp(self):
+        get_pattern_report_cache().clear()
+        self.configured_pool = get_sandbox_pool()
+        self.pool = SandboxPool(max_workers=1, timeout_seconds=1.0, cpu_time_seconds=None)
+        configure_sandbox_pool(self.pool)
+
+    def tearDown(self):
+        configure_sandbox_pool(self.configured_pool)
+        self.pool.shutdown()
+
+    def test_runaway_logic_is_stopped(self):
+        # Set up test
+        runaway = make_user_pattern(r"\w+")
+        runaway.extract_logic = "def extract(input_entry: str) -> typing.List[str]:\n    while True:\n        pass"
+
+        # Run our test
+        validated = validate_python_extraction_patterns(ENTRY, [runaway, make_user_pattern(r"\w+")])
+
+        # Check our results
+        self.assertFalse(validated[0].validation_report.passed)
+        self.assertIn("Error: The code did not finish within 1.0 seconds and was stopped", validated[0].validation_report.report_entries)
+        self.assertTrue(validated[1].validation_report.passed)
+        self.assertEqual(["alice"], validated[1].validation_report.output["extract_output"])
+
+    def test_stopped_logic_is_not_cached(self):
+        # Set up test
+        slow = make_user_pattern(r"\w+")
+        slow.dependency_setup += "\nimport time"
+        slow.extract_logic = "def extract(input_entry: str) -> typing.List[str]:\n    time.sleep(2)\n    return re.findall(r'user=(\\w+)', input_entry)"
+        greedy = make_user_pattern(r"\w+")
+        greedy.extract_logic = "def extract(input_entry: str) -> typing.List[str]:\n    return [input_entry * (1024 * 1024 * 1024)]"
+        stopped_reports = [pattern.validation_report for pattern in validate_python_extraction_patterns(ENTRY, [slow, greedy])]
+
+        # Run our test
+        configure_sandbox_pool(SandboxPool(max_workers=1, timeout_seconds=10.0, cpu_time_seconds=None, memory_bytes=None))
+        validated = validate_python_extraction_patterns(ENTRY, [slow])
+
+        # Check our results
+        self.assertIn("Error: The code did not finish within 1.0 seconds and was stopped", stopped_reports[0].report_entries)
+        self.assertIn("Error: The code used more memory than it is allowed and was stopped", stopped_reports[1].report_entries)
+        self.assertTrue(validated[0].validation_report.passed)
+        self.assertIsNone(get_pattern_report_cache().get(get_pattern_report_cache().make_key(ENTRY, greedy)))
@@ -75,7 +75,7 @@ def get_extract_tool_bundle(ocsf_version: OcsfVersion) -> ToolBundle:
 class PythonExtractionPatternInput(BaseModel):
     """The Python extraction pattern for a single mapping of the input data entry to a specific OCSF schema path"""
     id: str = Field(description="The unique identifier for the mapping the pattern is associated with.  It MUST be the EXACT SAME as the mapping's identifier.")
-    extract_logic: str = Field(description="The executable code that performs the extraction.  It MUST be a single function with the signature `def extract(input_entry: str) -> str:`.")
+    extract_logic: str = Field(description="The executable code that performs the extraction.  It MUST be a single function with the signature `def extract(input_entry: str) -> str:`, or `def extract(input_entry: str, context: \"ParseContext\") -> str:` to read the shared parse context of the input entry.")
     transform_logic: str = Field(description="The executable code that performs the transformation.  It MUST be a single function with the signature `def transform(extracted_value: str) -> str:`.")
     
 
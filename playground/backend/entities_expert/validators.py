@@ -1,16 +1,28 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import copy
+import hashlib
 import json
 import logging
-from types import ModuleType
-from typing import Callable, List
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
 
 from backend.entities_expert.extraction_pattern import ExtractionPattern
+from backend.entities_expert.parse_context import extract_accepts_parse_context, load_parse_context_class
+from backend.core.code_cache import get_python_code_cache
+from backend.core.sandbox import SandboxCpuTimeExceededError, SandboxError, SandboxPool, get_sandbox_pool
 from backend.core.validation_report import ValidationReport
 from backend.core.validators import PythonLogicInvalidSyntaxError, PythonLogicNotInModuleError, PythonLogicNotExecutableError
 
 
 logger = logging.getLogger("backend")
 
+DEFAULT_PATTERN_REPORT_CACHE_MAX_ENTRIES = 1024
+DEFAULT_PATTERN_VALIDATION_MAX_WORKERS = 8
+DEFAULT_PATTERN_VALIDATION_TIME_BUDGET_SECONDS = 30.0
+
 
 class ExtractionPatternValidatorBase(ABC):
     def __init__(self, input_entry: str, pattern: ExtractionPattern):
@@ -32,10 +44,13 @@ class ExtractionPatternValidatorBase(ABC):
         
         return extract_logic
     
+    def _invoke_extract_logic(self, extract_logic: Callable[[str], str], input_entry: str) -> List[str]:
+        return extract_logic(input_entry)
+
     def _try_invoke_extract_logic(self, extract_logic: Callable[[str], str], report: ValidationReport) -> str:
         try:
             report.append_entry("Attempting to invoke the extract logic against the input...", logger.info)
-            output = extract_logic(report.input)
+            output = self._invoke_extract_logic(extract_logic, report.input)
             report.output["extract_output"] = output
             report.append_entry("Invoked the extract logic without exceptions", logger.info)
         except Exception as e:
@@ -116,6 +131,9 @@ class ExtractionPatternValidatorBase(ABC):
             transform_output = self._try_invoke_transform_logic(transform_logic, extract_output, report)
             self._try_validate_transform_output(self.input_entry, self.pattern, extract_output, transform_output, report)
             report.passed = True
+        except (SandboxCpuTimeExceededError, MemoryError):
+            # The logic ran out of what it's allowed rather than failing; leave it to the caller to report
+            raise
         except Exception as e:
             report.passed = False
             report.append_entry(f"Error: {str(e)}", logger.error)
@@ -126,11 +144,16 @@ class ExtractionPatternValidatorBase(ABC):
         return report
 
 class PythonExtractionPatternValidator(ExtractionPatternValidatorBase):
+    def _invoke_extract_logic(self, extract_logic: Callable[[str], str], input_entry: str) -> List[str]:
+        # Pass the parse context the same way the generated transformer does, if the extract logic accepts it
+        if extract_accepts_parse_context(self.pattern.extract_logic):
+            return extract_logic(input_entry, load_parse_context_class()(input_entry))
+        return extract_logic(input_entry)
+
     def _load_extract_logic(self, pattern: ExtractionPattern) -> Callable[[str], str]:
         # Take the raw logic and attempt to load it into an executable form
         try:
-            extract_module = ModuleType("extract")
-            exec(f"{pattern.dependency_setup}\n\n{pattern.extract_logic}", extract_module.__dict__)
+            extract_module = get_python_code_cache().load_module("extract", f"{pattern.dependency_setup}\n\n{pattern.extract_logic}")
         except SyntaxError as e:
             raise PythonLogicInvalidSyntaxError(f"Syntax error in the extract logic: {str(e)}")
 
@@ -146,8 +169,7 @@ class PythonExtractionPatternValidator(ExtractionPatternValidatorBase):
     def _load_transform_logic(self, pattern: ExtractionPattern) -> Callable[[str], str]:
         # Take the raw logic and attempt to load it into an executable form
         try:
-            transform_module = ModuleType("transform")
-            exec(f"{pattern.dependency_setup}\n\n{pattern.transform_logic}", transform_module.__dict__)
+            transform_module = get_python_code_cache().load_module("transform", f"{pattern.dependency_setup}\n\n{pattern.transform_logic}")
         except SyntaxError as e:
             raise PythonLogicInvalidSyntaxError(f"Syntax error in the transform logic: {str(e)}")
 
@@ -158,4 +180,179 @@ class PythonExtractionPatternValidator(ExtractionPatternValidatorBase):
         if not callable(transform_module.transform):
             raise PythonLogicNotExecutableError("The 'transform' attribute must be an executable function")
         
-        return transform_module.transform
\ No newline at end of file
+        return transform_module.transform
+
+
+class PatternReportCache:
+    """
+    A bounded cache of the validation reports of extraction patterns, keyed by a hash of the input entry and the
+    pattern's logic.  When one pattern of many is edited, only that pattern needs to be validated again.
+    """
+    def __init__(self, max_entries: int = DEFAULT_PATTERN_REPORT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._reports: OrderedDict[str, ValidationReport] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(input_entry: str, pattern: ExtractionPattern) -> str:
+        key_parts = [type(pattern).__name__, input_entry, pattern.dependency_setup, pattern.extract_logic, pattern.transform_logic]
+        return hashlib.sha256("\0".join(key_parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> ValidationReport:
+        with self._lock:
+            report = self._reports.get(key)
+            if report is None:
+                return None
+            self._reports.move_to_end(key)
+
+        # Callers may modify the report they're given, so never hand out the cached copy itself
+        return copy.deepcopy(report)
+
+    def put(self, key: str, report: ValidationReport):
+        with self._lock:
+            self._reports[key] = copy.deepcopy(report)
+            self._reports.move_to_end(key)
+            while len(self._reports) > self.max_entries:
+                self._reports.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+
+
+PATTERN_REPORT_CACHE = PatternReportCache()
+
+def get_pattern_report_cache() -> PatternReportCache:
+    return PATTERN_REPORT_CACHE
+
+# Shared by all requests, so the number of patterns being validated at once is bounded across the whole process
+PATTERN_VALIDATION_EXECUTOR = ThreadPoolExecutor(max_workers=DEFAULT_PATTERN_VALIDATION_MAX_WORKERS, thread_name_prefix="pattern-validation")
+
+def get_pattern_validation_executor() -> ThreadPoolExecutor:
+    return PATTERN_VALIDATION_EXECUTOR
+
+def _make_unfinished_report(input_entry: str, reason: str, error: str) -> ValidationReport:
+    report = ValidationReport(
+        input=input_entry,
+        output=dict(),
+        report_entries=[],
+        passed=False
+    )
+    report.append_entry(reason, logger.error)
+    report.append_entry(f"Error: {error}", logger.error)
+    return report
+
+def validate_python_extraction_pattern(input_entry: str, pattern: ExtractionPattern) -> ValidationReport:
+    return PythonExtractionPatternValidator(input_entry=input_entry, pattern=pattern).validate()
+
+def _validate_python_extraction_pattern_in_sandbox(sandbox_pool: SandboxPool, input_entry: str, pattern: ExtractionPattern) -> Tuple[ValidationReport, bool]:
+    # Returns the report, and whether it may be cached
+    try:
+        return sandbox_pool.run(validate_python_extraction_pattern, input_entry, pattern), True
+    except SandboxError as e:
+        # The validator reports any error in the pattern's logic itself; this is the sandbox stopping the logic.  Whether
+        # it's stopped depends on the sandbox's limits as much as on the logic, so the report isn't cached.
+        return _make_unfinished_report(input_entry, "The extraction pattern was stopped before its validation could finish", str(e)), False
+    except MemoryError:
+        return _make_unfinished_report(input_entry, "The extraction pattern was stopped before its validation could finish", "The code used more memory than it is allowed and was stopped"), False
+
+def _validate_uncached_python_extraction_pattern(input_entry: str, pattern: ExtractionPattern) -> Tuple[ValidationReport, bool]:
+    sandbox_pool = get_sandbox_pool()
+    if sandbox_pool is not None:
+        return _validate_python_extraction_pattern_in_sandbox(sandbox_pool, input_entry, pattern)
+
+    try:
+        return validate_python_extraction_pattern(input_entry, pattern), True
+    except MemoryError:
+        return _make_unfinished_report(input_entry, "The extraction pattern validation could not finish", "The code ran out of memory"), False
+
+def validate_python_extraction_patterns(input_entry: str, patterns: List[ExtractionPattern],
+                                        time_budget_seconds: Optional[float] = DEFAULT_PATTERN_VALIDATION_TIME_BUDGET_SECONDS) -> List[ExtractionPattern]:
+    """
+    Validates each pattern against the input entry, reusing the reports of patterns whose logic has not changed since
+    they were last validated against the same input.  The other patterns are validated concurrently, in a sandbox if
+    one is configured.  Each pattern's validation may run for the time budget (None for no limit) from when it starts,
+    and may wait as long for a free validator before it starts; a pattern that runs out of either fails with a report
+    saying which.  Without a sandbox, logic that runs too long keeps running in the background until it finishes.
+    """
+    report_cache = get_pattern_report_cache()
+    executor = get_pattern_validation_executor()
+
+    # The validators are shared with other requests, so a pattern's budget starts when its validation does
+    submitted_at = time.monotonic()
+    started_at: Dict[str, float] = dict()
+
+    def validate_uncached(key: str, pattern: ExtractionPattern) -> Tuple[ValidationReport, bool]:
+        started_at.setdefault(key, time.monotonic())
+        return _validate_uncached_python_extraction_pattern(input_entry, pattern)
+
+    # Start validating each distinct pattern that doesn't have a cached report
+    keys = [report_cache.make_key(input_entry, pattern) for pattern in patterns]
+    reports: Dict[str, ValidationReport] = dict()
+    futures: Dict[str, Future] = dict()
+    for key, pattern in zip(keys, patterns):
+        if key in reports or key in futures:
+            continue
+
+        report = report_cache.get(key)
+        if report is None:
+            futures[key] = executor.submit(validate_uncached, key, pattern)
+        else:
+            logger.debug(f"Reusing the validation report for unchanged extraction pattern {pattern.id}")
+            reports[key] = report
+
+    # Collect the reports as they finish, giving up on each pattern once it has used up its budget
+    pending = dict(futures)
+    while pending:
+        for key, future in list(pending.items()):
+            if future.done():
+                del pending[key]
+                reports[key], cacheable = future.result()
+                if cacheable:
+                    report_cache.put(key, reports[key])
+        if not pending:
+            break
+
+        if time_budget_seconds is None:
+            wait(pending.values(), return_when=FIRST_COMPLETED)
+            continue
+
+        now = time.monotonic()
+        deadlines = dict()
+        for key, future in list(pending.items()):
+            if key in started_at:
+                if started_at[key] + time_budget_seconds > now:
+                    deadlines[key] = started_at[key] + time_budget_seconds
+                    continue
+
+                del pending[key]
+                logger.warning(f"Extraction pattern validation did not finish within the time budget of {time_budget_seconds} seconds")
+                reports[key] = _make_unfinished_report(
+                    input_entry,
+                    "The extraction pattern validation did not finish in time",
+                    f"Timed out after {time_budget_seconds} seconds"
+                )
+            elif submitted_at + time_budget_seconds > now:
+                deadlines[key] = submitted_at + time_budget_seconds
+            elif future.cancel():
+                del pending[key]
+                logger.warning(f"Extraction pattern validation did not start within {time_budget_seconds} seconds")
+                reports[key] = _make_unfinished_report(
+                    input_entry,
+                    "The extraction pattern validation could not start in time because the validators were busy",
+                    f"Waited {time_budget_seconds} seconds for a free validator"
+                )
+            else:
+                # It has only just started, and gets its full budget
+                deadlines[key] = started_at.setdefault(key, now) + time_budget_seconds
+
+        if pending:
+            wait(pending.values(), timeout=max(0, min(deadlines.values()) - now), return_when=FIRST_COMPLETED)
+
+    # Patterns with the same logic get their own copies of the report, so callers can modify each independently
+    assigned_keys = set()
+    for key, pattern in zip(keys, patterns):
+        pattern.validation_report = copy.deepcopy(reports[key]) if key in assigned_keys else reports[key]
+        assigned_keys.add(key)
+
+    return patterns
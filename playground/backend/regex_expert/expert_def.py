@@ -1,27 +1,31 @@
 from dataclasses import dataclass
 import logging
 
-from langchain_aws import ChatBedrockConverse
-
 from backend.regex_expert.parameters import RegexFlavor
 from backend.regex_expert.prompting import get_system_prompt_factory
 from backend.regex_expert.tool_def import get_tool_bundle
 from backend.regex_expert.task_def import RegexTask
 
-from backend.core.experts import DEFULT_BOTO_CONFIG, Expert, invoke_expert
+from backend.core.experts import Expert, ainvoke_expert, get_expert_registry, get_llm, invoke_expert
 
 
 logger = logging.getLogger("backend")
 
 
 def get_regex_expert(regex_flavor: RegexFlavor) -> Expert:
+    return get_expert_registry().get_or_create(
+        ("regex", regex_flavor),
+        lambda: _build_regex_expert(regex_flavor)
+    )
+
+def _build_regex_expert(regex_flavor: RegexFlavor) -> Expert:
     logger.info(f"Building expert for: {regex_flavor}")
 
     # Get the tool bundle for the given transform language
     tool_bundle = get_tool_bundle(regex_flavor)
 
-    # Define our Bedrock LLM and attach the tools to it
-    llm = ChatBedrockConverse(
+    # Define our LLM and attach the tools to it
+    llm = get_llm(
         model="us.anthropic.claude-3-7-sonnet-20250219-v1:0", 
         temperature=0, # Suitable for straightforward, practical code generation
         max_tokens=16000,
@@ -30,8 +34,7 @@ def get_regex_expert(regex_flavor: RegexFlavor) -> Expert:
             "thinking": {
                 "type": "disabled"
             }
-        },
-        config=DEFULT_BOTO_CONFIG
+        }
     )
     llm_w_tools = llm.bind_tools(tool_bundle.to_list())
 
@@ -40,12 +43,20 @@ def get_regex_expert(regex_flavor: RegexFlavor) -> Expert:
         system_prompt_factory=get_system_prompt_factory(
             regex_flavor=regex_flavor
         ),
-        tools=tool_bundle
+        tools=tool_bundle,
+        name="regex"
     )
 
-def invoke_regex_expert(expert: Expert, task: RegexTask) -> RegexTask:
+def invoke_regex_expert(expert: Expert, task: RegexTask, bypass_cache: bool = False) -> RegexTask:
+    logger.info(f"Invoking the Regex Expert for task_id: {task.task_id}")
+    invoke_expert(expert, task, bypass_cache=bypass_cache)
+    logger.info(f"Regex created for task_id: {task.task_id}")
+
+    return task
+
+async def ainvoke_regex_expert(expert: Expert, task: RegexTask, bypass_cache: bool = False) -> RegexTask:
     logger.info(f"Invoking the Regex Expert for task_id: {task.task_id}")
-    invoke_expert(expert, task)
+    await ainvoke_expert(expert, task, bypass_cache=bypass_cache)
     logger.info(f"Regex created for task_id: {task.task_id}")
 
     return task
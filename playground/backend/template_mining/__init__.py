@@ -0,0 +1 @@
+# Intentionally empty... for now
\ No newline at end of file
@@ -0,0 +1,185 @@
+from dataclasses import dataclass, field
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains an implementation of Drain (He et al., "Drain: An Online Log Parsing Approach with Fixed Depth
+Tree", ICWS 2017), which groups the entries of a log corpus into templates in a single streaming pass.  Each entry is
+tokenized and routed through a fixed-depth parse tree, first by its token count and then by its leading tokens, to a
+small list of candidate clusters; it joins the most similar candidate (updating that cluster's template, where differing
+tokens become wildcards) or starts a new cluster.  Because most corpora are made of a few dozen templates, the experts
+can then be run once per template rather than once per entry.
+"""
+
+WILDCARD = "<*>"
+
+# Values that are almost always variable, masked before parsing so they don't split otherwise-identical entries
+DEFAULT_MASKS: List[Pattern] = [
+    re.compile(r"(?<![\w.:])(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?(?![\w.:])"), # IPv4 address, optionally with a port
+    re.compile(r"(?<![\w.])0x[0-9a-fA-F]+(?![\w.])"), # Hex number
+    re.compile(r"(?<![\w.])[-+]?\d+(?:\.\d+)?(?![\w.])"), # Decimal number
+]
+
+DEFAULT_DEPTH = 4
+DEFAULT_SIMILARITY_THRESHOLD = 0.4
+DEFAULT_MAX_CHILDREN = 100
+DEFAULT_MAX_SAMPLES = 3
+
+
+@dataclass
+class LogCluster:
+    cluster_id: int
+    template_tokens: List[str]
+    size: int = 0
+    samples: List[str] = field(default_factory=list) # The first entries that joined the cluster
+
+    def get_template(self) -> str:
+        return " ".join(self.template_tokens)
+
+    def get_variable_positions(self) -> List[int]:
+        """
+        Returns the indices of the template's tokens that vary between the cluster's entries.
+        """
+        return [index for index, token in enumerate(self.template_tokens) if token == WILDCARD]
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "cluster_id": self.cluster_id,
+            "template": self.get_template(),
+            "size": self.size,
+            "variable_positions": self.get_variable_positions(),
+            "samples": self.samples
+        }
+
+@dataclass
+class _TreeNode:
+    children: Dict[str, '_TreeNode'] = field(default_factory=dict)
+    clusters: List[LogCluster] = field(default_factory=list) # Only populated on leaf nodes
+
+
+class DrainParser:
+    def __init__(self, depth: int = DEFAULT_DEPTH, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 max_children: int = DEFAULT_MAX_CHILDREN, max_samples: int = DEFAULT_MAX_SAMPLES,
+                 masks: Optional[Sequence[Pattern]] = None, extra_delimiters: Sequence[str] = ()):
+        """
+        Creates a parser.  The depth counts the root and the token-count layer, so a depth of 4 routes entries on their
+        first two tokens.  An entry joins a cluster when at least similarity_threshold of its tokens equal the
+        cluster's template.  At most max_children distinct tokens are routed on at each internal node; entries whose
+        token would exceed that share a wildcard branch.
+        """
+        if depth < 3:
+            raise ValueError("The depth of the parse tree must be at least 3")
+
+        self.depth = depth
+        self.similarity_threshold = similarity_threshold
+        self.max_children = max_children
+        self.max_samples = max_samples
+        self.masks = list(DEFAULT_MASKS if masks is None else masks)
+        self.extra_delimiters = list(extra_delimiters)
+
+        self._root = _TreeNode()
+        self._clusters: List[LogCluster] = []
+        self.total_entries = 0
+
+    def tokenize(self, entry: str) -> List[str]:
+        for mask in self.masks:
+            entry = mask.sub(WILDCARD, entry)
+        for delimiter in self.extra_delimiters:
+            entry = entry.replace(delimiter, " ")
+        return entry.split()
+
+    def add_entry(self, entry: str) -> LogCluster:
+        """
+        Adds the entry to the most similar existing cluster, or to a new one, and returns that cluster.
+        """
+        tokens = self.tokenize(entry)
+        self.total_entries += 1
+
+        leaf = self._get_leaf(tokens)
+        cluster = self._find_most_similar(leaf.clusters, tokens)
+
+        if cluster is None:
+            cluster = LogCluster(cluster_id=len(self._clusters) + 1, template_tokens=tokens)
+            leaf.clusters.append(cluster)
+            self._clusters.append(cluster)
+        else:
+            cluster.template_tokens = [
+                template_token if template_token == token else WILDCARD
+                for template_token, token in zip(cluster.template_tokens, tokens)
+            ]
+
+        cluster.size += 1
+        if len(cluster.samples) < self.max_samples:
+            cluster.samples.append(entry)
+
+        return cluster
+
+    def add_entries(self, entries: Iterable[str]) -> 'DrainParser':
+        """
+        Adds each non-blank entry in turn.  The entries are consumed lazily, so the corpus can be streamed.
+        """
+        for entry in entries:
+            entry = entry.rstrip("\r\n")
+            if entry.strip():
+                self.add_entry(entry)
+        return self
+
+    def get_clusters(self) -> List[LogCluster]:
+        """
+        Returns the clusters, largest first.
+        """
+        return sorted(self._clusters, key=lambda cluster: (-cluster.size, cluster.cluster_id))
+
+    def _get_leaf(self, tokens: List[str]) -> _TreeNode:
+        # The first layer below the root splits on the number of tokens, which every entry of a template shares
+        node = self._root.children.setdefault(str(len(tokens)), _TreeNode())
+
+        # The next layers split on the leading tokens.  Tokens containing digits are likely to be variables, so they
+        # are routed down a shared wildcard branch rather than each creating a branch of their own.
+        for token in tokens[:self.depth - 2]:
+            key = WILDCARD if any(char.isdigit() for char in token) else token
+            if key not in node.children and len(node.children) >= self.max_children - 1:
+                key = WILDCARD # The last slot is reserved for the shared wildcard branch
+            node = node.children.setdefault(key, _TreeNode())
+
+        return node
+
+    def _find_most_similar(self, clusters: List[LogCluster], tokens: List[str]) -> Optional[LogCluster]:
+        best_cluster = None
+        best_similarity = -1.0
+        best_wildcards = -1
+
+        for cluster in clusters:
+            similarity, wildcards = self._get_similarity(cluster.template_tokens, tokens)
+            # Prefer the most similar template; on a tie, the more general one
+            if similarity > best_similarity or (similarity == best_similarity and wildcards > best_wildcards):
+                best_cluster, best_similarity, best_wildcards = cluster, similarity, wildcards
+
+        if best_cluster is not None and best_similarity >= self.similarity_threshold:
+            return best_cluster
+        return None
+
+    def _get_similarity(self, template_tokens: List[str], tokens: List[str]) -> Tuple[float, int]:
+        if not tokens:
+            return 1.0, 0
+
+        matches = 0
+        wildcards = 0
+        for template_token, token in zip(template_tokens, tokens):
+            if template_token == WILDCARD:
+                wildcards += 1
+            elif template_token == token:
+                matches += 1
+
+        return matches / len(tokens), wildcards
+
+
+def mine_templates(entries: Iterable[str], **parser_args) -> DrainParser:
+    """
+    Streams the entries through a new DrainParser and returns it.
+    """
+    return DrainParser(**parser_args).add_entries(entries)
@@ -0,0 +1,69 @@
+from django.test import TestCase
+
+from backend.template_mining.drain import DrainParser, WILDCARD, mine_templates
+
+
+class DrainParserTestCase(TestCase):
+    def test_groups_entries_by_template(self):
+        # Set up test
+        entries = [
+            "Failed password for root from 10.0.0.1 port 22 ssh2",
+            "Failed password for admin from 10.0.0.2 port 2222 ssh2",
+            "Accepted publickey for deploy from 10.0.0.3 port 22 ssh2",
+            "Failed password for guest from 192.168.1.7 port 22 ssh2",
+            "Connection closed by 10.0.0.4 port 51234",
+        ]
+
+        # Run our test
+        parser = mine_templates(entries)
+        clusters = parser.get_clusters()
+
+        # Check our results
+        self.assertEqual(5, parser.total_entries)
+        self.assertEqual(3, len(clusters))
+        self.assertEqual(f"Failed password for {WILDCARD} from {WILDCARD} port {WILDCARD} ssh2", clusters[0].get_template())
+        self.assertEqual(3, clusters[0].size)
+        self.assertEqual([3, 5, 7], clusters[0].get_variable_positions())
+
+    def test_caps_samples(self):
+        # Set up test
+        entries = [f"job {i} finished" for i in range(10)]
+
+        # Run our test
+        clusters = mine_templates(entries, max_samples=2).get_clusters()
+
+        # Check our results
+        self.assertEqual(1, len(clusters))
+        self.assertEqual(10, clusters[0].size)
+        self.assertEqual(["job 0 finished", "job 1 finished"], clusters[0].samples)
+
+    def test_skips_blank_entries(self):
+        # Run our test
+        parser = mine_templates(["started\n", "\n", "   \r\n", "started\n"])
+
+        # Check our results
+        self.assertEqual(2, parser.total_entries)
+        self.assertEqual("started", parser.get_clusters()[0].samples[0])
+
+    def test_separates_dissimilar_entries(self):
+        # Run our test
+        clusters = mine_templates(["user alice logged in", "user alice logged out quickly now"]).get_clusters()
+
+        # Check our results
+        self.assertEqual(2, len(clusters))
+
+    def test_routes_excess_tokens_to_wildcard_branch(self):
+        # Set up test
+        parser = DrainParser(max_children=3)
+
+        # Run our test
+        for name in ["alpha", "beta", "gamma", "delta", "epsilon"]:
+            parser.add_entry(f"{name} service restarted")
+
+        # Check our results
+        self.assertEqual(3, len(parser._root.children["3"].children))
+        self.assertIn(WILDCARD, parser._root.children["3"].children)
+
+    def test_rejects_shallow_trees(self):
+        with self.assertRaises(ValueError):
+            DrainParser(depth=2)
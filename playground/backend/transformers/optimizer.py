@@ -0,0 +1,348 @@
+import ast
+from dataclasses import dataclass
+import json
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains an optimization pass over the Python code generated for each pattern of a transformer.  The
+unoptimized code defines the pattern's extract and transform functions inside the pattern function, so they are created
+anew for every record, and looks up or compiles its regexes and lookup tables on every call too.  The pass rewrites the
+code so that:
+
+* The inner function definitions are hoisted to module level, renamed with the pattern function's name as a prefix.
+* Regexes given as string literals to the functions of the re module are compiled once, at module level.
+* Dict literals of constants used only for lookups are built once, at module level.
+* A transform whose body is a single return of a simple expression is inlined into the pattern function.
+* A transform that returns a string literal has that literal converted from JSON when the transformer is built, rather
+  than for every record.
+
+Code that doesn't have the shape the pass expects, or that would behave differently once rewritten (e.g. an inner
+function that reads the pattern function's variables), is left as it is.
+"""
+
+# The variables of the unoptimized pattern function; see _get_pattern_function_code()
+_PATTERN_FUNCTION_LOCALS = {"input_data", "context", "extracted_data", "transformed_data"}
+
+# The functions of the re module whose first argument is the regex, and the index of their flags argument
+_RE_FUNCTION_FLAGS_INDEX = {
+    "search": 2,
+    "match": 2,
+    "fullmatch": 2,
+    "findall": 2,
+    "finditer": 2,
+    "split": 3,
+    "sub": 4,
+    "subn": 4,
+}
+
+# The characters a string json.loads() accepts can start with, including the leading whitespace it skips and the
+# non-standard NaN and Infinity values it allows
+JSON_VALUE_START_CHARACTERS = ' \t\n\r{["-0123456789tfnNI'
+
+OPTIMIZED_JSON_CONVERSION_CODE = f"""
+_JSON_VALUE_START_CHARACTERS = frozenset({JSON_VALUE_START_CHARACTERS!r})
+
+def _convert_to_json_if_possible(value: str) -> typing.Any:
+    # Most values aren't JSON, and failing to decode them is far slower than checking their first character
+    if isinstance(value, str) and value[:1] not in _JSON_VALUE_START_CHARACTERS:
+        return value
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+"""
+
+
+@dataclass
+class OptimizedPatternFunction:
+    code: str
+    # Whether the pattern function already returns the JSON-converted value, so the transformer shouldn't convert it
+    returns_json_value: bool = False
+
+
+class _OptimizationNotApplicableError(Exception):
+    pass
+
+
+def _get_names(node: ast.AST) -> Set[str]:
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+def _get_bound_names(function: ast.FunctionDef) -> Set[str]:
+    bound = set()
+    for node in ast.walk(function):
+        if isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node is not function:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            bound.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+    return bound
+
+def _check_hoistable(function: ast.FunctionDef, hoisted_names: Set[str]):
+    if function.decorator_list:
+        raise _OptimizationNotApplicableError(f"{function.name}() has decorators")
+
+    # Defaults are evaluated when the function is defined, which hoisting changes from every call to once
+    defaults = function.args.defaults + [default for default in function.args.kw_defaults if default is not None]
+    if any(not isinstance(default, ast.Constant) for default in defaults):
+        raise _OptimizationNotApplicableError(f"{function.name}() has non-constant defaults")
+
+    if any(isinstance(node, (ast.Global, ast.Nonlocal)) for node in ast.walk(function)):
+        raise _OptimizationNotApplicableError(f"{function.name}() declares global or nonlocal names")
+
+    # Once hoisted, the function can't see the pattern function's variables, and its references to the other hoisted
+    # functions are renamed, which is only safe if it doesn't bind those names itself
+    top_level_params = {arg.arg for arg in function.args.posonlyargs + function.args.args + function.args.kwonlyargs}
+    bound_names = _get_bound_names(function)
+    if bound_names & hoisted_names:
+        raise _OptimizationNotApplicableError(f"{function.name}() rebinds the name of a hoisted function")
+    if (_get_names(function) - top_level_params) & _PATTERN_FUNCTION_LOCALS:
+        raise _OptimizationNotApplicableError(f"{function.name}() refers to a variable of the pattern function")
+
+def _rename_names(node: ast.AST, renames: Dict[str, str]):
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and child.id in renames:
+            child.id = renames[child.id]
+        elif isinstance(child, ast.FunctionDef) and child.name in renames:
+            child.name = renames[child.name]
+
+def _get_literal_flags(node: Optional[ast.expr]) -> Optional[int]:
+    if node is None:
+        return 0
+    if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "re":
+        flag = getattr(re, node.attr, None)
+        return int(flag) if isinstance(flag, re.RegexFlag) else None
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        left, right = _get_literal_flags(node.left), _get_literal_flags(node.right)
+        return left | right if left is not None and right is not None else None
+    return None
+
+
+class _ConstantHoister(ast.NodeTransformer):
+    """
+    Replaces regexes compiled from string literals, and dict literals of constants used for lookups, with references to
+    module-level constants.
+    """
+    def __init__(self, prefix: str, re_available: bool):
+        self.prefix = prefix
+        self.re_available = re_available
+        self.constants: List[Tuple[str, ast.expr]] = []
+        self._regex_names: Dict[Tuple[str, int], str] = dict()
+        self._lookup_names: Dict[str, str] = dict()
+
+    def _get_regex_name(self, pattern: str, flags: int, flags_node: Optional[ast.expr]) -> Optional[str]:
+        key = (pattern, flags)
+        if key not in self._regex_names:
+            # A regex that doesn't compile must keep failing when the pattern function is called, not when it's loaded
+            try:
+                re.compile(pattern, flags)
+            except re.error:
+                return None
+
+            name = f"{self.prefix}_REGEX_{len(self._regex_names)}"
+            compile_args = [ast.Constant(pattern)] + ([flags_node] if flags_node is not None else [])
+            self.constants.append((name, ast.Call(func=ast.Attribute(value=ast.Name("re", ast.Load()), attr="compile", ctx=ast.Load()), args=compile_args, keywords=[])))
+            self._regex_names[key] = name
+        return self._regex_names[key]
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+
+        if not (self.re_available and isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name)
+                and node.func.value.id == "re" and node.args and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+            return node
+
+        function_name = node.func.attr
+        if function_name == "compile":
+            flags_index = 1
+        elif function_name in _RE_FUNCTION_FLAGS_INDEX:
+            flags_index = _RE_FUNCTION_FLAGS_INDEX[function_name]
+        else:
+            return node
+
+        args = list(node.args)
+        keywords = list(node.keywords)
+        flags_node = None
+        if len(args) > flags_index:
+            flags_node = args.pop(flags_index)
+        flags_keywords = [keyword for keyword in keywords if keyword.arg == "flags"]
+        if flags_keywords:
+            flags_node = flags_keywords[0].value
+            keywords = [keyword for keyword in keywords if keyword.arg != "flags"]
+        if any(keyword.arg is None for keyword in keywords) or any(isinstance(arg, ast.Starred) for arg in args):
+            return node
+
+        flags = _get_literal_flags(flags_node)
+        if flags is None:
+            return node
+
+        regex_name = self._get_regex_name(args[0].value, flags, flags_node)
+        if regex_name is None:
+            return node
+
+        if function_name == "compile":
+            return ast.copy_location(ast.Name(regex_name, ast.Load()), node)
+
+        method = ast.Attribute(value=ast.Name(regex_name, ast.Load()), attr=function_name, ctx=ast.Load())
+        return ast.copy_location(ast.Call(func=method, args=args[1:], keywords=keywords), node)
+
+    def _is_lookup_table(self, node: ast.Dict) -> bool:
+        return all(isinstance(key, ast.Constant) for key in node.keys) and all(isinstance(value, ast.Constant) for value in node.values)
+
+    def _hoist_lookup_table(self, node: ast.Dict) -> ast.Name:
+        source = ast.unparse(node)
+        if source not in self._lookup_names:
+            name = f"{self.prefix}_LOOKUP_{len(self._lookup_names)}"
+            self.constants.append((name, node))
+            self._lookup_names[source] = name
+        return ast.copy_location(ast.Name(self._lookup_names[source], ast.Load()), node)
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        # {...}.get(key, default); the table can't be modified through get(), so it can be shared between calls
+        self.generic_visit(node)
+        if node.attr == "get" and isinstance(node.value, ast.Dict) and self._is_lookup_table(node.value):
+            node.value = self._hoist_lookup_table(node.value)
+        return node
+
+    def visit_Subscript(self, node: ast.Subscript) -> ast.AST:
+        # {...}[key]
+        self.generic_visit(node)
+        if isinstance(node.ctx, ast.Load) and isinstance(node.value, ast.Dict) and self._is_lookup_table(node.value):
+            node.value = self._hoist_lookup_table(node.value)
+        return node
+
+
+def _get_inlinable_expression(transform: ast.FunctionDef) -> Optional[ast.expr]:
+    """
+    Returns the expression the transform returns, with its parameter replaced by the pattern function's variable for
+    the extracted data, or None if the transform can't be inlined.
+    """
+    args = transform.args
+    if args.posonlyargs or args.vararg or args.kwonlyargs or args.kwarg or args.defaults or len(args.args) != 1:
+        return None
+
+    body = transform.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+        body = body[1:]
+    if len(body) != 1 or not isinstance(body[0], ast.Return) or body[0].value is None:
+        return None
+    expression = body[0].value
+
+    # Nested scopes and assignment expressions would see the parameter differently once it's substituted
+    if any(isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp, ast.NamedExpr, ast.Yield, ast.YieldFrom, ast.Await))
+           for node in ast.walk(expression)):
+        return None
+    if _get_names(expression) & (_PATTERN_FUNCTION_LOCALS | {transform.name}):
+        return None
+
+    _rename_names(expression, {args.args[0].arg: "extracted_data"})
+    return expression
+
+def _get_module_names(dependency_setup: str) -> Set[str]:
+    try:
+        module = ast.parse(dependency_setup)
+    except SyntaxError:
+        return set()
+
+    names = set()
+    for node in module.body:
+        if isinstance(node, ast.Import):
+            names.update(alias.asname or alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names.update(alias.asname or alias.name for alias in node.names)
+    return names
+
+def _to_json_if_possible(value: Any) -> Any:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+def _optimize(function_code: str, dependency_setup: str) -> OptimizedPatternFunction:
+    module = ast.parse(function_code)
+    if len(module.body) != 1 or not isinstance(module.body[0], ast.FunctionDef):
+        raise _OptimizationNotApplicableError("The code is not a single pattern function")
+    pattern_function = module.body[0]
+    prefix = f"_{pattern_function.name}"
+
+    # The pattern function is made of the extract and transform logic's definitions, followed by the calls to them
+    definitions = pattern_function.body[:-3]
+    calls = pattern_function.body[-3:]
+    if not definitions or not all(isinstance(statement, ast.FunctionDef) for statement in definitions):
+        raise _OptimizationNotApplicableError("The pattern function defines more than functions")
+    if ast.unparse(calls[1]) != "transformed_data = transform(extracted_data)" or ast.unparse(calls[2]) != "return transformed_data":
+        raise _OptimizationNotApplicableError("The pattern function doesn't end with the expected calls")
+
+    defined_names = [definition.name for definition in definitions]
+    if len(set(defined_names)) != len(defined_names) or not {"extract", "transform"} <= set(defined_names):
+        raise _OptimizationNotApplicableError("The pattern function doesn't define extract() and transform() exactly once")
+
+    hoisted_names = set(defined_names)
+    for definition in definitions:
+        _check_hoistable(definition, hoisted_names)
+    renames = {name: f"{prefix}_{name}" for name in defined_names}
+
+    # Hoist the constants out of the functions
+    re_available = "re" in _get_module_names(dependency_setup)
+    hoister = _ConstantHoister(prefix, re_available and not any("re" in _get_bound_names(definition) for definition in definitions))
+    definitions = [hoister.visit(definition) for definition in definitions]
+
+    # Inline the transform if it's trivial, unless the other functions call it
+    transform = next(definition for definition in definitions if definition.name == "transform")
+    others_use_transform = any("transform" in _get_names(definition) for definition in definitions if definition is not transform)
+    inlined_expression = None if others_use_transform else _get_inlinable_expression(transform)
+    if inlined_expression is not None:
+        definitions = [definition for definition in definitions if definition is not transform]
+
+    for definition in definitions:
+        _rename_names(definition, renames)
+
+    extract_call = calls[0]
+    _rename_names(extract_call, renames)
+
+    returns_json_value = False
+    if inlined_expression is None:
+        result = ast.Call(func=ast.Name(renames["transform"], ast.Load()), args=[ast.Name("extracted_data", ast.Load())], keywords=[])
+    else:
+        _rename_names(inlined_expression, renames)
+        result = inlined_expression
+        # A literal string result can be converted from JSON now, rather than for every record, as long as what it
+        # converts to can be written as a literal too
+        if isinstance(result, ast.Constant) and isinstance(result.value, str):
+            value = _to_json_if_possible(result.value)
+            if value is None or isinstance(value, (str, int, bool)) or (isinstance(value, float) and math.isfinite(value)):
+                result = ast.Constant(value)
+                returns_json_value = True
+
+    pattern_function.body = [extract_call, ast.Return(value=result)]
+
+    statements = [ast.Assign(targets=[ast.Name(name, ast.Store())], value=value) for name, value in hoister.constants]
+    statements += definitions + [pattern_function]
+    optimized_module = ast.fix_missing_locations(ast.Module(body=statements, type_ignores=[]))
+
+    return OptimizedPatternFunction(code="\n" + "\n\n".join(ast.unparse(statement) for statement in optimized_module.body) + "\n", returns_json_value=returns_json_value)
+
+def optimize_pattern_function(function_code: str, dependency_setup: str) -> OptimizedPatternFunction:
+    """
+    Returns an optimized equivalent of the pattern function code generated for a pattern, or the code unchanged if it
+    can't be optimized.
+    """
+    try:
+        return _optimize(function_code, dependency_setup)
+    except SyntaxError:
+        # Left for the validators to report
+        return OptimizedPatternFunction(code=function_code)
+    except _OptimizationNotApplicableError as e:
+        logger.debug(f"Not optimizing the pattern function: {str(e)}")
+        return OptimizedPatternFunction(code=function_code)
@@ -0,0 +1,434 @@
+import ast
+from dataclasses import dataclass, field
+import logging
+import re
+# The regex parser is private, but it is the only reliable way to tell whether a regex is anchored and what groups it has
+from re import _constants as sre_constants, _parser as sre_parser
+from typing import Dict, List, Optional, Tuple
+
+from backend.entities_expert.parse_context import PARSE_CONTEXT_CLASS_NAME
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains a build stage for Python transformers that cuts down on how many times each record is scanned by
+regexes.  Extract logic frequently boils down to `re.search(r'...', input_entry)`, and the patterns of a transformer
+often search for the same regex (a syslog header, say) to pull out different fields.  The stage rewrites those calls to
+go through the record's parse context, which runs each distinct search once per record and shares the match between
+the extract functions that ask for it.
+
+Distinct regexes that are anchored to the start of the entry are additionally fused into a single regex made of one
+optional lookahead per regex, so that they are all evaluated by a single match call.  Each extract function then gets a
+FusedMatch, which stands in for its regex's own match object.  Unanchored regexes are not fused: a lookahead for them
+has to scan the entry just like a separate search would, and measures slower than running the searches separately.
+"""
+
+FUSED_SEARCHES_VARIABLE = "_FUSED_SEARCHES"
+
+# How a match object may be used for a FusedMatch to be substituted for it
+_FUSED_MATCH_METHODS = {"group", "groups", "groupdict", "start", "end", "span"}
+
+FUSED_SEARCH_CODE = r'''
+class FusedMatch:
+    """
+    The part of a fused regex's match belonging to one of the regexes fused into it, standing in for the match object
+    of that regex alone.
+    """
+    def __init__(self, match: typing.Any, group_offset: int, group_count: int, group_names: typing.Dict[str, int]):
+        self._match = match
+        self._group_offset = group_offset
+        self._group_count = group_count
+        self._group_names = group_names
+
+    def _get_fused_group(self, group: typing.Union[int, str]) -> int:
+        if isinstance(group, str):
+            if group not in self._group_names:
+                raise IndexError("no such group")
+            group = self._group_names[group]
+        if not 0 <= group <= self._group_count:
+            raise IndexError("no such group")
+        return self._group_offset + group
+
+    def group(self, *groups: typing.Union[int, str]) -> typing.Any:
+        values = [self._match.group(self._get_fused_group(group)) for group in (groups or (0,))]
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def __getitem__(self, group: typing.Union[int, str]) -> typing.Any:
+        return self.group(group)
+
+    def groups(self, default: typing.Any = None) -> typing.Tuple[typing.Any, ...]:
+        values = (self._match.group(self._group_offset + group) for group in range(1, self._group_count + 1))
+        return tuple(default if value is None else value for value in values)
+
+    def groupdict(self, default: typing.Any = None) -> typing.Dict[str, typing.Any]:
+        values = {name: self._match.group(self._group_offset + group) for name, group in self._group_names.items()}
+        return {name: default if value is None else value for name, value in values.items()}
+
+    def start(self, group: typing.Union[int, str] = 0) -> int:
+        return self._match.start(self._get_fused_group(group))
+
+    def end(self, group: typing.Union[int, str] = 0) -> int:
+        return self._match.end(self._get_fused_group(group))
+
+    def span(self, group: typing.Union[int, str] = 0) -> typing.Tuple[int, int]:
+        return self._match.span(self._get_fused_group(group))
+
+class FusedSearch:
+    """
+    One regex's place in a fused regex; ParseContext.search() uses it in place of searching for that regex directly.
+    """
+    def __init__(self, fused_regex: typing.Any, group_offset: int, group_count: int, group_names: typing.Dict[str, int]):
+        self.fused_regex = fused_regex
+        self.group_offset = group_offset
+        self.group_count = group_count
+        self.group_names = group_names
+
+    def select(self, fused_match: typing.Any) -> typing.Optional[FusedMatch]:
+        # Each regex is captured as a whole by the group at its offset, which is unset if the regex didn't match
+        if fused_match is None or fused_match.group(self.group_offset) is None:
+            return None
+        return FusedMatch(fused_match, self.group_offset, self.group_count, self.group_names)
+'''
+
+
+@dataclass
+class RegexSearch:
+    pattern: str
+    flags: int
+
+    def get_key(self) -> Tuple[str, int]:
+        return (self.pattern, self.flags)
+
+@dataclass
+class FusedRegexMember:
+    search: RegexSearch
+    group_offset: int
+    group_count: int
+    group_names: Dict[str, int]
+
+@dataclass
+class FusedRegex:
+    pattern: str
+    flags: int
+    members: List[FusedRegexMember]
+
+@dataclass
+class RegexFusionResult:
+    extract_logics: List[str]
+    fused_regexes: List[FusedRegex] = field(default_factory=list)
+
+    def get_search_count(self) -> int:
+        return sum(len(fused_regex.members) for fused_regex in self.fused_regexes)
+
+    def get_link_code(self) -> str:
+        """
+        Returns the code that defines the fused searches to hand to the parse context, or an empty string if nothing
+        was fused.
+        """
+        if not self.fused_regexes:
+            return ""
+
+        code = FUSED_SEARCH_CODE + "\n"
+        code += f"{FUSED_SEARCHES_VARIABLE} = {{}}\n"
+        for fused_regex in self.fused_regexes:
+            code += f"_fused_regex = re.compile({fused_regex.pattern!r}, {fused_regex.flags})\n"
+            for member in fused_regex.members:
+                code += (
+                    f"{FUSED_SEARCHES_VARIABLE}[{member.search.get_key()!r}] = "
+                    f"FusedSearch(_fused_regex, {member.group_offset}, {member.group_count}, {member.group_names!r})\n"
+                )
+        return code
+
+
+@dataclass
+class _SearchSite:
+    search: RegexSearch
+    call: ast.Call
+    fusable_use: bool
+
+def _get_flags(node: Optional[ast.expr]) -> Optional[int]:
+    # Only literal flags can be rewritten, since the search has to be identified when the transformer is built
+    if node is None:
+        return 0
+    if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "re":
+        flag = getattr(re, node.attr, None)
+        return int(flag) if isinstance(flag, re.RegexFlag) else None
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        left, right = _get_flags(node.left), _get_flags(node.right)
+        return left | right if left is not None and right is not None else None
+    return None
+
+def _get_search(call: ast.Call, input_name: str) -> Optional[RegexSearch]:
+    # Matches re.search(<string literal>, <input>) with optional literal flags
+    if not (isinstance(call.func, ast.Attribute) and call.func.attr == "search"
+            and isinstance(call.func.value, ast.Name) and call.func.value.id == "re"):
+        return None
+
+    flags_node = call.args[2] if len(call.args) == 3 else None
+    for keyword in call.keywords:
+        if keyword.arg != "flags" or flags_node is not None:
+            return None
+        flags_node = keyword.value
+
+    if not 2 <= len(call.args) <= 3:
+        return None
+    pattern_node, input_node = call.args[:2]
+    if not (isinstance(pattern_node, ast.Constant) and isinstance(pattern_node.value, str)):
+        return None
+    if not (isinstance(input_node, ast.Name) and input_node.id == input_name):
+        return None
+
+    flags = _get_flags(flags_node)
+    if flags is None:
+        return None
+
+    try:
+        re.compile(pattern_node.value, flags)
+    except re.error:
+        return None
+
+    return RegexSearch(pattern=pattern_node.value, flags=flags)
+
+def _is_test_position(node: ast.AST) -> bool:
+    parent = node._fusion_parent
+    if isinstance(parent, (ast.If, ast.IfExp, ast.While, ast.Assert)) and parent.test is node:
+        return True
+    if isinstance(parent, (ast.BoolOp, ast.UnaryOp)) and (isinstance(parent, ast.BoolOp) or isinstance(parent.op, ast.Not)):
+        return _is_test_position(parent)
+    return False
+
+def _is_fusable_use(name_node: ast.Name) -> bool:
+    parent = name_node._fusion_parent
+
+    # match.group(...), match.groups(), etc.
+    if isinstance(parent, ast.Attribute) and parent.attr in _FUSED_MATCH_METHODS:
+        return isinstance(parent._fusion_parent, ast.Call) and parent._fusion_parent.func is parent
+
+    # match[...]
+    if isinstance(parent, ast.Subscript) and parent.value is name_node:
+        return True
+
+    # match is None, match is not None
+    if isinstance(parent, ast.Compare):
+        operands = [parent.left] + parent.comparators
+        return (all(isinstance(op, (ast.Is, ast.IsNot)) for op in parent.ops)
+                and all(operand is name_node or (isinstance(operand, ast.Constant) and operand.value is None) for operand in operands))
+
+    # if match: ..., x if match else y
+    return _is_test_position(name_node)
+
+def _find_search_sites(function: ast.FunctionDef) -> List[_SearchSite]:
+    if not function.args.args or function.args.vararg or function.args.kwonlyargs or function.args.posonlyargs:
+        return []
+    input_name = function.args.args[0].arg
+
+    for node in ast.walk(function):
+        for child in ast.iter_child_nodes(node):
+            child._fusion_parent = node
+
+    # The rewrite searches the record itself, so the input must still be the record wherever it's searched.  Besides
+    # assignments, that rules out nested functions and lambdas that take a parameter of the same name, and the other
+    # statements that bind a name.
+    for node in ast.walk(function):
+        if isinstance(node, ast.Name) and node.id == input_name and not isinstance(node.ctx, ast.Load):
+            return []
+        if isinstance(node, ast.arg) and node.arg == input_name and node is not function.args.args[0]:
+            return []
+        if isinstance(node, ast.ExceptHandler) and node.name == input_name:
+            return []
+        if isinstance(node, ast.alias) and (node.asname or node.name.split(".")[0]) == input_name:
+            return []
+
+    name_uses: Dict[str, List[ast.Name]] = dict()
+    for node in ast.walk(function):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            name_uses.setdefault(node.id, []).append(node)
+
+    sites = []
+    for node in ast.walk(function):
+        if not isinstance(node, ast.Call):
+            continue
+        search = _get_search(node, input_name)
+        if search is None:
+            continue
+
+        # A FusedMatch only stands in for a match object assigned to a variable that is used in a few simple ways
+        parent = node._fusion_parent
+        fusable_use = (
+            isinstance(parent, ast.Assign) and len(parent.targets) == 1 and isinstance(parent.targets[0], ast.Name)
+            and all(_is_fusable_use(use) for use in name_uses.get(parent.targets[0].id, []))
+        )
+        sites.append(_SearchSite(search=search, call=node, fusable_use=fusable_use))
+
+    return sites
+
+def _get_offset(source_lines: List[str], lineno: int, col_offset: int) -> int:
+    # AST column offsets count UTF-8 bytes rather than characters
+    line_start = sum(len(line) for line in source_lines[:lineno - 1])
+    return line_start + len(source_lines[lineno - 1].encode("utf-8")[:col_offset].decode("utf-8"))
+
+def _find_extract_search_sites(extract_logic: str) -> Tuple[Optional[ast.FunctionDef], List[_SearchSite]]:
+    try:
+        module = ast.parse(extract_logic)
+    except SyntaxError:
+        return None, []
+
+    functions = [node for node in module.body if isinstance(node, ast.FunctionDef) and node.name == "extract"]
+    if len(functions) != 1:
+        return None, []
+    function = functions[0]
+
+    # Extract logic that already takes the context under another name is left be
+    if len(function.args.args) >= 2 and function.args.args[1].arg != "context":
+        return None, []
+
+    return function, _find_search_sites(function)
+
+def _rewrite_extract_logic(extract_logic: str, function: ast.FunctionDef, sites: List[_SearchSite]) -> str:
+    # Splice the rewrites into the original source, rather than unparsing the tree, so comments and formatting survive
+    source_lines = extract_logic.splitlines(keepends=True)
+    replacements = []
+    for site in sites:
+        start = _get_offset(source_lines, site.call.lineno, site.call.col_offset)
+        end = _get_offset(source_lines, site.call.end_lineno, site.call.end_col_offset)
+        arguments = [ast.get_source_segment(extract_logic, site.call.args[0])]
+        flags_node = site.call.args[2] if len(site.call.args) == 3 else next((keyword.value for keyword in site.call.keywords), None)
+        if flags_node is not None:
+            arguments.append(ast.get_source_segment(extract_logic, flags_node))
+        replacements.append((start, end, f"context.search({', '.join(arguments)})"))
+
+    if len(function.args.args) < 2:
+        input_arg = function.args.args[0]
+        end = _get_offset(source_lines, input_arg.end_lineno, input_arg.end_col_offset)
+        replacements.append((end, end, f', context: "{PARSE_CONTEXT_CLASS_NAME}"'))
+
+    rewritten = extract_logic
+    for start, end, replacement in sorted(replacements, key=lambda replacement: replacement[:2], reverse=True):
+        rewritten = rewritten[:start] + replacement + rewritten[end:]
+
+    return rewritten
+
+
+def _walk_parsed(items: sre_parser.SubPattern):
+    for op, value in items.data:
+        yield op, value
+        for nested in (value if isinstance(value, (list, tuple)) else [value]):
+            if isinstance(nested, sre_parser.SubPattern):
+                yield from _walk_parsed(nested)
+            elif isinstance(nested, (list, tuple)):
+                for item in nested:
+                    if isinstance(item, sre_parser.SubPattern):
+                        yield from _walk_parsed(item)
+
+def _make_fused_regex_member(search: RegexSearch, group_offset: int) -> Optional[Tuple[str, FusedRegexMember]]:
+    """
+    Returns the regex to put in the fused regex's lookahead, and where its groups land, or None if the regex can't be
+    fused without changing what it matches.
+    """
+    if search.flags & (re.MULTILINE | re.VERBOSE):
+        return None
+
+    try:
+        parsed = sre_parser.parse(search.pattern, search.flags)
+        baseline_flags = sre_parser.parse("", search.flags).state.flags
+    except re.error:
+        return None
+
+    # Global inline flags, e.g. (?i), are only allowed at the start of a regex
+    if parsed.state.flags != baseline_flags:
+        return None
+
+    # Only a regex anchored at the start can be evaluated from a single position; a top-level alternation parses as a
+    # branch rather than an anchor, so it is never considered anchored
+    if not parsed.data or parsed.data[0] != (sre_constants.AT, sre_constants.AT_BEGINNING) and parsed.data[0] != (sre_constants.AT, sre_constants.AT_BEGINNING_STRING):
+        return None
+
+    # Backreferences use group numbers that change when the regex is fused
+    if any(op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS) for op, _ in _walk_parsed(parsed)):
+        return None
+
+    group_count = parsed.state.groups - 1
+    group_names = dict(parsed.state.groupdict)
+
+    # Rename the named groups so they can't collide with those of the other fused regexes
+    prefix = f"_fused{group_offset}_"
+    renamed = re.sub(r"(?<!\\)((?:\\\\)*)\(\?P<(\w+)>", lambda match: f"{match.group(1)}(?P<{prefix}{match.group(2)}>", search.pattern)
+    try:
+        renamed_groupindex = re.compile(renamed, search.flags).groupindex
+    except re.error:
+        return None
+    if dict(renamed_groupindex) != {prefix + name: index for name, index in group_names.items()}:
+        return None
+
+    return f"(?:(?=({renamed})))?", FusedRegexMember(search=search, group_offset=group_offset, group_count=group_count, group_names=group_names)
+
+def _fuse_searches(searches: List[RegexSearch]) -> List[FusedRegex]:
+    searches_by_flags: Dict[int, List[RegexSearch]] = dict()
+    for search in searches:
+        searches_by_flags.setdefault(search.flags, []).append(search)
+
+    fused_regexes = []
+    for flags, flag_searches in searches_by_flags.items():
+        lookaheads = []
+        members = []
+        group_offset = 1
+        for search in flag_searches:
+            fused_member = _make_fused_regex_member(search, group_offset)
+            if fused_member is None:
+                continue
+            lookahead, member = fused_member
+            lookaheads.append(lookahead)
+            members.append(member)
+            group_offset += member.group_count + 1
+
+        # Fusing a single regex would only add overhead
+        if len(members) < 2:
+            continue
+
+        pattern = "".join(lookaheads)
+        try:
+            re.compile(pattern, flags)
+        except re.error as e:
+            logger.debug(f"Not fusing {len(members)} regexes because the fused regex failed to compile: {str(e)}")
+            continue
+        fused_regexes.append(FusedRegex(pattern=pattern, flags=flags, members=members))
+
+    return fused_regexes
+
+def fuse_extraction_regexes(extract_logics: List[str]) -> RegexFusionResult:
+    """
+    Rewrites the regex searches of the input entry that are repeated between the extract logics, or that can be fused,
+    to go through the record's parse context.  The rewritten extract logics take the parse context as their second
+    parameter.  Extract logic without such searches is returned unchanged.
+    """
+    analyses = [_find_extract_search_sites(extract_logic) for extract_logic in extract_logics]
+
+    searches: Dict[Tuple[str, int], RegexSearch] = dict()
+    site_counts: Dict[Tuple[str, int], int] = dict()
+    unfusable_keys = set()
+    for _, sites in analyses:
+        for site in sites:
+            key = site.search.get_key()
+            searches.setdefault(key, site.search)
+            site_counts[key] = site_counts.get(key, 0) + 1
+            if not site.fusable_use:
+                unfusable_keys.add(key)
+
+    fused_regexes = _fuse_searches([search for key, search in searches.items() if key not in unfusable_keys])
+    fused_keys = {member.search.get_key() for fused_regex in fused_regexes for member in fused_regex.members}
+
+    # Going through the context costs a little more than searching directly, so a search that is neither repeated nor
+    # fused is left alone
+    shared_keys = {key for key, count in site_counts.items() if count > 1} | fused_keys
+
+    rewritten_logics = []
+    for extract_logic, (function, sites) in zip(extract_logics, analyses):
+        shared_sites = [site for site in sites if site.search.get_key() in shared_keys]
+        rewritten_logics.append(_rewrite_extract_logic(extract_logic, function, shared_sites) if shared_sites else extract_logic)
+
+    result = RegexFusionResult(extract_logics=rewritten_logics, fused_regexes=fused_regexes)
+    logger.debug(f"Shared {len(shared_keys)} of {len(searches)} distinct regex searches between extract functions and fused {result.get_search_count()} of them")
+    return result
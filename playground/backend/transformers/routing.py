@@ -0,0 +1,188 @@
+from collections import deque
+from dataclasses import dataclass
+import logging
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError: # Python < 3.11
+    import sre_parse
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains the functionality to dispatch entries of a data stream to the Transformer whose targeting
+heuristic matches them.  Rather than trying every heuristic against every entry, the literal substrings each heuristic
+requires are loaded into a single Aho-Corasick automaton; one scan of an entry finds the (usually tiny) set of
+heuristics that could possibly match, and only those have their full regex evaluated.
+"""
+
+
+class InvalidHeuristicError(Exception):
+    pass
+
+@dataclass
+class Route:
+    transformer_id: str
+    heuristic: str # A regex, as produced by the Regex Expert
+
+
+class AhoCorasickAutomaton:
+    def __init__(self, needles: List[str]):
+        self.needles = needles
+
+        # Build the trie of needles; node 0 is the root
+        self._goto: List[Dict[str, int]] = [dict()]
+        self._fail: List[int] = [0]
+        self._outputs: List[Set[int]] = [set()]
+
+        for needle_index, needle in enumerate(needles):
+            node = 0
+            for char in needle:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append(dict())
+                    self._fail.append(0)
+                    self._outputs.append(set())
+                node = next_node
+            self._outputs[node].add(needle_index)
+
+        # Compute the failure links breadth-first, so each node's link points at its longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._outputs[child] |= self._outputs[self._fail[child]]
+
+    def find_all(self, text: str) -> Set[int]:
+        """
+        Returns the indices of every needle that occurs in the text.
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found |= outputs[node]
+
+        return found
+
+
+def to_python_regex(heuristic: str) -> str:
+    # JavaScript spells named groups (?<name>...); Python requires (?P<name>...).  Lookbehinds are left untouched.
+    return re.sub(r"\(\?<(?![=!])", "(?P<", heuristic)
+
+def _collect_required_literals(parsed: sre_parse.SubPattern, literals: List[str]):
+    current_run: List[str] = []
+
+    def flush():
+        if current_run:
+            literals.append("".join(current_run))
+            current_run.clear()
+
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            current_run.append(chr(av))
+            continue
+
+        flush()
+
+        if op is sre_parse.SUBPATTERN:
+            _, add_flags, _, subpattern = av
+            if not add_flags & re.IGNORECASE:
+                _collect_required_literals(subpattern, literals)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None)):
+            min_repeats, _, subpattern = av
+            if min_repeats >= 1:
+                _collect_required_literals(subpattern, literals)
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            _collect_required_literals(av, literals)
+        # Anything else (alternation, character classes, anchors, etc) has no single literal every match must contain
+
+    flush()
+
+def extract_required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """
+    Returns literal substrings that every match of the pattern must contain.  The result may be empty if no such
+    literal can be proven, such as for case-insensitive patterns or ones built entirely of alternations/classes.
+    """
+    parsed = sre_parse.parse(pattern, flags)
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+
+    literals: List[str] = []
+    _collect_required_literals(parsed, literals)
+    return literals
+
+
+class HeuristicRouter:
+    def __init__(self, routes: List[Route]):
+        """
+        Compiles the routes into a single dispatch structure.  Routes are evaluated in the order given, so when the
+        heuristics of several routes match an entry, the earliest one wins.
+        """
+        self.routes = routes
+        self._regexes: List[re.Pattern] = []
+        self._always_candidates: List[int] = [] # Routes with no usable literal must always be evaluated
+
+        needles: List[str] = []
+        self._routes_by_needle: List[List[int]] = []
+        needle_indices: Dict[str, int] = dict()
+
+        for route_index, route in enumerate(routes):
+            try:
+                python_pattern = to_python_regex(route.heuristic)
+                self._regexes.append(re.compile(python_pattern))
+                literals = extract_required_literals(python_pattern)
+            except re.error as e:
+                raise InvalidHeuristicError(f"Invalid heuristic for transformer {route.transformer_id}: {str(e)}")
+
+            if not literals:
+                logger.debug(f"No required literal found for the heuristic of transformer {route.transformer_id}; it will be evaluated for every entry")
+                self._always_candidates.append(route_index)
+                continue
+
+            # One literal per route is sufficient to rule it out, so use the most selective (longest) one
+            needle = max(literals, key=len)
+            if needle not in needle_indices:
+                needle_indices[needle] = len(needles)
+                needles.append(needle)
+                self._routes_by_needle.append([])
+            self._routes_by_needle[needle_indices[needle]].append(route_index)
+
+        self._automaton = AhoCorasickAutomaton(needles)
+
+    def _get_candidates(self, entry: str) -> List[int]:
+        candidates = set(self._always_candidates)
+        for needle_index in self._automaton.find_all(entry):
+            candidates.update(self._routes_by_needle[needle_index])
+        return sorted(candidates)
+
+    def route(self, entry: str) -> Optional[str]:
+        """
+        Returns the ID of the transformer whose heuristic matches the entry, or None if no heuristic matches.
+        """
+        for route_index in self._get_candidates(entry):
+            if self._regexes[route_index].search(entry):
+                return self.routes[route_index].transformer_id
+        return None
+
+    def route_entries(self, entries: Iterable[str]) -> Iterator[Tuple[Optional[str], str]]:
+        for entry in entries:
+            yield self.route(entry), entry
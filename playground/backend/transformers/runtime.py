@@ -0,0 +1,180 @@
+from collections import deque
+from dataclasses import dataclass
+import logging
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from backend.core.code_cache import get_python_code_cache
+from backend.core.validators import PythonLogicInvalidSyntaxError, PythonLogicNotInModuleError, PythonLogicNotExecutableError
+
+from backend.transformers.routing import HeuristicRouter
+from backend.transformers.transformers import Transformer
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains the functionality to execute finalized Transformers against entries outside of the validation
+workflow, such as when normalizing a large export of log entries.
+"""
+
+
+# Transforms each of the lines it is given, yielding an (output, error) pair per line in which exactly one is None
+TransformerBatch = Callable[[Iterable[str]], Iterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]]
+
+
+@dataclass
+class TransformResult:
+    line_number: int
+    output: Dict[str, Any] = None
+    error: str = None
+    transformer_id: str = None # Set when the line was routed to one of several transformers
+
+    def to_json(self) -> Dict[str, Any]:
+        result = {"line": self.line_number}
+        if self.transformer_id is not None:
+            result["transformer_id"] = self.transformer_id
+        if self.error is not None:
+            result["error"] = self.error
+        else:
+            result["output"] = self.output
+        return result
+
+def _link_python_transformer(transformer: Transformer) -> ModuleType:
+    code_cache = get_python_code_cache()
+
+    # Each fragment is compiled and executed in its own module, so editing one pattern only recompiles that pattern
+    transformer_module = ModuleType("transformer")
+    for fragment in transformer.fragments:
+        fragment_module = code_cache.load_module("transformer_fragment", fragment.source)
+        setattr(transformer_module, fragment.function_name, getattr(fragment_module, fragment.function_name))
+
+    # The link logic only defines functions, so executing it into a fresh module on each load is cheap; it is a fresh
+    # module because the fragment functions it calls differ between transformers
+    exec(code_cache.get_code("transformer_link", f"{transformer.dependency_setup}\n\n{transformer.link_logic}"), transformer_module.__dict__)
+
+    return transformer_module
+
+def _load_python_transformer_module(transformer: Transformer) -> ModuleType:
+    # Take the raw logic and attempt to load it into an executable form
+    try:
+        if transformer.fragments is not None:
+            transformer_module = _link_python_transformer(transformer)
+        else:
+            transformer_module = get_python_code_cache().load_module("transformer", f"{transformer.dependency_setup}\n\n{transformer.transformer_logic}")
+    except SyntaxError as e:
+        raise PythonLogicInvalidSyntaxError(f"Syntax error in the transformer logic: {str(e)}")
+
+    # Confirm we can pull out usable transformer logic
+    if not hasattr(transformer_module, "transformer"):
+        raise PythonLogicNotInModuleError("The transformer logic does not contain a member named 'transformer'")
+
+    if not callable(transformer_module.transformer):
+        raise PythonLogicNotExecutableError("The 'transformer' attribute must be an executable function")
+
+    return transformer_module
+
+def load_python_transformer(transformer: Transformer) -> Callable[[str], Dict[str, Any]]:
+    return _load_python_transformer_module(transformer).transformer
+
+def check_python_transformer(transformer: Transformer):
+    """
+    Loads the transformer logic only to confirm that it can be, raising the same errors load_python_transformer() does.
+    For use in a sandbox worker, which can't return the loaded function to its caller.
+    """
+    _load_python_transformer_module(transformer)
+
+def invoke_python_transformer(transformer: Transformer, input_entry: str) -> Dict[str, Any]:
+    return load_python_transformer(transformer)(input_entry)
+
+def make_transformer_batch(transformer_logic: Callable[[str], Dict[str, Any]]) -> TransformerBatch:
+    """
+    Adapts a single-record transformer function to the batch interface, for transformer logic that doesn't define its
+    own transformer_batch().
+    """
+    def transformer_batch(lines: Iterable[str]) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        for line in lines:
+            try:
+                output = transformer_logic(line)
+            except Exception as e:
+                yield None, f"{type(e).__name__}: {str(e)}"
+                continue
+            yield output, None
+
+    return transformer_batch
+
+def load_python_transformer_batch(transformer: Transformer) -> TransformerBatch:
+    """
+    Loads the transformer's batch entry point, which lazily transforms each of the lines it is given and yields an
+    (output, error) pair for each one.  Transformers created by create_transformer_python() define their own, which
+    amortizes the per-record setup across the batch; for any other transformer logic, transformer() is wrapped.
+    """
+    transformer_module = _load_python_transformer_module(transformer)
+
+    transformer_batch = getattr(transformer_module, "transformer_batch", None)
+    if callable(transformer_batch):
+        return transformer_batch
+
+    return make_transformer_batch(transformer_module.transformer)
+
+def _iter_numbered_entries(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        yield line_number, line
+
+def transform_lines(transformer_batch: TransformerBatch, lines: Iterable[str]) -> Iterator[TransformResult]:
+    """
+    Lazily applies the transformer logic to each line, yielding one result per non-blank line.  A failure on one line is
+    reported in that line's result rather than aborting the rest of the stream.
+    """
+    # The batch pulls each line from this generator lazily, so the line numbers are queued as the lines are handed out
+    line_numbers = deque()
+
+    def get_lines() -> Iterator[str]:
+        for line_number, line in _iter_numbered_entries(lines):
+            line_numbers.append(line_number)
+            yield line
+
+    for output, error in transformer_batch(get_lines()):
+        line_number = line_numbers.popleft()
+        if error is not None:
+            logger.debug(f"Transformer failed on line {line_number}: {error}")
+            yield TransformResult(line_number=line_number, error=error)
+        else:
+            yield TransformResult(line_number=line_number, output=output)
+
+def transform_routed_lines(router: HeuristicRouter, transformer_batches: Dict[str, TransformerBatch], lines: Iterable[str]) -> Iterator[TransformResult]:
+    """
+    Lazily dispatches each non-blank line to the transformer whose targeting heuristic matches it, yielding one result
+    per line that names the transformer used.  A line that no heuristic matches is reported in its result.
+
+    Each transformer's batch stays open for the whole stream and is handed one line at a time, so its per-batch setup is
+    paid once; this relies on the batch yielding a line's result before pulling the next line, as the batches created by
+    create_transformer_python() and make_transformer_batch() do.
+    """
+    pending_lines: Dict[str, deque] = dict()
+    batch_results: Dict[str, Iterator[Tuple[Optional[Dict[str, Any]], Optional[str]]]] = dict()
+
+    def get_lines(queue: deque) -> Iterator[str]:
+        while True:
+            yield queue.popleft()
+
+    for line_number, line in _iter_numbered_entries(lines):
+        transformer_id = router.route(line)
+        if transformer_id is None:
+            yield TransformResult(line_number=line_number, error="The entry does not match the heuristic of any transformer")
+            continue
+
+        if transformer_id not in batch_results:
+            pending_lines[transformer_id] = deque()
+            batch_results[transformer_id] = transformer_batches[transformer_id](get_lines(pending_lines[transformer_id]))
+
+        pending_lines[transformer_id].append(line)
+        output, error = next(batch_results[transformer_id])
+        if error is not None:
+            logger.debug(f"Transformer {transformer_id} failed on line {line_number}: {error}")
+            yield TransformResult(line_number=line_number, error=error, transformer_id=transformer_id)
+        else:
+            yield TransformResult(line_number=line_number, output=output, transformer_id=transformer_id)
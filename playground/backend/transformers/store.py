@@ -0,0 +1,47 @@
+from collections import OrderedDict
+import logging
+import threading
+
+from backend.transformers.transformers import Transformer
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains a process-local store of recently created Transformers so that they can be referenced by ID,
+rather than resubmitted in full, by callers such as the streaming transform endpoint.
+"""
+
+DEFAULT_TRANSFORMER_STORE_MAX_ENTRIES = 256
+
+
+class TransformerNotFoundError(Exception):
+    pass
+
+class TransformerStore:
+    def __init__(self, max_entries: int = DEFAULT_TRANSFORMER_STORE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._transformers: OrderedDict[str, Transformer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, transformer: Transformer):
+        with self._lock:
+            self._transformers[transformer.id] = transformer
+            self._transformers.move_to_end(transformer.id)
+            while len(self._transformers) > self.max_entries:
+                evicted_id, _ = self._transformers.popitem(last=False)
+                logger.debug(f"Evicted transformer {evicted_id} from the transformer store")
+
+    def get(self, transformer_id: str) -> Transformer:
+        with self._lock:
+            transformer = self._transformers.get(transformer_id)
+            if transformer is None:
+                raise TransformerNotFoundError(f"No stored transformer with id: {transformer_id}")
+            self._transformers.move_to_end(transformer_id)
+            return transformer
+
+
+TRANSFORMER_STORE = TransformerStore()
+
+def get_transformer_store() -> TransformerStore:
+    return TRANSFORMER_STORE
@@ -0,0 +1,92 @@
+from django.test import TestCase
+
+from backend.entities_expert.tests.helpers import DEPENDENCY_SETUP, make_pattern
+from backend.transformers.optimizer import optimize_pattern_function
+from backend.transformers.runtime import load_python_transformer
+from backend.transformers.transformers import create_transformer_python
+
+
+ENTRIES = [
+    "user=alice src=10.0.0.1 action=deny proto=6 tags=[1,2]",
+    "USER=bob src=10.0.0.2 action=accept",
+    "nothing to see",
+    "",
+]
+
+PATTERNS = [
+    # A regex with flags and a lookup table
+    make_pattern(0,
+        "def extract(input_entry: str) -> typing.List[str]:\n    match = re.search(r'user=(\\w+)', input_entry, re.IGNORECASE)\n    return [match.group(1)] if match else []",
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return {'alice': 'Alice', 'bob': 'Bob'}.get(extracted_values[0], 'Unknown') if extracted_values else ''"),
+    # Helpers, compiled regexes, and the other functions of the re module
+    make_pattern(1,
+        "def _split(input_entry: str) -> typing.List[str]:\n    return re.split(r'\\s+', input_entry, maxsplit=2)\n\n"
+        "def extract(input_entry: str) -> typing.List[str]:\n    pattern = re.compile(r'(\\w+)=(\\S+)')\n    return [re.sub(r'\\.', '-', value, 1) for _, value in pattern.findall(' '.join(_split(input_entry)))]",
+        "def transform(extracted_values: typing.List[str]) -> str:\n    # Join them\n    joined = ','.join(extracted_values)\n    return joined"),
+    # A constant, which is converted from JSON when the transformer is built
+    make_pattern(2,
+        "def extract(input_entry: str) -> typing.List[str]:\n    return []",
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return '6'"),
+    # A value that is converted from JSON for every record
+    make_pattern(3,
+        "def extract(input_entry: str) -> typing.List[str]:\n    return re.findall(r'tags=(\\S+)', input_entry)",
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else 'none'"),
+    # Reads a variable of the pattern function, so it can't be hoisted
+    make_pattern(4,
+        "def extract(input_entry: str) -> typing.List[str]:\n    return [input_data[:4]]",
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    # A mutable default, which would be shared between records if it were hoisted
+    make_pattern(5,
+        "def extract(input_entry: str, *, seen: typing.List[str] = []) -> typing.List[str]:\n    seen.append(input_entry)\n    return [str(len(seen))]",
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+]
+
+
+class OptimizePatternFunctionTestCase(TestCase):
+    def setUp(self):
+        self.optimized = create_transformer_python("optimized", PATTERNS)
+        self.unoptimized = create_transformer_python("unoptimized", PATTERNS, optimize=False)
+
+    def test_equivalent_to_unoptimized(self):
+        # Set up test
+        optimized = load_python_transformer(self.optimized)
+        unoptimized = load_python_transformer(self.unoptimized)
+
+        # Run our test/Check our results
+        for entry in ENTRIES:
+            self.assertEqual(unoptimized(entry), optimized(entry))
+        self.assertEqual({"field_0": "Alice", "field_2": 6, "field_3": [1, 2]}, {key: value for key, value in optimized(ENTRIES[0])["unmapped"].items() if key in ["field_0", "field_2", "field_3"]})
+
+    def test_hoists_functions_and_constants(self):
+        # Run our test
+        fragment = self.optimized.fragments[1].source
+
+        # Check our results
+        self.assertIn("def _transformer_unmapped_field_1_extract(", fragment)
+        self.assertIn("def _transformer_unmapped_field_1__split(", fragment)
+        self.assertIn("_transformer_unmapped_field_1_REGEX_0 = re.compile('\\\\s+')", fragment)
+        self.assertIn("_transformer_unmapped_field_1_REGEX_0.split(input_entry, maxsplit=2)", fragment)
+        self.assertIn("pattern = _transformer_unmapped_field_1_REGEX_1", fragment)
+        self.assertIn("_transformer_unmapped_field_1_REGEX_2.sub('-', value, 1)", fragment)
+        self.assertIn("_transformer_unmapped_field_0_LOOKUP_0.get(", self.optimized.fragments[0].source)
+
+    def test_inlines_trivial_transforms(self):
+        # Check our results
+        self.assertNotIn("_transform(", self.optimized.fragments[0].source)
+        self.assertIn("_transformer_unmapped_field_1_transform(extracted_data)", self.optimized.fragments[1].source)
+        self.assertIn("return 6", self.optimized.fragments[2].source)
+        self.assertNotIn("_convert_to_json_if_possible(transformer_unmapped_field_2_result)", self.optimized.link_logic)
+        self.assertIn("_convert_to_json_if_possible(transformer_unmapped_field_3_result)", self.optimized.link_logic)
+
+    def test_leaves_unsafe_code_alone(self):
+        # Check our results
+        for index in [4, 5]:
+            self.assertEqual(self.unoptimized.fragments[index].source, self.optimized.fragments[index].source)
+
+    def test_leaves_invalid_code_alone(self):
+        # Run our test
+        result = optimize_pattern_function("def transformer_x(input_data: str) -> str:\n    def extract(", DEPENDENCY_SETUP)
+
+        # Check our results
+        self.assertFalse(result.returns_json_value)
+        self.assertEqual("def transformer_x(input_data: str) -> str:\n    def extract(", result.code)
@@ -0,0 +1,90 @@
+from django.test import TestCase
+
+from backend.entities_expert.tests.helpers import make_extract_logic, make_pattern
+from backend.transformers.regex_fusion import fuse_extraction_regexes
+from backend.transformers.runtime import load_python_transformer
+from backend.transformers.transformers import create_transformer_python
+
+
+ENTRIES = [
+    "Mar 12 07:40:57 host1 sshd[4351]: Failed password for guest from 86.212.199.60 port 1617 ssh2",
+    "Mar  2 17:00:01 host2 CRON[99]: (root) CMD (run-parts /etc/cron.hourly)",
+    "",
+]
+
+JOIN_TRANSFORM_LOGIC = "def transform(extracted_values: typing.List[str]) -> str:\n    return '|'.join(str(value) for value in extracted_values)"
+
+def make_patterns(extract_logics):
+    return [make_pattern(index, extract_logic, JOIN_TRANSFORM_LOGIC) for index, extract_logic in enumerate(extract_logics)]
+
+# Anchored regexes, with overlapping group names, used in the ways a fused match supports
+ANCHORED_EXTRACTS = [
+    make_extract_logic("match = re.search(r'^(?P<month>\\w{3}) +(?P<day>\\d+)', input_entry)\nreturn [match.group('month'), match['day'], match.group(0)] if match else []"),
+    make_extract_logic("match = re.search(r'^\\w{3} +\\d+ [\\d:]+ (?P<host>\\S+) (?P<app>[^\\[:]+)(?:\\[(\\d+)\\])?:', input_entry)\nif match is None:\n    return []\nreturn [match.groupdict('-')['host'], match.group('app', 3), match.groups('none'), match.span('app')]"),
+    make_extract_logic("match = re.search(r'^(?P<month>\\w{3}).*sshd', input_entry, re.IGNORECASE)\nreturn [match.group('month'), match.end()] if match else ['no match']"),
+    make_extract_logic("match = re.search(r'^(\\w{3})', input_entry, flags=re.IGNORECASE)\nreturn [match.group(1)] if match and not match.start() else []"),
+]
+
+
+class FuseExtractionRegexesTestCase(TestCase):
+    def test_fused_transformer_is_equivalent(self):
+        # Set up test
+        patterns = make_patterns(ANCHORED_EXTRACTS)
+        fused = load_python_transformer(create_transformer_python("fused", patterns))
+        unfused = load_python_transformer(create_transformer_python("unfused", patterns, fuse_regexes=False))
+
+        # Run our test
+        fusion = fuse_extraction_regexes([pattern.extract_logic for pattern in patterns])
+
+        # Check our results
+        self.assertEqual([2, 2], [len(fused_regex.members) for fused_regex in fusion.fused_regexes])
+        for entry in ENTRIES:
+            self.assertEqual(unfused(entry), fused(entry))
+        self.assertEqual("Mar|12|Mar 12", fused(ENTRIES[0])["unmapped"]["field_0"])
+
+    def test_shares_repeated_unanchored_search(self):
+        # Set up test
+        extract_logics = [
+            make_extract_logic("# Find the user\nmatch = re.search(r'for (\\w+) from', input_entry)\nreturn [match.group(1)] if match else []"),
+            make_extract_logic("match = re.search(r'for (\\w+) from', input_entry)\nreturn [match.string] if match else []"),
+            make_extract_logic("match = re.search(r'port (\\d+)', input_entry)\nreturn [match.group(1)] if match else []"),
+        ]
+
+        # Run our test
+        fusion = fuse_extraction_regexes(extract_logics)
+
+        # Check our results
+        self.assertEqual([], fusion.fused_regexes)
+        self.assertIn("# Find the user", fusion.extract_logics[0])
+        self.assertIn("context.search(r'for (\\w+) from')", fusion.extract_logics[0])
+        self.assertIn('def extract(input_entry: str, context: "ParseContext")', fusion.extract_logics[1])
+        self.assertEqual(extract_logics[2], fusion.extract_logics[2])
+
+        transformer = load_python_transformer(create_transformer_python("test", make_patterns(extract_logics)))
+        self.assertEqual({"field_0": "guest", "field_1": ENTRIES[0], "field_2": 1617}, transformer(ENTRIES[0])["unmapped"])
+
+    def test_does_not_fuse_what_would_change_matches(self):
+        # Set up test
+        extract_logics = [
+            make_extract_logic("match = re.search(r'^Mar|sshd', input_entry)\nreturn [match.group(0)] if match else []"),
+            make_extract_logic("match = re.search(r'^(\\w)\\1', input_entry)\nreturn [match.group(0)] if match else []"),
+            make_extract_logic("match = re.search(r'^host', input_entry, re.MULTILINE)\nreturn [match.group(0)] if match else []"),
+            make_extract_logic("match = re.search(r'^\\w+', input_entry)\nreturn [match.re.pattern] if match else []"),
+            make_extract_logic("match = re.search(r'^\\w+ \\d+', input_entry)\nreturn [match.group(0)] if match else []"),
+            make_extract_logic("def first_word(input_entry):\n    match = re.search(r'^(\\w+)', input_entry)\n    return match.group(1) if match else None\nreturn [first_word(input_entry.split(' ')[-1])]"),
+            make_extract_logic("first_word = lambda input_entry: re.search(r'^(\\w+)', input_entry)\nmatch = first_word(input_entry[-4:])\nreturn [match.group(1)] if match else []"),
+        ]
+
+        # Run our test
+        fusion = fuse_extraction_regexes(extract_logics * 2)
+
+        # Check our results
+        self.assertEqual([], fusion.fused_regexes)
+        self.assertEqual(extract_logics[-2:] * 2, fusion.extract_logics[5:7] + fusion.extract_logics[12:])
+
+        patterns = make_patterns(extract_logics[-2:] * 2)
+        fused = load_python_transformer(create_transformer_python("fused", patterns))
+        unfused = load_python_transformer(create_transformer_python("unfused", patterns, fuse_regexes=False))
+        for entry in ["hello world", *ENTRIES[:2]]:
+            self.assertEqual(unfused(entry), fused(entry))
+        self.assertEqual("world", fused("hello world")["unmapped"]["field_0"])
@@ -0,0 +1,85 @@
+from django.test import TestCase
+
+from backend.transformers.routing import (AhoCorasickAutomaton, HeuristicRouter, InvalidHeuristicError, Route,
+                                          extract_required_literals, to_python_regex)
+
+
+class AhoCorasickAutomatonTestCase(TestCase):
+    def test_find_all_overlapping_needles(self):
+        automaton = AhoCorasickAutomaton(["he", "she", "his", "hers"])
+
+        self.assertEqual(automaton.find_all("ushers"), {0, 1, 3})
+        self.assertEqual(automaton.find_all("this"), {2})
+        self.assertEqual(automaton.find_all("nothing here"), {0})
+        self.assertEqual(automaton.find_all("xyz"), set())
+
+    def test_no_needles(self):
+        self.assertEqual(AhoCorasickAutomaton([]).find_all("anything"), set())
+
+
+class ExtractRequiredLiteralsTestCase(TestCase):
+    def test_literal_runs(self):
+        literals = extract_required_literals(r"^\w{3} \d+ sshd\[\d+\]: Failed password for")
+
+        self.assertIn(" sshd[", literals)
+        self.assertIn("]: Failed password for", literals)
+
+    def test_literals_inside_groups_and_repeats(self):
+        literals = extract_required_literals(r"(?:user=(\w+))+ (action)?")
+
+        self.assertIn("user=", literals)
+        self.assertNotIn("action", literals) # Optional, so not required
+
+    def test_alternation_is_not_required(self):
+        self.assertEqual(extract_required_literals(r"(?:foo|bar)"), [])
+
+    def test_case_insensitive_has_no_literals(self):
+        self.assertEqual(extract_required_literals(r"(?i)failed password"), [])
+        self.assertEqual(extract_required_literals(r"(?i:failed) password"), [" password"])
+
+    def test_javascript_named_groups(self):
+        self.assertEqual(to_python_regex(r"(?<user>\w+)(?<=x)(?<!y)"), r"(?P<user>\w+)(?<=x)(?<!y)")
+
+
+class HeuristicRouterTestCase(TestCase):
+    def setUp(self):
+        self.router = HeuristicRouter([
+            Route(transformer_id="ssh_failed", heuristic=r"sshd\[\d+\]: Failed password for"),
+            Route(transformer_id="ssh_session", heuristic=r"sshd\[\d+\]: pam_unix\(sshd:session\)"),
+            Route(transformer_id="okta", heuristic=r'"eventType":"(?<type>user\.session\.\w+)"'),
+            Route(transformer_id="catch_all_numbers", heuristic=r"^\d+$"),
+        ])
+
+    def test_route_happy_path(self):
+        self.assertEqual(
+            self.router.route("Thu Mar 12 2025 07:40:57 mailsv1 sshd[4351]: Failed password for invalid user guest"),
+            "ssh_failed"
+        )
+        self.assertEqual(
+            self.router.route("Thu Mar 12 2025 07:40:57 mailsv1 sshd[24947]: pam_unix(sshd:session): session opened"),
+            "ssh_session"
+        )
+        self.assertEqual(self.router.route('{"eventType":"user.session.start","published":"2025"}'), "okta")
+        self.assertEqual(self.router.route("12345"), "catch_all_numbers")
+
+    def test_route_no_match(self):
+        self.assertIsNone(self.router.route("sshd: Failed password for")) # Literal present, but full regex fails
+        self.assertIsNone(self.router.route("something else entirely"))
+
+    def test_route_prefers_earliest_route(self):
+        router = HeuristicRouter([
+            Route(transformer_id="specific", heuristic=r"Failed password for invalid user"),
+            Route(transformer_id="general", heuristic=r"Failed password"),
+        ])
+
+        self.assertEqual(router.route("Failed password for invalid user guest"), "specific")
+        self.assertEqual(router.route("Failed password for root"), "general")
+
+    def test_route_entries(self):
+        routed = list(self.router.route_entries(["12", "nope"]))
+
+        self.assertEqual(routed, [("catch_all_numbers", "12"), (None, "nope")])
+
+    def test_invalid_heuristic(self):
+        with self.assertRaises(InvalidHeuristicError):
+            HeuristicRouter([Route(transformer_id="bad", heuristic=r"(unclosed")])
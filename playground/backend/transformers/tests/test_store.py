@@ -0,0 +1,46 @@
+from django.test import TestCase
+
+from backend.transformers.store import TransformerNotFoundError, TransformerStore
+from backend.transformers.transformers import Transformer
+
+
+def make_transformer(transformer_id: str) -> Transformer:
+    return Transformer(id=transformer_id, dependency_setup="", transformer_logic="def transformer(input_entry):\n    return {}")
+
+
+class TransformerStoreTestCase(TestCase):
+    def test_get_stored_transformer(self):
+        # Set up test
+        store = TransformerStore()
+        transformer = make_transformer("a")
+        store.put(transformer)
+
+        # Run our test
+        stored = store.get("a")
+
+        # Check our results
+        self.assertIs(transformer, stored)
+
+    def test_unknown_transformer(self):
+        # Set up test
+        store = TransformerStore()
+
+        # Run our test
+        with self.assertRaises(TransformerNotFoundError):
+            store.get("a")
+
+    def test_least_recently_used_evicted(self):
+        # Set up test
+        store = TransformerStore(max_entries=2)
+        store.put(make_transformer("a"))
+        store.put(make_transformer("b"))
+
+        # Run our test
+        store.get("a")
+        store.put(make_transformer("c"))
+
+        # Check our results
+        self.assertEqual("a", store.get("a").id)
+        self.assertEqual("c", store.get("c").id)
+        with self.assertRaises(TransformerNotFoundError):
+            store.get("b")
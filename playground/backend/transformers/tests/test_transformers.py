@@ -0,0 +1,246 @@
+from dataclasses import replace
+
+from django.test import TestCase
+
+from backend.core.code_cache import get_python_code_cache
+from backend.entities_expert.extraction_pattern import ExtractionPattern
+from backend.entities_expert.tests.helpers import make_extract_logic, make_pattern
+from backend.transformers.routing import HeuristicRouter, Route
+from backend.transformers.runtime import (load_python_transformer, load_python_transformer_batch, make_transformer_batch, transform_lines,
+                                          transform_routed_lines)
+from backend.transformers.transformers import Transformer, create_transformer_python
+
+
+ENTRY = "user=alice src=10.0.0.1 action=login"
+
+def make_key_pattern(index: int, key: str, ocsf_path: str, suffix: str = "") -> ExtractionPattern:
+    return make_pattern(
+        index,
+        make_extract_logic(f"return re.findall(r'{key}=(\\S+)', input_entry)"),
+        f"def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] + {suffix!r}",
+        ocsf_path
+    )
+
+
+class CreateTransformerPythonTestCase(TestCase):
+    def setUp(self):
+        get_python_code_cache().clear()
+
+    def test_linked_transformer_matches_assembled_logic(self):
+        # Set up test
+        transformer = create_transformer_python("test", [
+            make_key_pattern(0, "user", "user.name"),
+            make_key_pattern(1, "src", "src_endpoint.ip"),
+            make_key_pattern(2, "action", "activity_name"),
+        ])
+        assembled = Transformer(id="test", dependency_setup=transformer.dependency_setup, transformer_logic=transformer.transformer_logic)
+
+        # Run our test
+        linked_output = load_python_transformer(transformer)(ENTRY)
+        assembled_output = load_python_transformer(assembled)(ENTRY)
+
+        # Check our results
+        self.assertEqual({"user": {"name": "alice"}, "src_endpoint": {"ip": "10.0.0.1"}, "activity_name": "login"}, linked_output)
+        self.assertEqual(assembled_output, linked_output)
+
+    def test_only_edited_patterns_are_recompiled(self):
+        # Set up test
+        patterns = [make_key_pattern(index, "user", f"unmapped.field_{index}", suffix=str(index)) for index in range(20)]
+        load_python_transformer(create_transformer_python("original", patterns))
+        misses_before = get_python_code_cache().get_stats().misses
+
+        # Run our test
+        patterns[7] = make_key_pattern(7, "user", "unmapped.field_7", suffix="!")
+        output = load_python_transformer(create_transformer_python("edited", patterns))(ENTRY)
+
+        # Check our results
+        self.assertEqual(1, get_python_code_cache().get_stats().misses - misses_before)
+        self.assertEqual("alice!", output["unmapped"]["field_7"])
+        self.assertEqual("alice8", output["unmapped"]["field_8"])
+
+    def test_parse_context_shared_by_patterns(self):
+        # Set up test
+        patterns = [make_key_pattern(0, "user", "user.name")]
+        for index, key in enumerate(["src", "action"], start=1):
+            patterns.append(make_pattern(
+                index,
+                f'def extract(input_entry: str, context: "ParseContext") -> typing.List[str]:\n    return [context.kv["{key}"], str(id(context))]',
+                "def transform(extracted_values: typing.List[str]) -> str:\n    return ' '.join(extracted_values)",
+                f"unmapped.{key}"
+            ))
+
+        # Run our test
+        output = load_python_transformer(create_transformer_python("test", patterns))(ENTRY)
+
+        # Check our results
+        self.assertEqual("alice", output["user"]["name"])
+        src, src_context_id = output["unmapped"]["src"].split(" ")
+        action, action_context_id = output["unmapped"]["action"].split(" ")
+        self.assertEqual(("10.0.0.1", "login"), (src, action))
+        self.assertEqual(src_context_id, action_context_id)
+
+    def test_dependency_setup_without_helper_imports(self):
+        # Set up test
+        pattern = replace(
+            make_pattern(0, make_extract_logic("return [input_entry.split(' ')[0].split('=')[1]]"), ocsf_path="user.name"),
+            dependency_setup="import json\nimport typing"
+        )
+
+        # Run our test
+        transformer = create_transformer_python("test", [pattern])
+
+        # Check our results
+        self.assertEqual({"user": {"name": "alice"}}, load_python_transformer(transformer)(ENTRY))
+        unlinked_transformer = Transformer(id="test", dependency_setup=transformer.dependency_setup, transformer_logic=transformer.transformer_logic)
+        self.assertEqual({"user": {"name": "alice"}}, load_python_transformer(unlinked_transformer)(ENTRY))
+
+
+    def test_output_built_from_ocsf_paths(self):
+        # Set up test
+        transformer = create_transformer_python("test", [
+            make_key_pattern(0, "user", "actor.user.name"),
+            make_key_pattern(1, "src", "src_endpoint.ip"),
+            make_key_pattern(2, "action", "actor.user.uid"),
+        ])
+
+        # Run our test
+        output = load_python_transformer(transformer)(ENTRY)
+
+        # Check our results
+        self.assertNotIn("set_path", transformer.transformer_logic)
+        self.assertEqual({"actor": {"user": {"name": "alice", "uid": "login"}}, "src_endpoint": {"ip": "10.0.0.1"}}, output)
+        self.assertEqual(["actor", "src_endpoint"], list(output.keys()))
+
+    def test_colliding_ocsf_paths_resolved_in_pattern_order(self):
+        # Set up test
+        transformer = create_transformer_python("test", [
+            make_key_pattern(0, "user", "actor.user"),
+            make_key_pattern(1, "src", "actor.user.name"),
+            make_key_pattern(2, "action", "device.name"),
+            make_key_pattern(3, "user", "device"),
+            make_key_pattern(4, "src", "activity_name"),
+            make_key_pattern(5, "action", "activity_name"),
+        ])
+
+        # Run our test
+        output = load_python_transformer(transformer)(ENTRY)
+
+        # Check our results
+        self.assertEqual({"actor": {"user": {"name": "10.0.0.1"}}, "device": "alice", "activity_name": "login"}, output)
+
+    def test_paths_beneath_another_patterns_output_merged(self):
+        # Set up test
+        user_pattern = make_pattern(0, make_extract_logic("return re.findall(r'user=(\\S+)', input_entry)"),
+                                    "def transform(extracted_values: typing.List[str]) -> str:\n    return json.dumps({'name': extracted_values[0]})", "user")
+        patterns = [
+            user_pattern,
+            make_key_pattern(1, "src", "user.uid"),
+            make_key_pattern(2, "action", "activity_name"),
+            make_key_pattern(3, "action", "activity_name.id"), # Beneath a value that isn't a dict, so it replaces it
+            make_key_pattern(4, "src", "device.ip"),
+            make_key_pattern(5, "user", "device"), # Replaces both the earlier path and anything merged beneath it
+            make_key_pattern(6, "action", "device.name"),
+        ]
+
+        for optimize in [True, False]:
+            with self.subTest(optimize=optimize):
+                # Run our test
+                transformer = create_transformer_python("test", patterns, optimize=optimize)
+                output = load_python_transformer(transformer)(ENTRY)
+                batch_output, _ = next(load_python_transformer_batch(transformer)([ENTRY]))
+
+                # Check our results
+                self.assertEqual({"user": {"name": "alice", "uid": "10.0.0.1"}, "activity_name": {"id": "login"}, "device": {"name": "login"}}, output)
+                self.assertEqual(output, batch_output)
+
+class TransformerBatchTestCase(TestCase):
+    def setUp(self):
+        self.transformer = create_transformer_python("test", [
+            make_key_pattern(0, "user", "user.name"),
+            make_key_pattern(1, "src", "src_endpoint.ip"),
+        ])
+
+    def test_batch_matches_transformer(self):
+        # Set up test
+        transformer_logic = load_python_transformer(self.transformer)
+        transformer_batch = load_python_transformer_batch(self.transformer)
+        lines = [ENTRY, "user=bob src=10.0.0.2", "src=10.0.0.3", "user=carol src=10.0.0.4"]
+
+        # Run our test
+        results = list(transformer_batch(lines))
+
+        # Check our results
+        self.assertIn("def transformer_batch(", self.transformer.link_logic)
+        self.assertEqual([transformer_logic(lines[0]), transformer_logic(lines[1]), None, transformer_logic(lines[3])], [output for output, _ in results])
+        self.assertEqual([None, None, "IndexError: list index out of range", None], [error for _, error in results])
+
+    def test_transform_lines_numbers_results(self):
+        # Set up test
+        lines = [ENTRY + "\n", "\n", "src=10.0.0.3\r\n", "user=bob src=10.0.0.2"]
+
+        # Run our test
+        batch_results = [result.to_json() for result in transform_lines(load_python_transformer_batch(self.transformer), lines)]
+        wrapped_results = [result.to_json() for result in transform_lines(make_transformer_batch(load_python_transformer(self.transformer)), lines)]
+
+        # Check our results
+        self.assertEqual([
+            {"line": 1, "output": {"user": {"name": "alice"}, "src_endpoint": {"ip": "10.0.0.1"}}},
+            {"line": 3, "error": "IndexError: list index out of range"},
+            {"line": 4, "output": {"user": {"name": "bob"}, "src_endpoint": {"ip": "10.0.0.2"}}},
+        ], batch_results)
+        self.assertEqual(batch_results, wrapped_results)
+
+    def test_transform_routed_lines(self):
+        # Set up test
+        action_transformer = create_transformer_python("action", [make_key_pattern(0, "action", "activity_name")])
+        router = HeuristicRouter([
+            Route(transformer_id="test", heuristic=r"^user="),
+            Route(transformer_id="action", heuristic=r"action=\w+"),
+        ])
+        transformer_batches = {"test": load_python_transformer_batch(self.transformer), "action": load_python_transformer_batch(action_transformer)}
+        lines = [ENTRY, "\n", "src=10.0.0.3 action=logout", "unrouted", "user=bob src=10.0.0.2", "user=carol"]
+
+        # Run our test
+        results = [result.to_json() for result in transform_routed_lines(router, transformer_batches, lines)]
+
+        # Check our results
+        self.assertEqual([
+            {"line": 1, "transformer_id": "test", "output": {"user": {"name": "alice"}, "src_endpoint": {"ip": "10.0.0.1"}}},
+            {"line": 3, "transformer_id": "action", "output": {"activity_name": "logout"}},
+            {"line": 4, "error": "The entry does not match the heuristic of any transformer"},
+            {"line": 5, "transformer_id": "test", "output": {"user": {"name": "bob"}, "src_endpoint": {"ip": "10.0.0.2"}}},
+            {"line": 6, "transformer_id": "test", "error": "IndexError: list index out of range"},
+        ], results)
+
+class SharedLogicTestCase(TestCase):
+    def make_counted_pattern(self, index: int, ocsf_path: str, transform_logic: str) -> ExtractionPattern:
+        # The extract logic counts its calls on the record's parse context
+        return make_pattern(
+            index,
+            'def extract(input_entry: str, context: "ParseContext") -> typing.List[str]:\n    context.calls = getattr(context, "calls", 0) + 1\n    return re.findall(r"user=(\\S+)", input_entry)',
+            transform_logic,
+            ocsf_path
+        )
+
+    def test_shared_logic_runs_once_per_record(self):
+        # Set up test
+        patterns = [
+            self.make_counted_pattern(0, "actor.user.name", "def transform(extracted_values: typing.List[str]) -> str:\n    return '[\"' + extracted_values[0] + '\"]'"),
+            self.make_counted_pattern(1, "user.uid", "def transform(extracted_values: typing.List[str]) -> str:\n    extracted_values.append('!')\n    return ''.join(extracted_values)"),
+            # The same logic as the first pattern, formatted differently
+            self.make_counted_pattern(2, "user.name", "def transform(extracted_values: typing.List[str]) -> str:\n    # Quote it\n    return '[\"' + extracted_values[0] + '\"]'"),
+        ]
+        patterns.append(make_pattern(3, 'def extract(input_entry: str, context: "ParseContext") -> typing.List[str]:\n    return [str(context.calls)]', ocsf_path="unmapped.calls"))
+
+        for optimize in [True, False]:
+            with self.subTest(optimize=optimize):
+                # Run our test
+                transformer = create_transformer_python("test", patterns, optimize=optimize)
+                output = load_python_transformer(transformer)(ENTRY)
+                batch_output, _ = next(load_python_transformer_batch(transformer)([ENTRY]))
+
+                # Check our results
+                self.assertEqual(3, len(transformer.fragments))
+                self.assertEqual({"actor": {"user": {"name": ["alice"]}}, "user": {"uid": "alice!", "name": ["alice"]}, "unmapped": {"calls": 1}}, output)
+                self.assertIsNot(output["actor"]["user"]["name"], output["user"]["name"])
+                self.assertEqual(output, batch_output)
@@ -1,20 +1,52 @@
+import ast
 from dataclasses import dataclass
+import hashlib
 import logging
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
 
 from backend.entities_expert.extraction_pattern import ExtractionPattern
+from backend.entities_expert.parse_context import PARSE_CONTEXT_CLASS_NAME, PARSE_CONTEXT_CODE, PARSE_CONTEXT_DEPENDENCY_SETUP, extract_accepts_parse_context
+from backend.transformers.optimizer import OPTIMIZED_JSON_CONVERSION_CODE, OptimizedPatternFunction, optimize_pattern_function
+from backend.transformers.regex_fusion import FUSED_SEARCHES_VARIABLE, RegexFusionResult, fuse_extraction_regexes
 from backend.core.validation_report import ValidationReport
 
 
 logger = logging.getLogger("backend")
 
 
+# The nested structure of a transformer's output; each leaf is the name of the variable holding its value
+OutputSkeleton = Dict[str, Union[str, "OutputSkeleton"]]
+
+# The values that are set beneath the value of another pattern, as the OCSF path's keys and the variable holding the value
+MergedOutputPaths = List[Tuple[List[str], str]]
+
+SET_OUTPUT_PATH_CODE = """
+def _set_output_path(output: typing.Dict[str, typing.Any], keys: typing.Tuple[str, ...], value: typing.Any):
+    # Sets a value beneath the value of another pattern, merging into that value if it is a dict and replacing it if not
+    for key in keys[:-1]:
+        if not isinstance(output.get(key), dict):
+            output[key] = {}
+        output = output[key]
+    output[keys[-1]] = value
+
+"""
+
+
+@dataclass
+class TransformerFragment:
+    function_name: str
+    source: str
+
 @dataclass
 class Transformer:
     id: str
     dependency_setup: str
     transformer_logic: str
     validation_report: ValidationReport = None
+    # When present, the pieces transformer_logic was assembled from; the runtime compiles each one separately so that
+    # unchanged pieces are reused from the code cache.  See load_python_transformer().
+    fragments: List[TransformerFragment] = None
+    link_logic: str = None
 
     def to_json(self) -> dict:
         return {
@@ -28,33 +60,75 @@ def _get_pattern_function_name(pattern: ExtractionPattern) -> str:
     # Generate a function name based on the pattern ID
     return f"transformer_{pattern.mapping.ocsf_path.replace('.', '_').replace('/', '_')}"
 
-def _get_pattern_function_code(pattern: ExtractionPattern) -> str:
+def _get_logic_key(*logics: str) -> str:
+    # Logic is compared by its syntax tree, so differences in formatting and comments don't matter
+    normalized_logics = []
+    for logic in logics:
+        try:
+            normalized_logics.append(ast.dump(ast.parse(logic)))
+        except SyntaxError:
+            normalized_logics.append(logic)
+    return hashlib.sha256("\0".join(normalized_logics).encode("utf-8")).hexdigest()[:16]
+
+def _is_extraction_worth_sharing(extract_logic: str) -> bool:
+    # Sharing an extraction costs a lookup in the parse context, which is only worth it if the extraction does more than
+    # return a literal or read an attribute, i.e. if it calls something
+    try:
+        return any(isinstance(node, ast.Call) for node in ast.walk(ast.parse(extract_logic)))
+    except SyntaxError:
+        return False
+
+def _get_shared_extraction_keys(patterns: List[ExtractionPattern]) -> List[Optional[str]]:
+    # The key of each pattern's extraction if another pattern has the same one, so it can be run once per record
+    extraction_keys = [
+        _get_logic_key(pattern.dependency_setup, pattern.extract_logic) if _is_extraction_worth_sharing(pattern.extract_logic) else None
+        for pattern in patterns
+    ]
+    shared_keys = {key for key in extraction_keys if key and extraction_keys.count(key) > 1}
+    return [key if key in shared_keys else None for key in extraction_keys]
+
+def _get_duplicated_patterns(patterns: List[ExtractionPattern]) -> Dict[int, int]:
+    # Maps the index of each pattern whose logic is the same as an earlier pattern's to the index of the earliest one
+    first_indices = {}
+    duplicated_patterns = {}
+    for index, pattern in enumerate(patterns):
+        key = _get_logic_key(pattern.dependency_setup, pattern.extract_logic, pattern.transform_logic)
+        if key in first_indices:
+            duplicated_patterns[index] = first_indices[key]
+        else:
+            first_indices[key] = index
+    return duplicated_patterns
+
+def _get_pattern_function_code(pattern: ExtractionPattern, extract_logic: str, extraction_key: Optional[str] = None) -> str:
     # Ensure the extract and transform logic are properly indented by adding 4 spaces to each line
-    indented_extract_logic = "\n    ".join(pattern.extract_logic.splitlines())
+    indented_extract_logic = "\n    ".join(extract_logic.splitlines())
     indented_transform_logic = "\n    ".join(pattern.transform_logic.splitlines())
 
+    # Extract logic that takes a second parameter gets the record's shared parse context
+    extract_args = "input_data, context" if extract_accepts_parse_context(extract_logic) else "input_data"
+    # Extract logic shared with other patterns is run once per record, through the parse context
+    extract_call = f"context.shared_extract({extraction_key!r}, extract, {extract_args})" if extraction_key else f"extract({extract_args})"
+
     # Create/return the function code
     return f"""
-def {_get_pattern_function_name(pattern)}(input_data: str) -> str:
+def {_get_pattern_function_name(pattern)}(input_data: str, context: "{PARSE_CONTEXT_CLASS_NAME}") -> str:
     {indented_extract_logic}
 
     {indented_transform_logic}
 
-    extracted_data = extract(input_data)
+    extracted_data = {extract_call}
     transformed_data = transform(extracted_data)
     return transformed_data
 """
 
-def _get_helper_code() -> str:
-    return """
-def set_path(d: typing.Dict[str, typing.Any], path: str, value: typing.Any) -> None:
-    keys = path.split('.')
-    for key in keys[:-1]:
-        if key not in d or not isinstance(d[key], dict):
-            d[key] = {}
-        d = d[key]
-    d[keys[-1]] = value
+def _get_helper_code(optimize: bool) -> str:
+    # The link logic runs under the first pattern's dependency setup, which is editable, so it imports what it needs itself
+    helper_code = f"\n{PARSE_CONTEXT_DEPENDENCY_SETUP}\n{PARSE_CONTEXT_CODE}{SET_OUTPUT_PATH_CODE}"
+
+    if optimize:
+        return helper_code + OPTIMIZED_JSON_CONVERSION_CODE
 
+    return helper_code + """
 def _convert_to_json_if_possible(value: str) -> typing.Any:
     try:
         return json.loads(value)
@@ -63,42 +137,182 @@ def _convert_to_json_if_possible(value: str) -> typing.Any:
 
 """
 
-def _get_transformer_wrapper_code(patterns: List[ExtractionPattern]) -> str:
+def _get_output_skeleton(patterns: List[ExtractionPattern]) -> Tuple[OutputSkeleton, MergedOutputPaths]:
+    """
+    Works out the nested structure of the transformer's output from the patterns' OCSF paths, with each leaf holding
+    the name of the variable its value is stored in.  Paths that collide are resolved in pattern order, the later
+    pattern winning: a path replaces anything already at or beneath it.  A path through the value of an earlier pattern
+    can't be part of the structure, since that value is only known at runtime, so it is returned separately to be
+    merged into the output afterwards.
+    """
+    skeleton = {}
+    merged_paths = []
+    for pattern in patterns:
+        keys = pattern.mapping.ocsf_path.split(".")
+        variable_name = f"{_get_pattern_function_name(pattern)}_result"
+
+        node = skeleton
+        for key in keys[:-1]:
+            if isinstance(node.get(key), str):
+                break
+            node = node.setdefault(key, {})
+        else:
+            if keys[-1] in node:
+                logger.warning(f"OCSF path {pattern.mapping.ocsf_path} replaces the output of another pattern")
+            node[keys[-1]] = variable_name
+            merged_paths = [(merged_keys, name) for merged_keys, name in merged_paths if merged_keys[:len(keys)] != keys]
+            continue
+
+        logger.warning(f"OCSF path {pattern.mapping.ocsf_path} is set beneath the output of another pattern at {key}")
+        merged_paths.append((keys, variable_name))
+
+    return skeleton, merged_paths
+
+def _get_output_literal_code(skeleton: OutputSkeleton, indent: int) -> str:
+    if not skeleton:
+        return "{}"
+
+    literal_code = "{\n"
+    for key, value in skeleton.items():
+        value_code = value if isinstance(value, str) else _get_output_literal_code(value, indent + 4)
+        literal_code += f"{' ' * (indent + 4)}{key!r}: {value_code},\n"
+    literal_code += f"{' ' * indent}}}"
+
+    return literal_code
+
+def _get_record_code(patterns: List[ExtractionPattern], pattern_functions: List[OptimizedPatternFunction], duplicated_patterns: Dict[int, int], regex_fusion: RegexFusionResult, indent: int, name_prefix: str = "") -> str:
+    # The statements that compute each pattern's result for the record in input_data.  Module-level names are looked up
+    # with the prefix, so a caller can bind them to local variables first.
+    padding = " " * indent
+    fused_searches = f", {name_prefix}{FUSED_SEARCHES_VARIABLE}" if regex_fusion.fused_regexes else ""
+    record_code = f"{padding}context = {name_prefix}{PARSE_CONTEXT_CLASS_NAME}(input_data{fused_searches})\n\n"
+
+    # Patterns with the same logic as an earlier one aren't run; they get their own conversion of its result instead
+    for index, pattern in enumerate(patterns):
+        if index not in duplicated_patterns:
+            function_name = _get_pattern_function_name(pattern)
+            record_code += f"{padding}{function_name}_result = {name_prefix}{function_name}(input_data, context)\n"
+    record_code += "\n"
+
+    for index, original_index in duplicated_patterns.items():
+        function_name = _get_pattern_function_name(patterns[index])
+        original_function_name = _get_pattern_function_name(patterns[original_index])
+        if pattern_functions[original_index].returns_json_value:
+            record_code += f"{padding}{function_name}_result = {original_function_name}_result\n"
+        else:
+            record_code += f"{padding}{function_name}_result = {name_prefix}_convert_to_json_if_possible({original_function_name}_result)\n"
+
+    for index, (pattern, pattern_function) in enumerate(zip(patterns, pattern_functions)):
+        if index not in duplicated_patterns and not pattern_function.returns_json_value:
+            function_name = _get_pattern_function_name(pattern)
+            record_code += f"{padding}{function_name}_result = {name_prefix}_convert_to_json_if_possible({function_name}_result)\n"
+    record_code += "\n"
+
+    return record_code
+
+def _get_merge_code(merged_paths: MergedOutputPaths, indent: int, name_prefix: str = "") -> str:
+    return "".join(f"{' ' * indent}{name_prefix}_set_output_path(output, {tuple(keys)!r}, {variable_name})\n" for keys, variable_name in merged_paths)
+
+def _get_transformer_wrapper_code(patterns: List[ExtractionPattern], pattern_functions: List[OptimizedPatternFunction], duplicated_patterns: Dict[int, int], regex_fusion: RegexFusionResult) -> str:
     # Create a wrapper function that chains the extract and transform calls
     wrapper_code = "\n"
     wrapper_code += "def transformer(input_data: str) -> typing.Dict[str, typing.Any]:\n"
-    wrapper_code += "    output = {}\n\n"
+    wrapper_code += _get_record_code(patterns, pattern_functions, duplicated_patterns, regex_fusion, 4)
 
-    for pattern in patterns:
-        pattern_path = pattern.mapping.ocsf_path
-        function_name = _get_pattern_function_name(pattern)
-        wrapper_code += f"    {function_name}_result = {function_name}(input_data)\n"
-        wrapper_code += f"    {function_name}_result = _convert_to_json_if_possible({function_name}_result)\n"
-        wrapper_code += f"    set_path(output, '{pattern_path}', {function_name}_result)\n"
-        wrapper_code += "\n"
-    
+    # Build the whole output in one expression, rather than walking the OCSF path of each value into it
+    skeleton, merged_paths = _get_output_skeleton(patterns)
+    if not merged_paths:
+        wrapper_code += f"    return {_get_output_literal_code(skeleton, 4)}\n"
+        return wrapper_code
+
+    wrapper_code += f"    output = {_get_output_literal_code(skeleton, 4)}\n"
+    wrapper_code += _get_merge_code(merged_paths, 4)
     wrapper_code += "    return output\n"
-    
+
     return wrapper_code
 
+def _get_transformer_batch_code(patterns: List[ExtractionPattern], pattern_functions: List[OptimizedPatternFunction], duplicated_patterns: Dict[int, int], regex_fusion: RegexFusionResult) -> str:
+    # Create a generator that transforms many records per call, with the same per-record logic as the wrapper function.
+    # The module-level names it uses are bound to locals once per batch rather than looked up for every record.
+    skeleton, merged_paths = _get_output_skeleton(patterns)
+
+    global_names = [PARSE_CONTEXT_CLASS_NAME, "_convert_to_json_if_possible"]
+    global_names += [_get_pattern_function_name(pattern) for index, pattern in enumerate(patterns) if index not in duplicated_patterns]
+    if regex_fusion.fused_regexes:
+        global_names.append(FUSED_SEARCHES_VARIABLE)
+    if merged_paths:
+        global_names.append("_set_output_path")
+
+    batch_code = "\n"
+    batch_code += "def transformer_batch(lines: typing.Iterable[str]) -> typing.Iterator[typing.Tuple[typing.Optional[typing.Dict[str, typing.Any]], typing.Optional[str]]]:\n"
+    for global_name in dict.fromkeys(global_names):
+        batch_code += f"    _local_{global_name} = {global_name}\n"
+    batch_code += "\n"
+    batch_code += "    for input_data in lines:\n"
+    batch_code += "        try:\n"
+    batch_code += _get_record_code(patterns, pattern_functions, duplicated_patterns, regex_fusion, 12, name_prefix="_local_")
+    batch_code += f"            output = {_get_output_literal_code(skeleton, 12)}\n"
+    batch_code += _get_merge_code(merged_paths, 12, name_prefix="_local_")
+    batch_code += "        except Exception as e:\n"
+    batch_code += "            yield None, f\"{type(e).__name__}: {str(e)}\"\n"
+    batch_code += "            continue\n"
+    batch_code += "        yield output, None\n"
 
-def create_transformer_python(transformer_id: str, patterns: List[ExtractionPattern]) -> Transformer:
+    return batch_code
+
+
+def create_transformer_python(transformer_id: str, patterns: List[ExtractionPattern], fuse_regexes: bool = True, optimize: bool = True) -> Transformer:
     transformer_logic = ""
+    fragments = []
+    pattern_functions = []
 
-    # Add all the individual pattern functions to the transformer logic
-    for pattern in patterns:
-        function_code = _get_pattern_function_code(pattern)
-        transformer_logic += function_code
+    # Patterns often share logic, such as when one value is mapped to several OCSF paths.  A pattern whose extract and
+    # transform logic are both the same as an earlier one's reuses its result, and patterns that only share their
+    # extract logic run it once per record between them.
+    duplicated_patterns = _get_duplicated_patterns(patterns)
+    extraction_keys = _get_shared_extraction_keys(patterns)
+
+    # Share the regex searches of the input between the patterns, so each distinct regex runs once per record.  Only
+    # one copy of each shared extract logic is considered, since the others won't be run.
+    distinct_indices = {}
+    for index, extraction_key in enumerate(extraction_keys):
+        distinct_indices.setdefault(extraction_key or index, index)
+    extract_logics = [patterns[index].extract_logic for index in distinct_indices.values()]
+    regex_fusion = fuse_extraction_regexes(extract_logics) if fuse_regexes else RegexFusionResult(extract_logics=extract_logics)
+    fused_extract_logics = dict(zip(distinct_indices.values(), regex_fusion.extract_logics))
+
+    # Add all the individual pattern functions to the transformer logic.  Each one is also kept as a fragment with its
+    # own dependency setup, so it can be compiled without the rest of the transformer.
+    for index, (pattern, extraction_key) in enumerate(zip(patterns, extraction_keys)):
+        if index in duplicated_patterns:
+            pattern_functions.append(pattern_functions[duplicated_patterns[index]])
+            continue
 
-    # Add any helper code
-    helper_code = _get_helper_code()
-    transformer_logic += helper_code
+        extract_logic = fused_extract_logics[distinct_indices[extraction_key or index]]
+        function_code = _get_pattern_function_code(pattern, extract_logic, extraction_key)
+        if optimize:
+            pattern_function = optimize_pattern_function(function_code, pattern.dependency_setup)
+        else:
+            pattern_function = OptimizedPatternFunction(code=function_code)
+        pattern_functions.append(pattern_function)
+
+        function_code = pattern_function.code
+        transformer_logic += function_code
+        fragments.append(TransformerFragment(
+            function_name=_get_pattern_function_name(pattern),
+            source=f"{pattern.dependency_setup}\n\n{function_code}"
+        ))
 
-    # Add the wrapper function for the transformer logic
-    transformer_logic += _get_transformer_wrapper_code(patterns)
+    # Add any helper code and the entry points for the transformer logic; these link the fragments together
+    link_logic = _get_helper_code(optimize) + regex_fusion.get_link_code()
+    link_logic += _get_transformer_wrapper_code(patterns, pattern_functions, duplicated_patterns, regex_fusion)
+    link_logic += _get_transformer_batch_code(patterns, pattern_functions, duplicated_patterns, regex_fusion)
+    transformer_logic += link_logic
 
     return Transformer(
         id=transformer_id,
         dependency_setup=patterns[0].dependency_setup if patterns else "",
-        transformer_logic=transformer_logic
+        transformer_logic=transformer_logic,
+        fragments=fragments,
+        link_logic=link_logic
     )
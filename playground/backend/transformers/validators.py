@@ -1,15 +1,17 @@
 from abc import ABC, abstractmethod
+from functools import partial
 import json
 import logging
-from types import ModuleType
 from typing import Any, Callable, Dict
 
 from backend.core.ocsf.ocsf_schema_v1_1_0 import OCSF_SCHEMA as OCSF_SCHEMA_V1_1_0
 from backend.core.ocsf.ocsf_schemas import make_get_ocsf_event_schema, make_get_ocsf_object_schemas, PrintableOcsfObject
+from backend.core.ocsf.ocsf_validators import get_compiled_ocsf_event_validator
 from backend.core.ocsf.ocsf_versions import OcsfVersion
+from backend.core.sandbox import get_sandbox_pool
 from backend.core.validation_report import ValidationReport
-from backend.core.validators import PythonLogicInvalidSyntaxError, PythonLogicNotInModuleError, PythonLogicNotExecutableError
 
+from backend.transformers.runtime import check_python_transformer, invoke_python_transformer, load_python_transformer
 from backend.transformers.transformers import Transformer
 
 
@@ -158,6 +160,18 @@ class OcsfV1_1_0TransformValidator(TransformerValidatorBase):
         schema = OCSF_SCHEMA_V1_1_0
         
         report.append_entry(f"Validating the transform output against the OCSF Schema for version {ocsf_version.value} and category {self.event_name}...", logger.info)
+
+        # Check the output with the compiled validator for the event class first.  It is much cheaper than the detailed
+        # walk below, which we only need in order to explain why an output does not conform.
+        try:
+            validate_event = get_compiled_ocsf_event_validator(schema, self.event_name)
+        except ValueError as e:
+            report.append_entry(f"Schema validation error: {str(e)}", logger.error)
+            raise
+
+        if validate_event(transformer_output):
+            report.append_entry("Transform output conforms to the OCSF schema", logger.info)
+            return
         
         # Get the specific schemas in use for the event class
         try:
@@ -181,18 +195,10 @@ class OcsfV1_1_0TransformValidator(TransformerValidatorBase):
         
 class PythonOcsfV1_1_0TransformValidator(OcsfV1_1_0TransformValidator):
     def _load_transformer_logic(self, transformer: Transformer) -> Callable[[str], str]:
-        # Take the raw logic and attempt to load it into an executable form
-        try:
-            transformer_module = ModuleType("transformer")
-            exec(f"{transformer.dependency_setup}\n\n{transformer.transformer_logic}", transformer_module.__dict__)
-        except SyntaxError as e:
-            raise PythonLogicInvalidSyntaxError(f"Syntax error in the extract logic: {str(e)}")
-
-        # Confirm we can pull out usable extract logic
-        if not hasattr(transformer_module, "transformer"):
-            raise PythonLogicNotInModuleError("The transformer logic does not contain a member named 'transformer'")
-        
-        if not callable(transformer_module.transformer):
-            raise PythonLogicNotExecutableError("The 'transformer' attribute must be an executable function")
-        
-        return transformer_module.transformer
\ No newline at end of file
+        sandbox_pool = get_sandbox_pool()
+        if sandbox_pool is None:
+            return load_python_transformer(transformer)
+
+        # Load and invoke the logic in the sandbox, so that a runaway transformer can't hang or crash this process
+        sandbox_pool.run(check_python_transformer, transformer)
+        return partial(sandbox_pool.run, invoke_python_transformer, transformer)
\ No newline at end of file
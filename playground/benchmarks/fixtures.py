@@ -0,0 +1,295 @@
+from dataclasses import dataclass
+import json
+import logging
+import random
+from typing import Callable, Dict, List, Tuple
+
+from backend.entities_expert.entities import EntityMapping
+from backend.entities_expert.extraction_pattern import ExtractionPattern
+from backend.entities_expert.tool_def import generate_extraction_patterns, PythonExtractionPatternInput
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module contains a library of extraction patterns for common log formats, written the way the Extraction Expert
+writes them, along with generators for entries of each format.  They are used to build realistic Transformers for
+benchmarking without invoking an LLM.
+"""
+
+
+@dataclass
+class BenchmarkFixture:
+    name: str
+    ocsf_event_name: str
+    patterns: List[ExtractionPattern]
+    make_entry: Callable[[random.Random], str]
+
+    def make_entries(self, count: int, seed: int = 0) -> List[str]:
+        rng = random.Random(seed)
+        return [self.make_entry(rng) for _ in range(count)]
+
+
+def _make_patterns(fixture_name: str, pattern_defs: List[Tuple[str, str, str]]) -> List[ExtractionPattern]:
+    # Go through the same tool function the Extraction Expert's output does, so the dependency setup matches
+    patterns = generate_extraction_patterns([
+        PythonExtractionPatternInput(id=f"{fixture_name}-{index}", extract_logic=extract_logic, transform_logic=transform_logic)
+        for index, (_, extract_logic, transform_logic) in enumerate(pattern_defs)
+    ])
+    for pattern, (ocsf_path, _, _) in zip(patterns, pattern_defs):
+        pattern.mapping = EntityMapping(id=pattern.id, entities=[], ocsf_path=ocsf_path, path_rationale="Benchmark fixture")
+    return patterns
+
+def _constant(ocsf_path: str, value: str) -> Tuple[str, str, str]:
+    return (
+        ocsf_path,
+        "def extract(input_entry: str) -> typing.List[str]:\n    return []",
+        f"def transform(extracted_values: typing.List[str]) -> str:\n    return {value!r}"
+    )
+
+def _random_ip(rng: random.Random) -> str:
+    return ".".join(str(rng.randint(1, 254)) for _ in range(4))
+
+
+# AWS CloudTrail records, one JSON object per line
+def _make_cloudtrail_entry(rng: random.Random) -> str:
+    account_id = str(rng.randint(100000000000, 999999999999))
+    return json.dumps({
+        "eventVersion": "1.08",
+        "userIdentity": {
+            "type": "IAMUser",
+            "principalId": f"AIDA{rng.randint(10**15, 10**16 - 1)}",
+            "arn": f"arn:aws:iam::{account_id}:user/user{rng.randint(1, 50)}",
+            "accountId": account_id,
+            "userName": f"user{rng.randint(1, 50)}"
+        },
+        "eventTime": f"2025-03-{rng.randint(10, 28)}T{rng.randint(10, 23)}:{rng.randint(10, 59)}:{rng.randint(10, 59)}Z",
+        "eventSource": rng.choice(["s3.amazonaws.com", "ec2.amazonaws.com", "iam.amazonaws.com"]),
+        "eventName": rng.choice(["GetObject", "DescribeInstances", "ListUsers", "PutObject"]),
+        "awsRegion": rng.choice(["us-east-1", "us-west-2", "eu-west-1"]),
+        "sourceIPAddress": _random_ip(rng),
+        "userAgent": rng.choice(["aws-cli/2.15.0 Python/3.11.6", "Boto3/1.34.0 Python/3.12.1", "console.amazonaws.com"]),
+        "requestParameters": {"bucketName": f"bucket-{rng.randint(1, 20)}", "key": f"data/{rng.randint(1, 10**6)}.json"},
+        "responseElements": None,
+        "requestID": f"{rng.getrandbits(64):016X}",
+        "eventID": f"{rng.getrandbits(128):032x}",
+        "readOnly": rng.choice([True, False]),
+        "eventType": "AwsApiCall",
+        "recipientAccountId": account_id
+    })
+
+_CLOUDTRAIL_JSON_EXTRACT = "def extract(input_entry: str) -> typing.List[str]:\n    data = json.loads(input_entry)\n    return [{lookup}]"
+_CLOUDTRAIL_PATTERNS = [
+    ("time", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['eventTime']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n"
+        "    parsed = datetime.datetime.strptime(extracted_values[0], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)\n"
+        "    return str(int(parsed.timestamp() * 1000))"),
+    ("api.operation", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['eventName']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("api.service.name", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['eventSource']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("api.request.uid", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['requestID']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("cloud.region", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['awsRegion']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("src_endpoint.ip", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['sourceIPAddress']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("http_request.user_agent", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data.get('userAgent', '')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("actor.user.uid", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['userIdentity']['arn']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("actor.user.name", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['userIdentity'].get('userName', '')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("cloud.account.uid", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['recipientAccountId']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    ("activity_id", _CLOUDTRAIL_JSON_EXTRACT.format(lookup="data['eventName']"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n"
+        "    name = extracted_values[0]\n"
+        "    if name.startswith(('Create', 'Put', 'Run')):\n"
+        "        return '1'\n"
+        "    if name.startswith(('Get', 'Describe', 'List')):\n"
+        "        return '2'\n"
+        "    if name.startswith(('Update', 'Modify')):\n"
+        "        return '3'\n"
+        "    if name.startswith('Delete'):\n"
+        "        return '4'\n"
+        "    return '99'"),
+    _constant("category_uid", "6"),
+    _constant("class_uid", "6003"),
+    _constant("type_uid", "600399"),
+    _constant("severity_id", "1"),
+    _constant("cloud.provider", "AWS"),
+    _constant("metadata.product.name", "CloudTrail"),
+    _constant("metadata.product.vendor_name", "AWS"),
+    _constant("metadata.version", "1.1.0"),
+]
+
+
+# The same mappings, written to read the entry from the transformer's shared parse context rather than parsing it again
+# in each pattern
+_CLOUDTRAIL_JSON_PARSE = "def extract(input_entry: str) -> typing.List[str]:\n    data = json.loads(input_entry)"
+_CLOUDTRAIL_CONTEXT_PARSE = "def extract(input_entry: str, context: \"ParseContext\") -> typing.List[str]:\n    data = context.json"
+_CLOUDTRAIL_CONTEXT_PATTERNS = [
+    (ocsf_path, extract_logic.replace(_CLOUDTRAIL_JSON_PARSE, _CLOUDTRAIL_CONTEXT_PARSE), transform_logic)
+    for ocsf_path, extract_logic, transform_logic in _CLOUDTRAIL_PATTERNS
+]
+
+# sshd authentication messages in the BSD syslog format
+def _make_syslog_entry(rng: random.Random) -> str:
+    outcome, method = rng.choice([("Failed", "password"), ("Accepted", "password"), ("Accepted", "publickey")])
+    invalid = "invalid user " if outcome == "Failed" and rng.random() < 0.5 else ""
+    return (
+        f"{rng.choice(['Jan', 'Feb', 'Mar', 'Apr'])} {rng.randint(1, 28):>2} {rng.randint(0, 23):02}:{rng.randint(0, 59):02}:{rng.randint(0, 59):02} "
+        f"host{rng.randint(1, 9)} sshd[{rng.randint(1000, 65000)}]: {outcome} {method} for {invalid}{rng.choice(['root', 'admin', 'guest', 'deploy'])} "
+        f"from {_random_ip(rng)} port {rng.randint(1024, 65535)} ssh2"
+    )
+
+_SYSLOG_PREFIX = r"^(?P<month>\w{3}) +(?P<day>\d+) (?P<time>[\d:]+) (?P<host>\S+) sshd\[(?P<pid>\d+)\]: (?P<outcome>\w+) (?P<method>\w+) for (?:invalid user )?(?P<user>\S+) from (?P<ip>[\d.]+) port (?P<port>\d+)"
+# The prefix has regex quantifiers in braces, so the groups are substituted with replace() rather than format()
+_SYSLOG_EXTRACT = "def extract(input_entry: str) -> typing.List[str]:\n    match = re.search(r'" + _SYSLOG_PREFIX + "', input_entry)\n    return [{groups}] if match else []"
+_SYSLOG_PATTERNS = [
+    ("time", _SYSLOG_EXTRACT.replace("{groups}", "match.group('month'), match.group('day'), match.group('time')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n"
+        "    parsed = datetime.datetime.strptime(f\"2025 {extracted_values[0]} {extracted_values[1]} {extracted_values[2]}\", '%Y %b %d %H:%M:%S')\n"
+        "    return str(int(parsed.replace(tzinfo=datetime.timezone.utc).timestamp() * 1000))"),
+    ("device.hostname", _SYSLOG_EXTRACT.replace("{groups}", "match.group('host')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("user.name", _SYSLOG_EXTRACT.replace("{groups}", "match.group('user')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("src_endpoint.ip", _SYSLOG_EXTRACT.replace("{groups}", "match.group('ip')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("src_endpoint.port", _SYSLOG_EXTRACT.replace("{groups}", "match.group('port')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("status", _SYSLOG_EXTRACT.replace("{groups}", "match.group('outcome')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return 'Success' if extracted_values and extracted_values[0] == 'Accepted' else 'Failure'"),
+    ("status_id", _SYSLOG_EXTRACT.replace("{groups}", "match.group('outcome')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return '1' if extracted_values and extracted_values[0] == 'Accepted' else '2'"),
+    ("auth_protocol", _SYSLOG_EXTRACT.replace("{groups}", "match.group('method')"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return {'password': 'Password', 'publickey': 'Public Key'}.get(extracted_values[0], 'Other') if extracted_values else 'Unknown'"),
+    ("raw_data", "def extract(input_entry: str) -> typing.List[str]:\n    return [input_entry]",
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"),
+    _constant("activity_id", "1"),
+    _constant("category_uid", "3"),
+    _constant("class_uid", "3002"),
+    _constant("type_uid", "300201"),
+    _constant("severity_id", "1"),
+    _constant("metadata.product.name", "OpenSSH"),
+    _constant("metadata.version", "1.1.0"),
+]
+
+
+# Firewall traffic logs made of space-delimited key=value pairs
+def _make_kv_entry(rng: random.Random) -> str:
+    return (
+        f"date=2025-03-{rng.randint(10, 28)} time={rng.randint(10, 23)}:{rng.randint(10, 59)}:{rng.randint(10, 59)} devname=\"fw{rng.randint(1, 4):02}\" "
+        f"logid=\"0000000013\" type=\"traffic\" subtype=\"forward\" level=\"notice\" srcip={_random_ip(rng)} srcport={rng.randint(1024, 65535)} "
+        f"dstip={_random_ip(rng)} dstport={rng.choice([22, 53, 80, 443, 3389])} proto={rng.choice([6, 17])} action=\"{rng.choice(['accept', 'deny', 'close'])}\" "
+        f"policyid={rng.randint(1, 200)} sentbyte={rng.randint(0, 10**6)} rcvdbyte={rng.randint(0, 10**7)} duration={rng.randint(0, 3600)}"
+    )
+
+_KV_EXTRACT = "def extract(input_entry: str) -> typing.List[str]:\n    match = re.search(r'(?:^| ){key}=\"?([^\" ]*)\"?', input_entry)\n    return [match.group(1)] if match else []"
+_KV_PATTERNS = [
+    ("time", "def extract(input_entry: str) -> typing.List[str]:\n"
+        "    date = re.search(r'(?:^| )date=(\\S+)', input_entry)\n"
+        "    time = re.search(r'(?:^| )time=(\\S+)', input_entry)\n"
+        "    return [date.group(1), time.group(1)] if date and time else []",
+        "def transform(extracted_values: typing.List[str]) -> str:\n"
+        "    parsed = datetime.datetime.strptime(' '.join(extracted_values), '%Y-%m-%d %H:%M:%S').replace(tzinfo=datetime.timezone.utc)\n"
+        "    return str(int(parsed.timestamp() * 1000))"),
+    ("device.hostname", _KV_EXTRACT.format(key="devname"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("src_endpoint.ip", _KV_EXTRACT.format(key="srcip"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("src_endpoint.port", _KV_EXTRACT.format(key="srcport"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("dst_endpoint.ip", _KV_EXTRACT.format(key="dstip"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("dst_endpoint.port", _KV_EXTRACT.format(key="dstport"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("connection_info.protocol_num", _KV_EXTRACT.format(key="proto"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("connection_info.protocol_name", _KV_EXTRACT.format(key="proto"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return {'6': 'tcp', '17': 'udp'}.get(extracted_values[0], 'other') if extracted_values else ''"),
+    ("traffic.bytes_out", _KV_EXTRACT.format(key="sentbyte"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else '0'"),
+    ("traffic.bytes_in", _KV_EXTRACT.format(key="rcvdbyte"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else '0'"),
+    ("duration", _KV_EXTRACT.format(key="duration"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return str(int(extracted_values[0]) * 1000) if extracted_values else '0'"),
+    ("activity_id", _KV_EXTRACT.format(key="action"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return {'accept': '6', 'deny': '5', 'close': '2'}.get(extracted_values[0], '99') if extracted_values else '0'"),
+    _constant("category_uid", "4"),
+    _constant("class_uid", "4001"),
+    _constant("type_uid", "400106"),
+    _constant("severity_id", "1"),
+    _constant("metadata.product.name", "FortiGate"),
+    _constant("metadata.version", "1.1.0"),
+]
+
+
+# ArcSight Common Event Format records
+def _make_cef_entry(rng: random.Random) -> str:
+    signature, name = rng.choice([("100", "worm successfully stopped"), ("200", "port scan detected"), ("300", "malware quarantined")])
+    return (
+        f"CEF:0|Security|threatmanager|1.0|{signature}|{name}|{rng.randint(1, 10)}|"
+        f"src={_random_ip(rng)} spt={rng.randint(1024, 65535)} dst={_random_ip(rng)} dpt={rng.choice([80, 443, 445])} "
+        f"suser={rng.choice(['alice', 'bob', 'carol'])} act={rng.choice(['blocked', 'allowed'])} rt={rng.randint(1735689600000, 1767225600000)} "
+        f"msg=Detected by sensor {rng.randint(1, 20)}"
+    )
+
+_CEF_HEADER_EXTRACT = "def extract(input_entry: str) -> typing.List[str]:\n    fields = input_entry.split('|', 7)\n    return [fields[{index}]] if len(fields) > {index} else []"
+_CEF_EXTENSION_EXTRACT = "def extract(input_entry: str) -> typing.List[str]:\n    extension = input_entry.split('|', 7)[-1]\n    match = re.search(r'(?:^| ){key}=(.*?)(?= \\w+=|$)', extension)\n    return [match.group(1)] if match else []"
+_CEF_PATTERNS = [
+    ("time", _CEF_EXTENSION_EXTRACT.format(key="rt"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else '0'"),
+    ("metadata.product.vendor_name", _CEF_HEADER_EXTRACT.format(index=1),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("metadata.product.name", _CEF_HEADER_EXTRACT.format(index=2),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("metadata.product.version", _CEF_HEADER_EXTRACT.format(index=3),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("finding_info.uid", _CEF_HEADER_EXTRACT.format(index=4),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("finding_info.title", _CEF_HEADER_EXTRACT.format(index=5),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("severity_id", _CEF_HEADER_EXTRACT.format(index=6),
+        "def transform(extracted_values: typing.List[str]) -> str:\n"
+        "    severity = int(extracted_values[0]) if extracted_values else 0\n"
+        "    if severity >= 9:\n"
+        "        return '5'\n"
+        "    if severity >= 7:\n"
+        "        return '4'\n"
+        "    if severity >= 4:\n"
+        "        return '3'\n"
+        "    return '2' if severity > 0 else '0'"),
+    ("src_endpoint.ip", _CEF_EXTENSION_EXTRACT.format(key="src"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("src_endpoint.port", _CEF_EXTENSION_EXTRACT.format(key="spt"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("dst_endpoint.ip", _CEF_EXTENSION_EXTRACT.format(key="dst"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("dst_endpoint.port", _CEF_EXTENSION_EXTRACT.format(key="dpt"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("actor.user.name", _CEF_EXTENSION_EXTRACT.format(key="suser"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    ("message", _CEF_EXTENSION_EXTRACT.format(key="msg"),
+        "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0] if extracted_values else ''"),
+    _constant("activity_id", "1"),
+    _constant("category_uid", "2"),
+    _constant("class_uid", "2004"),
+    _constant("type_uid", "200401"),
+    _constant("metadata.version", "1.1.0"),
+]
+
+
+def get_fixtures() -> Dict[str, BenchmarkFixture]:
+    return {
+        fixture.name: fixture
+        for fixture in [
+            BenchmarkFixture("cloudtrail_json", "API Activity", _make_patterns("cloudtrail_json", _CLOUDTRAIL_PATTERNS), _make_cloudtrail_entry),
+            BenchmarkFixture("cloudtrail_json_context", "API Activity", _make_patterns("cloudtrail_json_context", _CLOUDTRAIL_CONTEXT_PATTERNS), _make_cloudtrail_entry),
+            BenchmarkFixture("syslog_sshd", "Authentication", _make_patterns("syslog_sshd", _SYSLOG_PATTERNS), _make_syslog_entry),
+            BenchmarkFixture("kv_firewall", "Network Activity", _make_patterns("kv_firewall", _KV_PATTERNS), _make_kv_entry),
+            BenchmarkFixture("cef", "Detection Finding", _make_patterns("cef", _CEF_PATTERNS), _make_cef_entry),
+        ]
+    }
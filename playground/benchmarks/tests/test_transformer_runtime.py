@@ -0,0 +1,87 @@
+import copy
+import json
+
+from django.test import TestCase
+
+from backend.transformers.runtime import load_python_transformer
+from backend.transformers.transformers import create_transformer_python
+
+from benchmarks.fixtures import get_fixtures
+from benchmarks.transformer_runtime import compare_results, measure_batch_stage, measure_stage, run_benchmarks
+
+
+class FixturesTestCase(TestCase):
+    def test_fixtures_transform_their_entries(self):
+        for fixture in get_fixtures().values():
+            with self.subTest(fixture=fixture.name):
+                # Set up test
+                transformer_logic = load_python_transformer(create_transformer_python(fixture.name, fixture.patterns))
+
+                # Run our test
+                outputs = [transformer_logic(entry) for entry in fixture.make_entries(50, seed=1)]
+
+                # Check our results
+                for output in outputs:
+                    self.assertIsInstance(output["class_uid"], int)
+                    self.assertIsInstance(output["time"], int)
+                    self.assertTrue(output["metadata"]["product"]["name"])
+
+    def test_optimized_transformers_match_unoptimized(self):
+        for fixture in get_fixtures().values():
+            with self.subTest(fixture=fixture.name):
+                # Set up test
+                optimized = load_python_transformer(create_transformer_python(f"{fixture.name}-optimized", fixture.patterns))
+                unoptimized = load_python_transformer(create_transformer_python(f"{fixture.name}-unoptimized", fixture.patterns, fuse_regexes=False, optimize=False))
+
+                # Run our test
+                entries = fixture.make_entries(50, seed=2)
+
+                # Check our results
+                for entry in entries:
+                    self.assertEqual(unoptimized(entry), optimized(entry))
+
+    def test_entries_are_seeded(self):
+        fixture = get_fixtures()["cef"]
+        self.assertEqual(fixture.make_entries(10, seed=5), fixture.make_entries(10, seed=5))
+
+class TransformerRuntimeBenchmarkTestCase(TestCase):
+    def test_measure_stage(self):
+        # Run our test
+        result = measure_stage(json.dumps, [{"value": index} for index in range(100)], warmup_records=10, memory_records=10)
+
+        # Check our results
+        self.assertEqual(100, result.records)
+        self.assertGreater(result.records_per_second, 0)
+        self.assertLessEqual(result.latency_p50_us, result.latency_p99_us)
+        self.assertLessEqual(result.latency_p99_us, result.latency_max_us)
+        self.assertGreater(result.memory_per_record_bytes, 0)
+
+    def test_measure_batch_stage(self):
+        # Run our test
+        result = measure_batch_stage(lambda inputs: (json.dumps(value) for value in inputs), [{"value": index} for index in range(100)], warmup_records=10, memory_records=10)
+
+        # Check our results
+        self.assertEqual(100, result.records)
+        self.assertGreater(result.records_per_second, 0)
+        self.assertLessEqual(result.latency_p50_us, result.latency_p99_us)
+        self.assertLessEqual(result.latency_p99_us, result.latency_max_us)
+        self.assertGreater(result.memory_per_record_bytes, 0)
+
+    def test_compare_flags_regressions(self):
+        # Set up test
+        baseline = run_benchmarks(["syslog_sshd"], records=20, stages=["execution", "serialization"])
+        current = copy.deepcopy(baseline)
+        execution = current["fixtures"]["syslog_sshd"]["stages"]["execution"]
+        execution["records_per_second"] *= 0.5
+        execution["latency_p99_us"] *= 1.05
+        current["fixtures"]["syslog_sshd"]["stages"]["serialization"]["memory_per_record_bytes"] *= 2
+
+        # Run our test
+        regressions = compare_results(baseline, current, threshold=0.1)
+
+        # Check our results
+        self.assertEqual(
+            [("execution", "records_per_second"), ("serialization", "memory_per_record_bytes")],
+            [(regression.stage, regression.measurement) for regression in regressions]
+        )
+        self.assertEqual([], compare_results(baseline, baseline))
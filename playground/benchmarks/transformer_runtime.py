@@ -0,0 +1,314 @@
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from backend.transformers.runtime import load_python_transformer, load_python_transformer_batch
+from backend.transformers.transformers import create_transformer_python
+
+from benchmarks.fixtures import BenchmarkFixture, get_fixtures
+
+
+logger = logging.getLogger("backend")
+
+"""
+This module benchmarks the runtime of Transformers built by create_transformer_python() from the fixture library.  For
+each fixture it measures four stages separately: executing the transformer against an entry, executing its batch entry
+point against all of the entries, validating the output against the OCSF event class, and serializing the output to
+JSON.  Each stage reports its throughput, the percentiles of
+its per-record latency, and the memory it allocates per record.  Results are written as JSON, and a run can be compared
+against an earlier one to flag regressions.
+
+Run it from the playground directory, e.g.:
+
+    python3 -m benchmarks.transformer_runtime --records 5000 --output results.json
+    python3 -m benchmarks.transformer_runtime --records 5000 --compare results.json
+"""
+
+RESULTS_FORMAT_VERSION = 1
+
+STAGES = ["execution", "batch_execution", "validation", "serialization"]
+
+DEFAULT_RECORDS = 2000
+DEFAULT_WARMUP_RECORDS = 50
+DEFAULT_MEMORY_RECORDS = 200 # Tracing allocations is slow, so memory is measured on a sample of the records
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Whether a larger value of each measurement is better, for deciding which direction is a regression
+HIGHER_IS_BETTER = {
+    "records_per_second": True,
+    "latency_p50_us": False,
+    "latency_p90_us": False,
+    "latency_p99_us": False,
+    "memory_per_record_bytes": False,
+}
+
+
+@dataclass
+class StageResult:
+    records: int
+    records_per_second: float
+    latency_p50_us: float
+    latency_p90_us: float
+    latency_p99_us: float
+    latency_max_us: float
+    memory_per_record_bytes: float
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "records": self.records,
+            "records_per_second": self.records_per_second,
+            "latency_p50_us": self.latency_p50_us,
+            "latency_p90_us": self.latency_p90_us,
+            "latency_p99_us": self.latency_p99_us,
+            "latency_max_us": self.latency_max_us,
+            "memory_per_record_bytes": self.memory_per_record_bytes
+        }
+
+@dataclass
+class Regression:
+    fixture: str
+    stage: str
+    measurement: str
+    baseline: float
+    current: float
+
+    def get_change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "fixture": self.fixture,
+            "stage": self.stage,
+            "measurement": self.measurement,
+            "baseline": self.baseline,
+            "current": self.current,
+            "change": self.get_change()
+        }
+
+
+def _get_percentile(sorted_values: List[float], percentile: float) -> float:
+    # Nearest-rank percentile, which is exact for the latencies we actually observed
+    index = max(0, min(len(sorted_values) - 1, int(round(percentile / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def measure_stage(stage: Callable[[Any], Any], inputs: List[Any], warmup_records: int = DEFAULT_WARMUP_RECORDS,
+                  memory_records: int = DEFAULT_MEMORY_RECORDS) -> StageResult:
+    """
+    Runs the stage over the inputs, timing each record.  Memory is measured in a separate pass, since tracing
+    allocations would distort the timings; it is the average peak allocated while processing a single record.
+    """
+    for stage_input in inputs[:warmup_records]:
+        stage(stage_input)
+
+    latencies_ns = []
+    total_start = time.perf_counter_ns()
+    for stage_input in inputs:
+        start = time.perf_counter_ns()
+        stage(stage_input)
+        latencies_ns.append(time.perf_counter_ns() - start)
+    total_ns = time.perf_counter_ns() - total_start
+
+    memory_sample = inputs[:memory_records]
+    peak_bytes = 0
+    tracemalloc.start()
+    try:
+        for stage_input in memory_sample:
+            baseline_bytes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            stage(stage_input)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes += peak - baseline_bytes
+    finally:
+        tracemalloc.stop()
+
+    latencies_us = sorted(latency / 1000 for latency in latencies_ns)
+    return StageResult(
+        records=len(inputs),
+        records_per_second=len(inputs) / (total_ns / 1e9) if total_ns else 0.0,
+        latency_p50_us=_get_percentile(latencies_us, 50),
+        latency_p90_us=_get_percentile(latencies_us, 90),
+        latency_p99_us=_get_percentile(latencies_us, 99),
+        latency_max_us=latencies_us[-1],
+        memory_per_record_bytes=peak_bytes / len(memory_sample) if memory_sample else 0.0
+    )
+
+def measure_batch_stage(stage: Callable[[Iterable[Any]], Iterator[Any]], inputs: List[Any], warmup_records: int = DEFAULT_WARMUP_RECORDS,
+                        memory_records: int = DEFAULT_MEMORY_RECORDS) -> StageResult:
+    """
+    Like measure_stage(), but for a stage that lazily processes a whole batch of inputs per call; a record's latency is
+    the time taken to produce its result from the batch.
+    """
+    for _ in stage(inputs[:warmup_records]):
+        pass
+
+    latencies_ns = []
+    results = stage(inputs)
+    total_start = time.perf_counter_ns()
+    start = total_start
+    for _ in results:
+        end = time.perf_counter_ns()
+        latencies_ns.append(end - start)
+        start = end
+    total_ns = time.perf_counter_ns() - total_start
+
+    memory_sample = inputs[:memory_records]
+    peak_bytes = 0
+    tracemalloc.start()
+    try:
+        results = stage(memory_sample)
+        exhausted = object()
+        while True:
+            baseline_bytes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            if next(results, exhausted) is exhausted:
+                break
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes += peak - baseline_bytes
+    finally:
+        tracemalloc.stop()
+
+    latencies_us = sorted(latency / 1000 for latency in latencies_ns)
+    return StageResult(
+        records=len(latencies_ns),
+        records_per_second=len(latencies_ns) / (total_ns / 1e9) if total_ns else 0.0,
+        latency_p50_us=_get_percentile(latencies_us, 50),
+        latency_p90_us=_get_percentile(latencies_us, 90),
+        latency_p99_us=_get_percentile(latencies_us, 99),
+        latency_max_us=latencies_us[-1],
+        memory_per_record_bytes=peak_bytes / len(memory_sample) if memory_sample else 0.0
+    )
+
+def _get_output_validator(fixture: BenchmarkFixture) -> Callable[[Dict[str, Any]], bool]:
+    # Imported here because loading the OCSF schema may require network access, which the other stages don't
+    from backend.core.ocsf.ocsf_schema_v1_1_0 import OCSF_SCHEMA
+    from backend.core.ocsf.ocsf_validators import get_compiled_ocsf_event_validator
+
+    return get_compiled_ocsf_event_validator(OCSF_SCHEMA, fixture.ocsf_event_name)
+
+def run_fixture(fixture: BenchmarkFixture, records: int, seed: int, stages: List[str]) -> Dict[str, Any]:
+    transformer = create_transformer_python(f"benchmark-{fixture.name}", fixture.patterns)
+    transformer_logic = load_python_transformer(transformer)
+
+    entries = fixture.make_entries(records, seed)
+    outputs = [transformer_logic(entry) for entry in entries]
+
+    results = {"ocsf_event_name": fixture.ocsf_event_name, "stages": dict()}
+
+    if "execution" in stages:
+        results["stages"]["execution"] = measure_stage(transformer_logic, entries).to_json()
+
+    if "batch_execution" in stages:
+        results["stages"]["batch_execution"] = measure_batch_stage(load_python_transformer_batch(transformer), entries).to_json()
+
+    if "validation" in stages:
+        validate_output = _get_output_validator(fixture)
+        results["valid_outputs"] = sum(1 for output in outputs if validate_output(output))
+        results["stages"]["validation"] = measure_stage(validate_output, outputs).to_json()
+
+    if "serialization" in stages:
+        results["stages"]["serialization"] = measure_stage(json.dumps, outputs).to_json()
+
+    return results
+
+def run_benchmarks(fixture_names: List[str], records: int, seed: int = 0, stages: List[str] = STAGES) -> Dict[str, Any]:
+    fixtures = get_fixtures()
+    unknown = [name for name in fixture_names if name not in fixtures]
+    if unknown:
+        raise ValueError(f"Unknown fixtures: {unknown}.  Available: {sorted(fixtures.keys())}")
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "metadata": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python_version": platform.python_version(),
+            "python_implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "records": records,
+            "seed": seed
+        },
+        "fixtures": {name: run_fixture(fixtures[name], records, seed, stages) for name in fixture_names}
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Regression]:
+    """
+    Returns the measurements that got worse by more than the threshold (a fraction of the baseline value) between the
+    two runs.  Fixtures and stages that are missing from either run are skipped.
+    """
+    regressions = []
+    for fixture_name, current_fixture in current["fixtures"].items():
+        baseline_fixture = baseline["fixtures"].get(fixture_name)
+        if baseline_fixture is None:
+            continue
+
+        for stage_name, current_stage in current_fixture["stages"].items():
+            baseline_stage = baseline_fixture["stages"].get(stage_name)
+            if baseline_stage is None:
+                continue
+
+            for measurement, higher_is_better in HIGHER_IS_BETTER.items():
+                baseline_value = baseline_stage[measurement]
+                current_value = current_stage[measurement]
+                if not baseline_value:
+                    continue
+
+                change = (current_value - baseline_value) / baseline_value
+                if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                    regressions.append(Regression(fixture_name, stage_name, measurement, baseline_value, current_value))
+
+    return regressions
+
+def format_results(results: Dict[str, Any]) -> str:
+    lines = [f"{'fixture':<24} {'stage':<16} {'records/s':>12} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10} {'bytes/rec':>10}"]
+    for fixture_name, fixture_results in results["fixtures"].items():
+        for stage_name, stage in fixture_results["stages"].items():
+            lines.append(
+                f"{fixture_name:<24} {stage_name:<16} {stage['records_per_second']:>12.0f} {stage['latency_p50_us']:>10.1f} "
+                f"{stage['latency_p90_us']:>10.1f} {stage['latency_p99_us']:>10.1f} {stage['memory_per_record_bytes']:>10.0f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the runtime of generated Transformers")
+    parser.add_argument("--fixtures", nargs="+", default=sorted(get_fixtures().keys()), help="The fixtures to benchmark")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES, help="The stages to benchmark")
+    parser.add_argument("--records", type=int, default=DEFAULT_RECORDS, help="The number of records per fixture")
+    parser.add_argument("--seed", type=int, default=0, help="The seed for generating records")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare the results to those in this JSON file, exiting non-zero on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD, help="The fractional change that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.fixtures, args.records, args.seed, args.stages)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=4)
+        print(f"\nWrote results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} compared to {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression.fixture} {regression.stage} {regression.measurement}: {regression.baseline:.1f} -> {regression.current:.1f} ({regression.get_change():+.0%})")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} compared to {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -89,6 +89,62 @@ SPECTACULAR_SETTINGS = {
 }
 
 
+# LLM response cache.  Disabled by default; when enabled, identical expert requests (same model, parameters, tools and
+# prompt) are answered from the cache instead of invoking the LLM.  Send "Cache-Control: no-cache" to bypass it.
+INFERENCE_CACHE = {
+    'ENABLED': os.environ.get('PLAYGROUND_INFERENCE_CACHE', 'false').lower() == 'true',
+    'DISK_PATH': BASE_DIR / 'inference_cache.sqlite3',  # Set to None to only cache in memory
+    'MEMORY_MAX_ENTRIES': 256,
+    'DISK_MAX_ENTRIES': 10000,
+    'TTL_SECONDS': 7 * 24 * 60 * 60,
+}
+
+
+# The LLM used by the experts.  "bedrock" invokes the models on Amazon Bedrock.  "fake" answers every request with a
+# valid tool call built from the prompt (or from the fixtures file, which maps tool names to their arguments), and
+# simulates latency and throttling per the FAKE profile; use it to load test or benchmark the backend without AWS.
+LLM = {
+    'PROVIDER': os.environ.get('PLAYGROUND_LLM_PROVIDER', 'bedrock'),
+    'FAKE': {
+        'LATENCY_SECONDS': 1.0,
+        'LATENCY_JITTER_SECONDS': 0.5,
+        'OUTPUT_TOKENS_PER_SECOND': 60,  # Set to None to ignore the response size
+        'THROTTLE_RATE': 0.0,  # The chance that any one attempt is throttled
+        'MAX_RETRIES': 3,
+        'RETRY_BACKOFF_SECONDS': 0.1,
+        'SEED': 0,
+        'FIXTURES_PATH': None,
+    },
+}
+
+
+# Background jobs.  Expert requests sent with a "Prefer: respond-async" header return 202 with a job ID immediately and
+# run on a bounded pool of workers; their results are polled from /jobs/<job_id>/.  The "database" store keeps jobs in
+# the database below (run migrations first); the "memory" store keeps them in-process only.
+JOBS = {
+    'STORE': os.environ.get('PLAYGROUND_JOB_STORE', 'database'),
+    'MAX_WORKERS': 4,  # The most expert tasks worked on at once
+    'MAX_PENDING': 64,  # The most unfinished jobs accepted before new submissions are rejected with a 503
+    'OWNER_LEASE_SECONDS': 60.0,  # How long after its process stops renewing it a job is considered abandoned
+}
+
+
+# Sandbox for generated code.  When enabled, the validators run LLM-generated and user-edited logic in a pool of worker
+# processes rather than in the API's process; each call is limited in the CPU time and extra memory it may use, and
+# a worker that times out or crashes is replaced.  The workers are forked with the modules below already imported.
+SANDBOX = {
+    'ENABLED': os.environ.get('PLAYGROUND_SANDBOX', 'true').lower() == 'true',
+    'MAX_WORKERS': 4,
+    'TIMEOUT_SECONDS': 10.0,
+    'CPU_TIME_SECONDS': 5.0,  # Set to None for no limit
+    'MEMORY_BYTES': 512 * 1024 * 1024,  # Set to None for no limit
+    'PRELOAD_MODULES': [
+        'base64', 'datetime', 'hashlib', 'ipaddress', 'json', 're', 'typing', 'urllib.parse',
+        'backend.entities_expert.validators', 'backend.transformers.runtime',
+    ],
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
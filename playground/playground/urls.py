@@ -1,10 +1,11 @@
 from django.urls import path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
-from playground_api.views import (TransformerHeuristicCreateView, TransformerCategorizeV1_1_0View,
+from playground_api.views import (CorpusTemplatesView, JobStatusView, MetricsView, TransformerHeuristicCreateView, TransformerCategorizeV1_1_0View,
+                                  TransformerCategorizeBatchV1_1_0View,
                                   TransformerEntitiesV1_1_0AnalyzeView, TransformerEntitiesV1_1_0ExtractView,
                                   TransformerEntitiesV1_1_0TestView,
-                                  TransformerLogicV1_1_0CreateView)
+                                  TransformerLogicV1_1_0CreateView, TransformerLogicV1_1_0StreamView)
 
 
 urlpatterns = [
@@ -12,8 +13,13 @@ urlpatterns = [
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('transformer/heuristic/create/', TransformerHeuristicCreateView.as_view(), name='transformer_heuristic_create'),
     path('transformer/categorize/v1_1_0/', TransformerCategorizeV1_1_0View.as_view(), name='transformer_categorize_v1_1_0'),
+    path('transformer/categorize/v1_1_0/batch/', TransformerCategorizeBatchV1_1_0View.as_view(), name='transformer_categorize_v1_1_0_batch'),
     path('transformer/entities/v1_1_0/analyze/', TransformerEntitiesV1_1_0AnalyzeView.as_view(), name='transformer_entities_v1_1_0_analyze'),
     path('transformer/entities/v1_1_0/extract/', TransformerEntitiesV1_1_0ExtractView.as_view(), name='transformer_entities_v1_1_0_extract'),
     path('transformer/entities/v1_1_0/test/', TransformerEntitiesV1_1_0TestView.as_view(), name='transformer_entities_v1_1_0_test'),
     path('transformer/logic/v1_1_0/create/', TransformerLogicV1_1_0CreateView.as_view(), name='transformer_logic_v1_1_0_create'),
+    path('transformer/logic/v1_1_0/stream/', TransformerLogicV1_1_0StreamView.as_view(), name='transformer_logic_v1_1_0_stream'),
+    path('corpus/templates/', CorpusTemplatesView.as_view(), name='corpus_templates'),
+    path('jobs/<str:job_id>/', JobStatusView.as_view(), name='job_status'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -1,8 +1,74 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import request_started
+
+
+logger = logging.getLogger("playground_api")
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'playground_api'
 
-    
+    def ready(self):
+        from backend.core.fake_llm import FakeLlmProfile, configure_fake_llm
+        from backend.core.inference_cache import InferenceCache, configure_inference_cache
+        from backend.core.jobs import DEFAULT_OWNER_LEASE_SECONDS, InMemoryJobStore, JobRunner, configure_job_runner
+        from backend.core.sandbox import DEFAULT_PRELOAD_MODULES, SandboxPool, configure_sandbox_pool
+        from .job_stores import DatabaseJobStore
+
+        llm_settings = getattr(settings, "LLM", dict())
+        provider = llm_settings.get("PROVIDER", "bedrock")
+        if provider == "fake":
+            logger.info(f"Using fake LLMs with settings: {llm_settings['FAKE']}")
+            configure_fake_llm(FakeLlmProfile.from_settings(llm_settings["FAKE"]))
+        elif provider != "bedrock":
+            raise ImproperlyConfigured(f"Unknown LLM provider: {provider}")
+
+        cache_settings = getattr(settings, "INFERENCE_CACHE", dict())
+        if cache_settings.get("ENABLED", False):
+            logger.info(f"Enabling the inference cache with settings: {cache_settings}")
+            configure_inference_cache(InferenceCache(
+                disk_path=cache_settings.get("DISK_PATH", None),
+                memory_max_entries=cache_settings["MEMORY_MAX_ENTRIES"],
+                disk_max_entries=cache_settings["DISK_MAX_ENTRIES"],
+                ttl_seconds=cache_settings["TTL_SECONDS"]
+            ))
+
+        job_settings = getattr(settings, "JOBS", dict())
+        if job_settings:
+            store_type = job_settings.get("STORE", "memory")
+            if store_type == "database":
+                job_store = DatabaseJobStore()
+            elif store_type == "memory":
+                job_store = InMemoryJobStore()
+            else:
+                raise ImproperlyConfigured(f"Unknown job store: {store_type}")
+
+            logger.info(f"Configuring the job runner with settings: {job_settings}")
+            job_runner = JobRunner(
+                store=job_store,
+                max_workers=job_settings["MAX_WORKERS"],
+                max_pending=job_settings["MAX_PENDING"],
+                owner_lease_seconds=job_settings.get("OWNER_LEASE_SECONDS", DEFAULT_OWNER_LEASE_SECONDS)
+            )
+            configure_job_runner(job_runner)
+
+            # The runner starts renewing its lease, and failing the jobs of processes that have stopped, on the first
+            # request.  That isn't done here because the database shouldn't be queried while the apps are still being
+            # initialized.
+            request_started.connect(lambda **kwargs: job_runner.start(), weak=False, dispatch_uid="start_job_runner")
+
+        sandbox_settings = getattr(settings, "SANDBOX", dict())
+        if sandbox_settings.get("ENABLED", False):
+            logger.info(f"Enabling the sandbox for generated code with settings: {sandbox_settings}")
+            configure_sandbox_pool(SandboxPool(
+                max_workers=sandbox_settings["MAX_WORKERS"],
+                timeout_seconds=sandbox_settings["TIMEOUT_SECONDS"],
+                cpu_time_seconds=sandbox_settings.get("CPU_TIME_SECONDS", None),
+                memory_bytes=sandbox_settings.get("MEMORY_BYTES", None),
+                preload_modules=sandbox_settings.get("PRELOAD_MODULES", DEFAULT_PRELOAD_MODULES)
+            ))
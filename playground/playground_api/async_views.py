@@ -0,0 +1,47 @@
+import inspect
+import logging
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+logger = logging.getLogger("playground_api")
+
+"""
+This module contains a base class for DRF views whose handlers are coroutines.  DRF's APIView dispatches synchronously,
+which forces long-running LLM calls to hold a worker thread for their full duration.  Under ASGI, an AsyncAPIView's
+handlers instead run on the server's event loop, so a single process can keep many expert invocations in flight.
+"""
+
+
+class AsyncAPIView(APIView):
+    """
+    An APIView whose method handlers (e.g. `async def post(...)`) are awaited.  Django detects that the handlers are
+    coroutines and routes the view through the event loop; the request/response plumbing is the same as APIView's.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication, permissions, and throttling may touch the database, so keep them off the event loop
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
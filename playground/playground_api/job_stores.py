@@ -0,0 +1,84 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any, Dict, Iterator
+
+from django.db import close_old_connections
+
+from backend.core.jobs import Job, JobNotFoundError, JobStatus, JobStore
+
+from .models import JobOwnerRecord, JobRecord
+
+
+logger = logging.getLogger("playground_api")
+
+
+class DatabaseJobStore(JobStore):
+    """
+    A JobStore backed by the app's database, so that job results outlive the process and are visible to every worker.
+    """
+
+    def create(self, job_id: str, kind: str, owner: str = None) -> Job:
+        now = datetime.now(timezone.utc)
+        record = JobRecord.objects.create(
+            job_id=job_id,
+            kind=kind,
+            status=JobStatus.PENDING.value,
+            created_at=now,
+            updated_at=now,
+            owner=owner
+        )
+        return self._to_job(record)
+
+    def update(self, job_id: str, status: JobStatus, result_status_code: int = None, result: Dict[str, Any] = None):
+        updated = JobRecord.objects.filter(job_id=job_id).update(
+            status=status.value,
+            updated_at=datetime.now(timezone.utc),
+            result_status_code=result_status_code,
+            result=result
+        )
+        if not updated:
+            raise JobNotFoundError(f"No job with id: {job_id}")
+
+    def get(self, job_id: str) -> Job:
+        try:
+            return self._to_job(JobRecord.objects.get(job_id=job_id))
+        except JobRecord.DoesNotExist:
+            raise JobNotFoundError(f"No job with id: {job_id}")
+
+    def renew_owner(self, owner: str):
+        JobOwnerRecord.objects.update_or_create(owner=owner, defaults={"renewed_at": datetime.now(timezone.utc)})
+
+    def fail_orphaned(self, lease_seconds: float, result_status_code: int, result: Dict[str, Any]) -> int:
+        now = datetime.now(timezone.utc)
+        JobOwnerRecord.objects.filter(renewed_at__lt=now - timedelta(seconds=lease_seconds)).delete()
+
+        # Jobs without an owner were created before owners were recorded, so nothing can still be working on them
+        live_owners = JobOwnerRecord.objects.values("owner")
+        return JobRecord.objects.filter(status__in=[JobStatus.PENDING.value, JobStatus.RUNNING.value]).exclude(owner__in=live_owners).update(
+            status=JobStatus.FAILED.value,
+            updated_at=now,
+            result_status_code=result_status_code,
+            result=result
+        )
+
+    @contextmanager
+    def job_scope(self) -> Iterator[None]:
+        # Django only cleans up its connections at the ends of requests, which the runner's threads never see
+        close_old_connections()
+        try:
+            yield
+        finally:
+            close_old_connections()
+
+    def _to_job(self, record: JobRecord) -> Job:
+        return Job(
+            job_id=record.job_id,
+            kind=record.kind,
+            status=JobStatus(record.status),
+            created_at=record.created_at,
+            updated_at=record.updated_at,
+            result_status_code=record.result_status_code,
+            result=record.result,
+            owner=record.owner
+        )
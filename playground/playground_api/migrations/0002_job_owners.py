@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playground_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobOwnerRecord',
+            fields=[
+                ('owner', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('renewed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobrecord',
+            name='owner',
+            field=models.CharField(max_length=64, null=True),
+        ),
+    ]
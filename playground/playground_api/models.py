@@ -1,5 +1,22 @@
-import uuid
-
 from django.db import models
 
-# Register your models here.
+
+class JobRecord(models.Model):
+    """
+    The persisted state of a background expert job; see backend.core.jobs.
+    """
+    job_id = models.CharField(max_length=64, primary_key=True)
+    kind = models.CharField(max_length=64)
+    status = models.CharField(max_length=16)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    result_status_code = models.IntegerField(null=True)
+    result = models.JSONField(null=True)
+    owner = models.CharField(max_length=64, null=True) # The job runner working on the job
+
+class JobOwnerRecord(models.Model):
+    """
+    When a job runner last renewed its lease on the jobs it owns; see backend.core.jobs.
+    """
+    owner = models.CharField(max_length=64, primary_key=True)
+    renewed_at = models.DateTimeField()
@@ -3,8 +3,10 @@ from typing import Dict, Any
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 
+from backend.core.jobs import JobStatus
 from backend.core.ocsf.ocsf_versions import OcsfVersion
 from backend.core.ocsf.ocsf_event_classes import OcsfEventClassesV1_1_0
+from backend.template_mining.drain import DEFAULT_DEPTH, DEFAULT_MAX_SAMPLES, DEFAULT_SIMILARITY_THRESHOLD
 from backend.transformers.parameters import TransformLanguage
 
 class EnumChoiceField(serializers.ChoiceField):
@@ -54,6 +56,22 @@ class TransformerCategorizeV1_1_0ResponseSerializer(serializers.Serializer):
     ocsf_version = EnumChoiceField(enum=OcsfVersion)
     rationale = serializers.CharField()
 
+class TransformerCategorizeBatchV1_1_0RequestSerializer(serializers.Serializer):
+    input_entries = serializers.ListField(child=serializers.CharField(), min_length=1, max_length=1000)
+    user_guidance = serializers.CharField(required=False, default=None, allow_blank=True)
+
+class CategorizedEntrySerializer(serializers.Serializer):
+    input_entry = serializers.CharField()
+    # Either the category and rationale are set, or the error explaining why the entry couldn't be categorized is
+    ocsf_category = EnumChoiceField(enum=OcsfEventClassesV1_1_0, required=False, allow_null=True)
+    rationale = serializers.CharField(required=False, allow_null=True)
+    error = serializers.CharField(required=False, allow_null=True)
+
+class TransformerCategorizeBatchV1_1_0ResponseSerializer(serializers.Serializer):
+    ocsf_version = EnumChoiceField(enum=OcsfVersion)
+    results = CategorizedEntrySerializer(many=True)
+    batch_count = serializers.IntegerField() # How many LLM requests the entries were split across
+
 @extend_schema_field({
     "type": "object",
     "properties": {
@@ -366,12 +384,18 @@ class TransformerEntitiesV1_1_0ExtractRequestSerializer(serializers.Serializer):
     input_entry = serializers.CharField()
     mappings = serializers.ListField(child=EntityMappingField())
 
+class FailedMappingSerializer(serializers.Serializer):
+    mapping = EntityMappingField()
+    error = serializers.CharField()
+
 class TransformerEntitiesV1_1_0ExtractResponseSerializer(serializers.Serializer):
     transform_language = EnumChoiceField(enum=TransformLanguage)
     ocsf_version = EnumChoiceField(enum=OcsfVersion)
     ocsf_category = EnumChoiceField(enum=OcsfEventClassesV1_1_0)
     input_entry = serializers.CharField()
     patterns = serializers.ListField(child=ExtractionPatternField())
+    # The mappings no patterns could be created for, because the extraction of their shard failed even after retries
+    failed_mappings = FailedMappingSerializer(many=True, required=False, default=list)
     
     def validate_patterns(self, patterns):
         for i, pattern in enumerate(patterns):
@@ -515,3 +539,52 @@ class TransformerLogicV1_1_0CreateResponseSerializer(serializers.Serializer):
     ocsf_version = EnumChoiceField(enum=OcsfVersion)
     ocsf_category = EnumChoiceField(enum=OcsfEventClassesV1_1_0)
     transformer = TransformerField()
+
+class TransformerRouteSerializer(serializers.Serializer):
+    transformer_id = serializers.CharField()
+    heuristic = serializers.CharField()
+
+class TransformerLogicV1_1_0StreamHeaderSerializer(serializers.Serializer):
+    transform_language = EnumChoiceField(enum=TransformLanguage)
+    transformer_id = serializers.CharField(required=False, default=None)
+    transformer = TransformerField(required=False, default=None)
+    routes = TransformerRouteSerializer(many=True, required=False, default=None, allow_empty=False) # Stored transformers, each targeted by its heuristic
+
+    def validate(self, data):
+        if [bool(data.get('transformer_id')), bool(data.get('transformer')), bool(data.get('routes'))].count(True) != 1:
+            raise serializers.ValidationError(
+                "Exactly one of 'transformer_id', 'transformer', or 'routes' must be provided in the TransformerLogicStream header"
+            )
+
+        return data
+
+class JobSubmittedResponseSerializer(serializers.Serializer):
+    job_id = serializers.CharField()
+    status = EnumChoiceField(enum=JobStatus)
+    status_url = serializers.CharField()
+
+class JobStatusResponseSerializer(serializers.Serializer):
+    job_id = serializers.CharField()
+    kind = serializers.CharField()
+    status = EnumChoiceField(enum=JobStatus)
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateTimeField()
+    result_status_code = serializers.IntegerField(allow_null=True) # The status the request would have had if served synchronously
+    result = serializers.JSONField(allow_null=True) # The body the request would have had if served synchronously
+
+class CorpusTemplatesRequestSerializer(serializers.Serializer):
+    # Parsing parameters, supplied as query parameters since the request body is the corpus itself
+    depth = serializers.IntegerField(required=False, default=DEFAULT_DEPTH, min_value=3, max_value=10)
+    similarity_threshold = serializers.FloatField(required=False, default=DEFAULT_SIMILARITY_THRESHOLD, min_value=0.0, max_value=1.0)
+    max_samples = serializers.IntegerField(required=False, default=DEFAULT_MAX_SAMPLES, min_value=0, max_value=100)
+
+class LogClusterSerializer(serializers.Serializer):
+    cluster_id = serializers.IntegerField()
+    template = serializers.CharField()
+    size = serializers.IntegerField()
+    variable_positions = serializers.ListField(child=serializers.IntegerField())
+    samples = serializers.ListField(child=serializers.CharField(trim_whitespace=False))
+
+class CorpusTemplatesResponseSerializer(serializers.Serializer):
+    total_entries = serializers.IntegerField()
+    clusters = LogClusterSerializer(many=True)
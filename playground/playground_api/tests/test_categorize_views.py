@@ -0,0 +1,80 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from backend.core.experts import get_expert_registry
+from backend.core.fake_llm import FakeLlmProfile, configure_fake_llm
+
+
+ENTRY = "Mar 12 07:40:57 host sshd[4351]: Failed password for guest from 86.212.199.60 port 1617 ssh2"
+
+def make_selection(entry_index: int, name: str = "Authentication", id: str = "3002"):
+    return {"entry_index": entry_index, "name": name, "id": id, "rationale": "Chosen by the test"}
+
+
+class TransformerCategorizeBatchV1_1_0ViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/transformer/categorize/v1_1_0/batch/"
+
+    def tearDown(self):
+        configure_fake_llm(None)
+        get_expert_registry().clear()
+
+    def _post(self, input_entries, selections=None):
+        # The experts hold the LLM they were built with, so they're rebuilt for each test's fake
+        fixtures = {"SelectOcsfCategories": {"selections": selections}} if selections is not None else dict()
+        configure_fake_llm(FakeLlmProfile(fixtures=fixtures))
+        get_expert_registry().clear()
+
+        return self.client.post(self.url, {"input_entries": input_entries}, format="json")
+
+    def test_post_categorizes_each_entry(self):
+        # Run our test
+        response = self._post([ENTRY, ENTRY.replace("guest", "root")])
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(1, response.json()["batch_count"])
+        self.assertEqual([ENTRY, ENTRY.replace("guest", "root")], [result["input_entry"] for result in response.json()["results"]])
+        self.assertTrue(all(result["ocsf_category"] for result in response.json()["results"]))
+        self.assertEqual([None] * 2, [result["error"] for result in response.json()["results"]])
+
+    def test_post_reports_missing_and_unknown_selections(self):
+        # Run our test
+        response = self._post([ENTRY, ENTRY, ENTRY], selections=[make_selection(0), make_selection(2, name="Made Up", id="9999")])
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual("Authentication (3002)", results[0]["ocsf_category"])
+        self.assertEqual("Chosen by the test", results[0]["rationale"])
+        self.assertEqual("The LLM did not select a category for this entry", results[1]["error"])
+        self.assertIsNone(results[2]["ocsf_category"])
+        self.assertEqual("The LLM selected an unknown OCSF category: Made Up (9999)", results[2]["error"])
+
+    def test_post_reports_failed_batch(self):
+        # Set up test
+        input_entries = [f"{ENTRY} {index}" for index in range(41)] # One more than fits in a single batch
+
+        # Run our test
+        response = self._post(input_entries, selections=[make_selection(5)])
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(2, response.json()["batch_count"])
+        results = response.json()["results"]
+        self.assertEqual(input_entries, [result["input_entry"] for result in results])
+        self.assertEqual("Authentication (3002)", results[5]["ocsf_category"])
+        self.assertEqual("The LLM did not select a category for this entry", results[0]["error"])
+        self.assertEqual(
+            "Categorization failed for the batch containing this entry: Categories were selected for entries that do not exist: [5]",
+            results[40]["error"]
+        )
+
+    def test_post_invalid_request_body(self):
+        # Run our test
+        response = self.client.post(self.url, {"input_entries": []}, format="json")
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
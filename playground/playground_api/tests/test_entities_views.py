@@ -0,0 +1,94 @@
+from dataclasses import replace
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from backend.core.experts import ExpertBatchResult, ExpertInvocationError
+from backend.entities_expert.extraction_pattern import ExtractionPattern
+from backend.entities_expert.task_def import ExtractTask
+
+
+def make_pattern(mapping_id: str) -> ExtractionPattern:
+    return ExtractionPattern(
+        id=mapping_id,
+        dependency_setup="import re\nimport typing",
+        extract_logic="def extract(input_entry: str) -> typing.List[str]:\n    return re.findall(r'user=(\\w+)', input_entry)",
+        transform_logic="def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"
+    )
+
+
+@patch("playground_api.views.get_extraction_expert", MagicMock())
+class TransformerEntitiesV1_1_0ExtractViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/transformer/entities/v1_1_0/extract/"
+
+        # Enough mappings of the same object to be split into two shards
+        self.request_body = {
+            "transform_language": "Python",
+            "ocsf_category": "Authentication (3002)",
+            "input_entry": "user=alice",
+            "mappings": [
+                {"id": f"mapping-{index}", "entities": [], "ocsf_path": f"user.field_{index}", "path_rationale": "The user"}
+                for index in range(11)
+            ]
+        }
+
+    def _post(self, failed_shards: List[int], skipped_mapping_ids: List[str] = []):
+        async def fake_extraction(expert, tasks: List[ExtractTask], bypass_cache: bool = False) -> List[ExpertBatchResult]:
+            results = []
+            for shard_number, task in enumerate(tasks):
+                if shard_number in failed_shards:
+                    results.append(ExpertBatchResult(task=task, error=ExpertInvocationError("Malformed tool call")))
+                else:
+                    patterns = [make_pattern(mapping.id) for mapping in task.mappings if mapping.id not in skipped_mapping_ids]
+                    results.append(ExpertBatchResult(task=replace(task, patterns=patterns)))
+            return results
+
+        with patch("playground_api.views.ainvoke_sharded_extraction_expert", side_effect=fake_extraction):
+            return self.client.post(self.url, self.request_body, format="json")
+
+    def test_post_all_shards_succeed(self):
+        # Run our test
+        response = self._post(failed_shards=[])
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(11, len(response.json()["patterns"]))
+        self.assertEqual([], response.json()["failed_mappings"])
+
+    def test_post_returns_patterns_of_successful_shards(self):
+        # Run our test
+        response = self._post(failed_shards=[1])
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([f"mapping-{index}" for index in range(10)], [pattern["id"] for pattern in response.json()["patterns"]])
+        self.assertTrue(all(pattern["validation_report"]["passed"] for pattern in response.json()["patterns"]))
+        self.assertEqual(
+            [{"mapping": self.request_body["mappings"][10], "error": "Malformed tool call"}],
+            response.json()["failed_mappings"]
+        )
+
+    def test_post_reports_mappings_without_patterns(self):
+        # Run our test
+        response = self._post(failed_shards=[], skipped_mapping_ids=["mapping-3"])
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(10, len(response.json()["patterns"]))
+        self.assertNotIn("mapping-3", [pattern["id"] for pattern in response.json()["patterns"]])
+        self.assertEqual(
+            [{"mapping": self.request_body["mappings"][3], "error": "No extraction pattern was created for the mapping"}],
+            response.json()["failed_mappings"]
+        )
+
+    def test_post_all_shards_fail(self):
+        # Run our test
+        response = self._post(failed_shards=[0, 1])
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
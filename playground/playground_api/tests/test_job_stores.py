@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from backend.core.jobs import JobNotFoundError, JobStatus
+from playground_api.job_stores import DatabaseJobStore
+from playground_api.models import JobOwnerRecord
+
+
+class DatabaseJobStoreTestCase(TestCase):
+    def setUp(self):
+        self.store = DatabaseJobStore()
+
+    def test_job_lifecycle(self):
+        # Set up test
+        self.store.create("job-1", "test")
+
+        # Run our test
+        self.store.update("job-1", JobStatus.SUCCEEDED, result_status_code=200, result={"value": 1})
+
+        # Check our results
+        job = self.store.get("job-1")
+        self.assertEqual(JobStatus.SUCCEEDED, job.status)
+        self.assertEqual(200, job.result_status_code)
+        self.assertEqual({"value": 1}, job.result)
+
+    def test_unknown_job(self):
+        # Run our test
+        with self.assertRaises(JobNotFoundError):
+            self.store.get("missing")
+
+    def test_fail_orphaned(self):
+        # Set up test
+        self.store.renew_owner("live")
+        self.store.create("job-1", "test")
+        self.store.create("job-2", "test", owner="stopped")
+        self.store.update("job-2", JobStatus.RUNNING)
+        self.store.create("job-3", "test", owner="stopped")
+        self.store.update("job-3", JobStatus.SUCCEEDED, result_status_code=200, result={})
+        self.store.create("job-4", "test", owner="live")
+        self.store.update("job-4", JobStatus.RUNNING)
+
+        # Run our test
+        failed = self.store.fail_orphaned(60, 500, {"error": "Interrupted"})
+
+        # Check our results
+        self.assertEqual(2, failed)
+        self.assertEqual(
+            [JobStatus.FAILED, JobStatus.FAILED, JobStatus.SUCCEEDED, JobStatus.RUNNING],
+            [self.store.get(f"job-{index}").status for index in range(1, 5)]
+        )
+        self.assertEqual({"error": "Interrupted"}, self.store.get("job-1").result)
+
+    def test_fail_orphaned_after_lease_lapses(self):
+        # Set up test
+        self.store.renew_owner("stopped")
+        self.store.create("job-1", "test", owner="stopped")
+        JobOwnerRecord.objects.filter(owner="stopped").update(renewed_at=datetime.now(timezone.utc) - timedelta(seconds=120))
+
+        # Run our test
+        failed = self.store.fail_orphaned(60, 500, {"error": "Interrupted"})
+
+        # Check our results
+        self.assertEqual(1, failed)
+        self.assertEqual(JobStatus.FAILED, self.store.get("job-1").status)
+        self.assertFalse(JobOwnerRecord.objects.filter(owner="stopped").exists())
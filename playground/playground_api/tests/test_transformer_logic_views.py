@@ -0,0 +1,155 @@
+import json
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from backend.core.validation_report import ValidationReport
+from backend.transformers.store import TransformerNotFoundError, get_transformer_store
+from backend.transformers.transformers import Transformer
+
+
+TRANSFORMER_LOGIC = """def transformer(input_entry: str) -> typing.Dict[str, typing.Any]:
+    if input_entry == "date":
+        return {"time": datetime.datetime(2024, 1, 1)}
+    if input_entry == "fail":
+        raise ValueError("bad entry")
+    return {"message": input_entry}"""
+
+def make_stream_body(header, lines):
+    return "\n".join([json.dumps(header)] + lines) + "\n"
+
+def read_stream(response):
+    return [json.loads(line) for line in b"".join(response.streaming_content).decode("utf-8").splitlines()]
+
+
+class TransformerLogicV1_1_0StreamViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/transformer/logic/v1_1_0/stream/"
+        self.transformer = {"id": "transformer", "dependency_setup": "import datetime\nimport typing", "transformer_logic": TRANSFORMER_LOGIC}
+
+    def test_post_streams_result_per_line(self):
+        # Set up test
+        body = make_stream_body({"transform_language": "Python", "transformer": self.transformer}, ["hello", "date", "", "fail", "world"])
+
+        # Run our test
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([
+            {"line": 1, "output": {"message": "hello"}},
+            {"line": 2, "error": "The transformer output is not JSON serializable: Object of type datetime is not JSON serializable"},
+            {"line": 4, "error": "ValueError: bad entry"},
+            {"line": 5, "output": {"message": "world"}}
+        ], read_stream(response))
+
+    def test_post_stored_transformer(self):
+        # Set up test
+        get_transformer_store().put(Transformer(**self.transformer))
+        body = make_stream_body({"transform_language": "Python", "transformer_id": "transformer"}, ["hello"])
+
+        # Run our test
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([{"line": 1, "output": {"message": "hello"}}], read_stream(response))
+
+    def test_post_routes_between_stored_transformers(self):
+        # Set up test
+        get_transformer_store().put(Transformer(**self.transformer))
+        get_transformer_store().put(Transformer(id="upper", dependency_setup="", transformer_logic="def transformer(input_entry):\n    return {\"message\": input_entry.upper()}"))
+        header = {"transform_language": "Python", "routes": [
+            {"transformer_id": "upper", "heuristic": "^shout"},
+            {"transformer_id": "transformer", "heuristic": "(?<word>\\w+)"},
+        ]}
+        body = make_stream_body(header, ["hello", "shout it", "!!!"])
+
+        # Run our test
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([
+            {"line": 1, "transformer_id": "transformer", "output": {"message": "hello"}},
+            {"line": 2, "transformer_id": "upper", "output": {"message": "SHOUT IT"}},
+            {"line": 3, "error": "The entry does not match the heuristic of any transformer"}
+        ], read_stream(response))
+
+    def test_post_invalid_route_heuristic(self):
+        # Set up test
+        get_transformer_store().put(Transformer(**self.transformer))
+        body = make_stream_body({"transform_language": "Python", "routes": [{"transformer_id": "transformer", "heuristic": "(unclosed"}]}, ["hello"])
+
+        # Run our test
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_post_unknown_transformer(self):
+        # Set up test
+        body = make_stream_body({"transform_language": "Python", "transformer_id": "unknown"}, ["hello"])
+
+        # Run our test
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_post_invalid_header(self):
+        # Set up test
+        body = make_stream_body({"transform_language": "Python"}, ["hello"])
+
+        # Run our test
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class TransformerLogicV1_1_0CreateViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/transformer/logic/v1_1_0/create/"
+        self.request_body = {
+            "transform_language": "Python",
+            "ocsf_category": "Authentication (3002)",
+            "input_entry": "user=alice",
+            "patterns": [{
+                "id": "pattern",
+                "mapping": {"id": "mapping", "entities": [], "ocsf_path": "user.name", "path_rationale": "The user"},
+                "dependency_setup": "import re\nimport typing",
+                "extract_logic": "def extract(input_entry: str) -> typing.List[str]:\n    return re.findall(r'user=(\\w+)', input_entry)",
+                "transform_logic": "def transform(extracted_values: typing.List[str]) -> str:\n    return extracted_values[0]"
+            }]
+        }
+
+    def _post(self, passed: bool):
+        def validate(language, category_name, transformer, input_entry):
+            transformer.validation_report = ValidationReport(input=input_entry, output={"transform_output": {}}, report_entries=["Validated"], passed=passed)
+            return transformer.validation_report
+
+        with patch("playground_api.views.TransformerLogicV1_1_0CreateView._validate", side_effect=validate):
+            return self.client.post(self.url, self.request_body, format="json")
+
+    def test_post_stores_valid_transformer(self):
+        # Run our test
+        response = self._post(passed=True)
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        transformer_id = response.json()["transformer"]["id"]
+        self.assertEqual(transformer_id, get_transformer_store().get(transformer_id).id)
+
+    def test_post_does_not_store_invalid_transformer(self):
+        # Run our test
+        response = self._post(passed=False)
+
+        # Check our results
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.json()["transformer"]["validation_report"]["passed"])
+        with self.assertRaises(TransformerNotFoundError):
+            get_transformer_store().get(response.json()["transformer"]["id"])
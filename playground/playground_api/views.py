@@ -1,55 +1,127 @@
+import asyncio
 import json
 import logging
-from typing import List
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Tuple
 import uuid
 
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
 from langchain_core.messages import HumanMessage
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
-from backend.categorization_expert.expert_def import get_categorization_expert, invoke_categorization_expert
-from backend.categorization_expert.task_def import CategorizationTask
+from backend.categorization_expert.expert_def import (ainvoke_batch_categorization_expert, ainvoke_categorization_expert, get_batch_categorization_expert,
+                                                      get_categorization_expert, make_categorization_batches)
+from backend.categorization_expert.task_def import BatchCategorizationTask, CategorizationTask
 
+from backend.core.experts import ExpertBatchResult, ExpertInvocationError
+from backend.core.jobs import JobNotFoundError, JobQueueFullError, get_job_runner
+from backend.core.metrics import get_metrics_registry
+from backend.core.ocsf.ocsf_event_classes import OcsfEventClassesV1_1_0
 from backend.core.ocsf.ocsf_versions import OcsfVersion
 from backend.core.validation_report import ValidationReport
+from backend.core.validators import PythonLogicInvalidSyntaxError, PythonLogicNotInModuleError, PythonLogicNotExecutableError
 
 from backend.entities_expert.entities import EntityMapping, Entity
 from backend.entities_expert.extraction_pattern import ExtractionPattern
-from backend.entities_expert.expert_def import get_analysis_expert, get_extraction_expert, invoke_analysis_expert, invoke_extraction_expert
+from backend.entities_expert.expert_def import (ainvoke_analysis_expert, ainvoke_sharded_extraction_expert, get_analysis_expert, get_extraction_expert,
+                                                make_extraction_shards)
 from backend.entities_expert.task_def import AnalysisTask, ExtractTask
-from backend.entities_expert.validators import PythonExtractionPatternValidator
+from backend.entities_expert.validators import validate_python_extraction_patterns
 
-from backend.regex_expert.expert_def import get_regex_expert, invoke_regex_expert
+from backend.template_mining.drain import mine_templates
+
+from backend.regex_expert.expert_def import ainvoke_regex_expert, get_regex_expert
 from backend.regex_expert.task_def import RegexTask
 from backend.regex_expert.parameters import RegexFlavor
 
 from backend.transformers.parameters import TransformLanguage
+from backend.transformers.routing import HeuristicRouter, InvalidHeuristicError, Route
+from backend.transformers.runtime import TransformResult, load_python_transformer_batch, transform_lines, transform_routed_lines
+from backend.transformers.store import TransformerNotFoundError, get_transformer_store
 from backend.transformers.transformers import Transformer, create_transformer_python
 from backend.transformers.validators import PythonOcsfV1_1_0TransformValidator
 
+from .async_views import AsyncAPIView
 from .serializers import (TransformerHeuristicCreateRequestSerializer, TransformerHeuristicCreateResponseSerializer,
                           TransformerCategorizeV1_1_0RequestSerializer, TransformerCategorizeV1_1_0ResponseSerializer,
                           TransformerEntitiesV1_1_0AnalyzeRequestSerializer, TransformerEntitiesV1_1_0AnalyzeResponseSerializer,
                           TransformerEntitiesV1_1_0ExtractRequestSerializer, TransformerEntitiesV1_1_0ExtractResponseSerializer,
                           TransformerEntitiesV1_1_0TestRequestSerializer, TransformerEntitiesV1_1_0TestResponseSerializer,
-                          TransformerLogicV1_1_0CreateRequestSerializer, TransformerLogicV1_1_0CreateResponseSerializer
+                          TransformerLogicV1_1_0CreateRequestSerializer, TransformerLogicV1_1_0CreateResponseSerializer,
+                          TransformerLogicV1_1_0StreamHeaderSerializer, JobSubmittedResponseSerializer, JobStatusResponseSerializer,
+                          CorpusTemplatesRequestSerializer, CorpusTemplatesResponseSerializer,
+                          TransformerCategorizeBatchV1_1_0RequestSerializer, TransformerCategorizeBatchV1_1_0ResponseSerializer
                           )
 
 
 logger = logging.getLogger("playground_api")
 
 
-class TransformerHeuristicCreateView(APIView):
+def _prefers_respond_async(request) -> bool:
+    # Callers opt into the submit-then-poll flow with the standard "Prefer: respond-async" request header (RFC 7240)
+    prefer = request.headers.get("Prefer", "")
+    return "respond-async" in [preference.strip().lower() for preference in prefer.split(",")]
+
+async def _submit_job(job_id: str, kind: str, respond: Callable[[], Awaitable[Response]]) -> Response:
+    """
+    Runs the view's work as a background job and returns a 202 pointing to where its result can be polled.
+    """
+    def work() -> Tuple[int, Dict[str, Any]]:
+        response = asyncio.run(respond())
+        return response.status_code, response.data
+
+    try:
+        # The job store may be database-backed, so keep it off the event loop
+        job = await sync_to_async(get_job_runner().submit)(job_id, kind, work)
+    except JobQueueFullError as e:
+        logger.error(f"Unable to submit {kind} job: {str(e)}")
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    status_url = reverse("job_status", args=[job.job_id])
+    return Response(
+        {"job_id": job.job_id, "status": job.status.value, "status_url": status_url},
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": status_url, "Preference-Applied": "respond-async"}
+    )
+
+def _iter_body_lines(request):
+    # Iterate the underlying Django request so DRF doesn't buffer the whole body to parse it
+    for raw_line in request._request:
+        yield raw_line.decode("utf-8", errors="replace")
+
+def _iter_result_lines(results: Iterable[TransformResult]) -> Iterator[str]:
+    # The response is already streaming by the time a result is serialized, so a result that can't be is reported in
+    # its own line rather than aborting the rest of the stream
+    for result in results:
+        try:
+            yield json.dumps(result.to_json()) + "\n"
+        except Exception as e:
+            logger.debug(f"Unable to serialize the transformer output for line {result.line_number}: {str(e)}")
+            error = TransformResult(line_number=result.line_number, error=f"The transformer output is not JSON serializable: {str(e)}")
+            yield json.dumps(error.to_json()) + "\n"
+
+def _should_bypass_inference_cache(request) -> bool:
+    # Callers can force a fresh LLM response with the standard "Cache-Control: no-cache" request header
+    cache_control = request.headers.get("Cache-Control", "")
+    return "no-cache" in [directive.strip().lower() for directive in cache_control.split(",")]
+
+
+class TransformerHeuristicCreateView(AsyncAPIView):
     @csrf_exempt
     @extend_schema(
         request=TransformerHeuristicCreateRequestSerializer,
-        responses=TransformerHeuristicCreateResponseSerializer
+        responses={200: TransformerHeuristicCreateResponseSerializer, 202: JobSubmittedResponseSerializer}
     )
-    def post(self, request):
+    async def post(self, request):
         logger.info(f"Received heuristic creation request: {request.data}")
+        bypass_cache = _should_bypass_inference_cache(request)
+        respond_async = _prefers_respond_async(request)
 
         # Validate incoming data
         request = TransformerHeuristicCreateRequestSerializer(data=request.data)
@@ -59,9 +131,14 @@ class TransformerHeuristicCreateView(APIView):
 
         task_id = str(uuid.uuid4())
 
+        if respond_async:
+            return await _submit_job(task_id, "heuristic_create", lambda: self._respond(task_id, request, bypass_cache))
+        return await self._respond(task_id, request, bypass_cache)
+
+    async def _respond(self, task_id: str, request: TransformerHeuristicCreateRequestSerializer, bypass_cache: bool) -> Response:
         # Perform the task
         try:
-            result = self._create_regex(task_id, request)
+            result = await self._create_regex(task_id, request, bypass_cache)
             logger.info(f"Regex creation successful")
             logger.debug(f"Regex value:\n{result.regex.value}")
         except Exception as e:
@@ -80,7 +157,7 @@ class TransformerHeuristicCreateView(APIView):
         
         return Response(response.data, status=status.HTTP_200_OK)
 
-    def _create_regex(self, task_id: str, request: TransformerHeuristicCreateRequestSerializer) -> RegexTask:
+    async def _create_regex(self, task_id: str, request: TransformerHeuristicCreateRequestSerializer, bypass_cache: bool = False) -> RegexTask:
             expert = get_regex_expert(
                 regex_flavor=RegexFlavor.JAVASCRIPT # Hardcoded for now
             )
@@ -101,18 +178,20 @@ class TransformerHeuristicCreateView(APIView):
                 regex=None
             )
 
-            result = invoke_regex_expert(expert, task)
+            result = await ainvoke_regex_expert(expert, task, bypass_cache=bypass_cache)
 
             return result
     
-class TransformerCategorizeV1_1_0View(APIView):
+class TransformerCategorizeV1_1_0View(AsyncAPIView):
     @csrf_exempt
     @extend_schema(
         request=TransformerCategorizeV1_1_0RequestSerializer,
-        responses=TransformerCategorizeV1_1_0ResponseSerializer
+        responses={200: TransformerCategorizeV1_1_0ResponseSerializer, 202: JobSubmittedResponseSerializer}
     )
-    def post(self, request):
+    async def post(self, request):
         logger.info(f"Received categorization request: {request.data}")
+        bypass_cache = _should_bypass_inference_cache(request)
+        respond_async = _prefers_respond_async(request)
 
         # Validate incoming data
         request = TransformerCategorizeV1_1_0RequestSerializer(data=request.data)
@@ -122,9 +201,14 @@ class TransformerCategorizeV1_1_0View(APIView):
 
         task_id = str(uuid.uuid4())
 
+        if respond_async:
+            return await _submit_job(task_id, "categorize_v1_1_0", lambda: self._respond(task_id, request, bypass_cache))
+        return await self._respond(task_id, request, bypass_cache)
+
+    async def _respond(self, task_id: str, request: TransformerCategorizeV1_1_0RequestSerializer, bypass_cache: bool) -> Response:
         # Perform the task
         try:
-            result = self._categorize(task_id, request)
+            result = await self._categorize(task_id, request, bypass_cache)
             logger.info(f"Categorization successful")
             logger.debug(f"Category value:\n{result.category.value}")
         except Exception as e:
@@ -144,7 +228,7 @@ class TransformerCategorizeV1_1_0View(APIView):
         
         return Response(response.data, status=status.HTTP_200_OK)
 
-    def _categorize(self, task_id: str, request: TransformerCategorizeV1_1_0RequestSerializer) -> CategorizationTask:
+    async def _categorize(self, task_id: str, request: TransformerCategorizeV1_1_0RequestSerializer, bypass_cache: bool = False) -> CategorizationTask:
             expert = get_categorization_expert(OcsfVersion.V1_1_0)
 
             system_message = expert.system_prompt_factory(
@@ -163,10 +247,110 @@ class TransformerCategorizeV1_1_0View(APIView):
                 category=None
             )
 
-            result = invoke_categorization_expert(expert, task)
+            result = await ainvoke_categorization_expert(expert, task, bypass_cache=bypass_cache)
 
             return result
     
+class TransformerCategorizeBatchV1_1_0View(AsyncAPIView):
+    """
+    Categorizes many entries at once.  The entries are split into as few LLM requests as their size allows, so the
+    event class knowledge in the prompt is paid for once per batch rather than once per entry.
+    """
+
+    @csrf_exempt
+    @extend_schema(
+        request=TransformerCategorizeBatchV1_1_0RequestSerializer,
+        responses={200: TransformerCategorizeBatchV1_1_0ResponseSerializer, 202: JobSubmittedResponseSerializer}
+    )
+    async def post(self, request):
+        logger.info(f"Received batch categorization request: {request.data}")
+        bypass_cache = _should_bypass_inference_cache(request)
+        respond_async = _prefers_respond_async(request)
+
+        # Validate incoming data
+        request = TransformerCategorizeBatchV1_1_0RequestSerializer(data=request.data)
+        if not request.is_valid():
+            logger.error(f"Invalid batch categorization request: {request.errors}")
+            return Response(request.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        task_id = str(uuid.uuid4())
+
+        if respond_async:
+            return await _submit_job(task_id, "categorize_batch_v1_1_0", lambda: self._respond(task_id, request, bypass_cache))
+        return await self._respond(task_id, request, bypass_cache)
+
+    async def _respond(self, task_id: str, request: TransformerCategorizeBatchV1_1_0RequestSerializer, bypass_cache: bool) -> Response:
+        # Perform the task
+        try:
+            batch_results = await self._categorize(task_id, request, bypass_cache)
+            results = self._collect_results(batch_results)
+            logger.info(f"Batch categorization successful for {sum(1 for result in results if result['error'] is None)} of {len(results)} entries")
+        except Exception as e:
+            logger.error(f"Batch categorization failed: {str(e)}")
+            logger.exception(e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # Serialize and return the response
+        response = TransformerCategorizeBatchV1_1_0ResponseSerializer(data={
+            "ocsf_version": OcsfVersion.V1_1_0.value,
+            "results": results,
+            "batch_count": len(batch_results)
+        })
+        if not response.is_valid():
+            logger.error(f"Invalid batch categorization response: {response.errors}")
+            return Response(response.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(response.data, status=status.HTTP_200_OK)
+
+    async def _categorize(self, task_id: str, request: TransformerCategorizeBatchV1_1_0RequestSerializer, bypass_cache: bool = False) -> List[ExpertBatchResult]:
+            expert = get_batch_categorization_expert(OcsfVersion.V1_1_0)
+
+            tasks = []
+            for batch_number, input_entries in enumerate(make_categorization_batches(request.validated_data["input_entries"])):
+                system_message = expert.system_prompt_factory(
+                    input_entries=input_entries,
+                    user_guidance=request.validated_data["user_guidance"]
+                )
+                turns = [
+                    system_message,
+                    HumanMessage(content="Please categorize each of the input entries.")
+                ]
+
+                tasks.append(BatchCategorizationTask(
+                    task_id=f"{task_id}-{batch_number}",
+                    inputs=input_entries,
+                    context=turns,
+                    categories=None
+                ))
+
+            results = await ainvoke_batch_categorization_expert(expert, tasks, bypass_cache=bypass_cache)
+
+            return results
+
+    def _collect_results(self, batch_results: List[ExpertBatchResult]) -> List[Dict[str, Any]]:
+        valid_categories = set(event_class.value for event_class in OcsfEventClassesV1_1_0)
+
+        results = []
+        for batch_result in batch_results:
+            task, error = batch_result.task, batch_result.error
+            for index, input_entry in enumerate(task.inputs):
+                result = {"input_entry": input_entry, "ocsf_category": None, "rationale": None, "error": None}
+                category = task.categories.get(index) if task.categories else None
+
+                if error is not None:
+                    result["error"] = f"Categorization failed for the batch containing this entry: {str(error)}"
+                elif category is None:
+                    result["error"] = "The LLM did not select a category for this entry"
+                elif category.value not in valid_categories:
+                    result["error"] = f"The LLM selected an unknown OCSF category: {category.value}"
+                else:
+                    result["ocsf_category"] = category.value
+                    result["rationale"] = category.rationale
+
+                results.append(result)
+
+        return results
+
 
 class UnsupportedTransformLanguageError(Exception):
     pass
@@ -205,6 +389,12 @@ class TransformerLogicV1_1_0CreateView(APIView):
             )
             logger.info(f"Transform validation completed")
             logger.debug(f"Validation report:\n{json.dumps(report.to_json(), indent=4)}")
+
+            # Make the transform available to be referenced by ID in later requests, if it works
+            if report.passed:
+                get_transformer_store().put(transformer)
+            else:
+                logger.info(f"Not storing transformer {transformer.id}, which failed validation")
         except UnsupportedTransformLanguageError as e:
             logger.error(f"{str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -258,14 +448,136 @@ class TransformerLogicV1_1_0CreateView(APIView):
 
         return report
     
-class TransformerEntitiesV1_1_0AnalyzeView(APIView):
+class TransformerLogicV1_1_0StreamView(APIView):
+    """
+    Applies a transformer to a newline-delimited request body, streaming back one JSON line per input line.  The first
+    line of the body is a JSON header identifying the transformer to use, or a list of stored transformers and their
+    targeting heuristics to dispatch each entry between; every subsequent line is an input entry.  The body is consumed
+    incrementally, so memory use does not grow with the size of the request.
+    """
+
     @csrf_exempt
     @extend_schema(
-        request=TransformerEntitiesV1_1_0AnalyzeRequestSerializer,
-        responses=TransformerEntitiesV1_1_0AnalyzeResponseSerializer
+        request={"application/x-ndjson": OpenApiTypes.STR},
+        responses={(200, "application/x-ndjson"): OpenApiTypes.STR}
+    )
+    def post(self, request):
+        logger.info(f"Received transform stream request")
+
+        # Read the header line without consuming the rest of the body
+        lines = _iter_body_lines(request)
+        try:
+            header = json.loads(next(lines, "") or "null")
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid transform stream header: {str(e)}")
+            return Response({'error': f"The first line must be a JSON header: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validate the header
+        header = TransformerLogicV1_1_0StreamHeaderSerializer(data=header)
+        if not header.is_valid():
+            logger.error(f"Invalid transform stream header: {header.errors}")
+            return Response(header.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Load the transformers once for the whole stream
+        try:
+            transform = self._load(header)
+        except TransformerNotFoundError as e:
+            logger.error(f"{str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except (UnsupportedTransformLanguageError, InvalidHeuristicError, PythonLogicInvalidSyntaxError, PythonLogicNotInModuleError,
+                PythonLogicNotExecutableError) as e:
+            logger.error(f"{str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Transformer loading failed: {str(e)}")
+            logger.exception(e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        results = _iter_result_lines(transform(lines))
+
+        return StreamingHttpResponse(results, content_type="application/x-ndjson", status=status.HTTP_200_OK)
+
+    def _load(self, header: TransformerLogicV1_1_0StreamHeaderSerializer) -> Callable[[Iterable[str]], Iterator[TransformResult]]:
+        if header.validated_data["routes"]:
+            routes = [Route(transformer_id=route["transformer_id"], heuristic=route["heuristic"]) for route in header.validated_data["routes"]]
+            transformers = {route.transformer_id: get_transformer_store().get(route.transformer_id) for route in routes}
+            router = HeuristicRouter(routes)
+
+            if header.validated_data["transform_language"] == TransformLanguage.PYTHON:
+                transformer_batches = {transformer_id: load_python_transformer_batch(transformer) for transformer_id, transformer in transformers.items()}
+                return lambda lines: transform_routed_lines(router, transformer_batches, lines)
+
+            raise UnsupportedTransformLanguageError(f"Unsupported transform language: {header.validated_data['transform_language']}")
+
+        if header.validated_data["transformer_id"]:
+            transformer = get_transformer_store().get(header.validated_data["transformer_id"])
+        else:
+            raw_transformer = header.validated_data["transformer"]
+            transformer = Transformer(
+                id=raw_transformer["id"],
+                dependency_setup=raw_transformer["dependency_setup"] or "",
+                transformer_logic=raw_transformer["transformer_logic"]
+            )
+
+        if header.validated_data["transform_language"] == TransformLanguage.PYTHON:
+            transformer_batch = load_python_transformer_batch(transformer)
+            return lambda lines: transform_lines(transformer_batch, lines)
+
+        raise UnsupportedTransformLanguageError(f"Unsupported transform language: {header.validated_data['transform_language']}")
+    
+class CorpusTemplatesView(APIView):
+    """
+    Groups the entries of a newline-delimited corpus into templates, so that the experts can be run once per template
+    rather than once per entry.  The body is streamed through the parser, so memory use grows with the number of
+    templates rather than the size of the corpus.
+    """
+
+    @csrf_exempt
+    @extend_schema(
+        parameters=[CorpusTemplatesRequestSerializer],
+        request={"text/plain": OpenApiTypes.STR},
+        responses=CorpusTemplatesResponseSerializer
     )
     def post(self, request):
+        logger.info(f"Received corpus templates request: {request.query_params}")
+
+        # Validate the parsing parameters
+        parameters = CorpusTemplatesRequestSerializer(data=request.query_params)
+        if not parameters.is_valid():
+            logger.error(f"Invalid corpus templates request: {parameters.errors}")
+            return Response(parameters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # Perform the task
+        try:
+            parser = mine_templates(_iter_body_lines(request), **parameters.validated_data)
+            clusters = parser.get_clusters()
+            logger.info(f"Found {len(clusters)} templates in {parser.total_entries} entries")
+        except Exception as e:
+            logger.error(f"Template mining failed: {str(e)}")
+            logger.exception(e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # Serialize and return the response
+        response = CorpusTemplatesResponseSerializer(data={
+            "total_entries": parser.total_entries,
+            "clusters": [cluster.to_json() for cluster in clusters]
+        })
+        if not response.is_valid():
+            logger.error(f"Invalid corpus templates response: {response.errors}")
+            return Response(response.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(response.data, status=status.HTTP_200_OK)
+
+class TransformerEntitiesV1_1_0AnalyzeView(AsyncAPIView):
+    @csrf_exempt
+    @extend_schema(
+        request=TransformerEntitiesV1_1_0AnalyzeRequestSerializer,
+        responses={200: TransformerEntitiesV1_1_0AnalyzeResponseSerializer, 202: JobSubmittedResponseSerializer}
+    )
+    async def post(self, request):
         logger.info(f"Received analysis request: {request.data}")
+        bypass_cache = _should_bypass_inference_cache(request)
+        respond_async = _prefers_respond_async(request)
 
         # Validate incoming data
         request = TransformerEntitiesV1_1_0AnalyzeRequestSerializer(data=request.data)
@@ -275,9 +587,14 @@ class TransformerEntitiesV1_1_0AnalyzeView(APIView):
 
         task_id = str(uuid.uuid4())
 
+        if respond_async:
+            return await _submit_job(task_id, "entities_v1_1_0_analyze", lambda: self._respond(task_id, request, bypass_cache))
+        return await self._respond(task_id, request, bypass_cache)
+
+    async def _respond(self, task_id: str, request: TransformerEntitiesV1_1_0AnalyzeRequestSerializer, bypass_cache: bool) -> Response:
         # Perform the task
         try:
-            result = self._analyze(task_id, request)
+            result = await self._analyze(task_id, request, bypass_cache)
             logger.info(f"Analysis successful")
             logger.debug(f"Entities value:\n{json.dumps(result.entities_report.to_json(), indent=4)}")
         except Exception as e:
@@ -300,7 +617,7 @@ class TransformerEntitiesV1_1_0AnalyzeView(APIView):
         
         return Response(response.data, status=status.HTTP_200_OK)
 
-    def _analyze(self, task_id: str, request: TransformerEntitiesV1_1_0AnalyzeRequestSerializer) -> AnalysisTask:
+    async def _analyze(self, task_id: str, request: TransformerEntitiesV1_1_0AnalyzeRequestSerializer, bypass_cache: bool = False) -> AnalysisTask:
             event_name = request.validated_data["ocsf_category"].get_event_name()
             
             expert = get_analysis_expert(OcsfVersion.V1_1_0, event_name)
@@ -320,19 +637,21 @@ class TransformerEntitiesV1_1_0AnalyzeView(APIView):
                 entities_report=None
             )
 
-            result = invoke_analysis_expert(expert, task)
+            result = await ainvoke_analysis_expert(expert, task, bypass_cache=bypass_cache)
 
             return result
     
-class TransformerEntitiesV1_1_0ExtractView(APIView):
+class TransformerEntitiesV1_1_0ExtractView(AsyncAPIView):
 
     @csrf_exempt
     @extend_schema(
         request=TransformerEntitiesV1_1_0ExtractRequestSerializer,
-        responses=TransformerEntitiesV1_1_0ExtractResponseSerializer
+        responses={200: TransformerEntitiesV1_1_0ExtractResponseSerializer, 202: JobSubmittedResponseSerializer}
     )
-    def post(self, request):
+    async def post(self, request):
         logger.info(f"Received extraction request: {request.data}")
+        bypass_cache = _should_bypass_inference_cache(request)
+        respond_async = _prefers_respond_async(request)
 
         # Validate incoming data
         request = TransformerEntitiesV1_1_0ExtractRequestSerializer(data=request.data)
@@ -342,15 +661,21 @@ class TransformerEntitiesV1_1_0ExtractView(APIView):
 
         task_id = str(uuid.uuid4())
 
+        if respond_async:
+            return await _submit_job(task_id, "entities_v1_1_0_extract", lambda: self._respond(task_id, request, bypass_cache))
+        return await self._respond(task_id, request, bypass_cache)
+
+    async def _respond(self, task_id: str, request: TransformerEntitiesV1_1_0ExtractRequestSerializer, bypass_cache: bool) -> Response:
         # Perform the task
         try:
             # Create the extraction patterns
-            result = self._perform_extraction(task_id, request)
+            patterns, failed_mappings = await self._perform_extraction(task_id, request, bypass_cache)
             logger.info(f"Extraction completed")
-            logger.debug(f"Extraction patterns:\n{json.dumps([pattern.to_json() for pattern in result.patterns], indent=4)}")
+            logger.debug(f"Extraction patterns:\n{json.dumps([pattern.to_json() for pattern in patterns], indent=4)}")
 
             # Validate the patterns
-            patterns = self._validate(request.validated_data["input_entry"], result.patterns)
+            # Validation executes the generated code, so run it off the event loop
+            patterns = await sync_to_async(self._validate, thread_sensitive=False)(request.validated_data["input_entry"], patterns)
             logger.info(f"Extraction pattern validation completed")
         except UnsupportedTransformLanguageError as e:
             logger.error(f"{str(e)}")
@@ -367,6 +692,7 @@ class TransformerEntitiesV1_1_0ExtractView(APIView):
             "ocsf_category":  request.validated_data["ocsf_category"].value,
             "input_entry":  request.validated_data["input_entry"],
             "patterns": [pattern.to_json() for pattern in patterns],
+            "failed_mappings": failed_mappings
         })
 
         if not response.is_valid():
@@ -375,68 +701,75 @@ class TransformerEntitiesV1_1_0ExtractView(APIView):
         
         return Response(response.data, status=status.HTTP_200_OK)
 
-    def _perform_extraction(self, task_id: str, request: TransformerEntitiesV1_1_0ExtractRequestSerializer) -> ExtractTask:
+    async def _perform_extraction(self, task_id: str, request: TransformerEntitiesV1_1_0ExtractRequestSerializer,
+                                  bypass_cache: bool = False) -> Tuple[List[ExtractionPattern], List[Dict[str, Any]]]:
             # Perform the inference task to create the extraction patterns
             expert = get_extraction_expert(
                 ocsf_version=OcsfVersion.V1_1_0,
                 ocsf_event_name=request.validated_data["ocsf_category"].get_event_name()
             )
 
-            system_message = expert.system_prompt_factory(
-                input_entry=request.validated_data["input_entry"],
-                mapping_list=[EntityMapping.from_json(raw) for raw in request.validated_data["mappings"]]
-            )
+            if request.validated_data["transform_language"] != TransformLanguage.PYTHON:
+                raise UnsupportedTransformLanguageError(f"Unsupported extraction language: {request.validated_data['transform_language']}")
 
-            turns = [
-                system_message,
-                HumanMessage(content="Please create the extraction patterns.")
-            ]
+            # Large mapping lists are split into shards that are generated concurrently, which keeps each response
+            # short and limits what a single malformed response can lose
+            mappings_by_id = {raw_mapping["id"]: EntityMapping.from_json(raw_mapping) for raw_mapping in request.validated_data["mappings"]}
+            shards = make_extraction_shards(list(mappings_by_id.values()))
 
-            if request.validated_data["transform_language"] == TransformLanguage.PYTHON:
-                task = ExtractTask(
-                    task_id=task_id,
+            tasks = []
+            for shard_number, shard in enumerate(shards):
+                system_message = expert.system_prompt_factory(
+                    input_entry=request.validated_data["input_entry"],
+                    mapping_list=shard
+                )
+
+                turns = [
+                    system_message,
+                    HumanMessage(content="Please create the extraction patterns.")
+                ]
+
+                tasks.append(ExtractTask(
+                    task_id=f"{task_id}-{shard_number}",
                     input=request.validated_data["input_entry"],
                     context=turns,
-                    patterns=None
-                )
-            else:
-                raise UnsupportedTransformLanguageError(f"Unsupported extraction language: {request.validated_data['transform_language']}")
+                    patterns=None,
+                    mappings=shard
+                ))
+
+            results = await ainvoke_sharded_extraction_expert(expert, tasks, bypass_cache=bypass_cache)
 
-            result = invoke_extraction_expert(expert, task)
+            # The patterns of the shards that succeeded are still returned if others failed, along with the mappings
+            # that were lost; only if every shard failed is there nothing to return
+            failed_results = [result for result in results if result.error is not None]
+            if len(failed_results) == len(results):
+                raise ExpertInvocationError(f"Extraction failed for all {len(results)} shards of the mappings: {str(failed_results[0].error)}")
 
             # Map the patterns to the mappings.  This is necessary because the patterns were created by the LLM, but
             # the LLM did not include the original mapping data in its output to save tokens.  We re-join the two using
-            # the mapping ID.
-            try:
-                for pattern in result.patterns:
-                    raw_mapping = next(
-                        (mapping for mapping in request.validated_data["mappings"] if mapping["id"] == pattern.id)
-                    )
-                    pattern.mapping = EntityMapping(
-                        id=raw_mapping["id"],
-                        entities=[
-                            Entity(
-                                value=entity["value"],
-                                description=entity["description"]
-                            )
-                            for entity in raw_mapping["entities"]
-                        ],
-                        ocsf_path=raw_mapping["ocsf_path"],
-                        path_rationale=raw_mapping["path_rationale"]
-                    )
-            except StopIteration:
-                raise ValueError(f"Mapping ID {pattern.id} not found in the input mappings.")
-
-            return result
+            # the mapping ID, which the shard's result has already been checked to only use IDs of its own mappings.
+            patterns = []
+            failed_mappings = []
+            for shard, result in zip(shards, results):
+                if result.error is not None:
+                    logger.warning(f"Extraction failed for the mappings {[mapping.id for mapping in shard]}: {str(result.error)}")
+                    failed_mappings.extend({"mapping": mapping.to_json(), "error": str(result.error)} for mapping in shard)
+                    continue
+
+                for pattern in result.task.patterns:
+                    pattern.mapping = mappings_by_id[pattern.id]
+                    patterns.append(pattern)
+
+                pattern_ids = set(pattern.id for pattern in result.task.patterns)
+                missing_mappings = [mapping for mapping in shard if mapping.id not in pattern_ids]
+                if missing_mappings:
+                    logger.warning(f"No extraction patterns were created for the mappings {[mapping.id for mapping in missing_mappings]}")
+                    failed_mappings.extend({"mapping": mapping.to_json(), "error": "No extraction pattern was created for the mapping"} for mapping in missing_mappings)
+
+            return patterns, failed_mappings
     
     def _validate(self, input_entry: str, patterns: List[ExtractionPattern]) -> List[ExtractionPattern]:
-        for pattern in patterns:
-            pattern.validation_report = PythonExtractionPatternValidator(
-                input_entry=input_entry,
-                pattern=pattern
-            ).validate()
-
-        return patterns
+        return validate_python_extraction_patterns(input_entry, patterns)
 
 class TransformerEntitiesV1_1_0TestView(APIView):
     @csrf_exempt
@@ -507,10 +840,29 @@ class TransformerEntitiesV1_1_0TestView(APIView):
         return Response(response.data, status=status.HTTP_200_OK)
     
     def _validate(self, input_entry: str, patterns: List[ExtractionPattern]) -> List[ExtractionPattern]:
-        for pattern in patterns:
-            pattern.validation_report = PythonExtractionPatternValidator(
-                input_entry=input_entry,
-                pattern=pattern
-            ).validate()
+        return validate_python_extraction_patterns(input_entry, patterns)
+
+
+class JobStatusView(APIView):
+    @extend_schema(
+        responses=JobStatusResponseSerializer
+    )
+    def get(self, request, job_id: str):
+        try:
+            job = get_job_runner().store.get(job_id)
+        except JobNotFoundError as e:
+            logger.error(f"{str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        response = JobStatusResponseSerializer(data=job.to_json())
+        if not response.is_valid():
+            logger.error(f"Invalid job status response: {response.errors}")
+            return Response(response.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(response.data, status=status.HTTP_200_OK)
+
 
-        return patterns
\ No newline at end of file
+class MetricsView(APIView):
+    @extend_schema(exclude=True) # Scraped by Prometheus rather than called by the frontend
+    def get(self, request):
+        return HttpResponse(get_metrics_registry().render(), content_type="text/plain; version=0.0.4; charset=utf-8")